@@ -1,6 +1,9 @@
-from flask import Flask, render_template, request, redirect, session, jsonify, send_file
+from flask import (Flask, Response, has_request_context, render_template, request, redirect, session, jsonify, send_file,
+                   stream_with_context)
 import cohere
-import PyPDF2
+import json
+import math
+import time
 import os
 import re
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -9,49 +12,68 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet
 import io
+import base64
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from dotenv import load_dotenv
-from database import db
-
-# Software job roles
-SOFTWARE_JOB_ROLES = [
-    "Software Engineer", "Backend Developer", "Frontend Developer",
-    "Full Stack Developer", "Data Scientist", "Machine Learning Engineer",
-    "AI Engineer", "DevOps Engineer", "Database Administrator",
-    "Cloud Engineer", "UI/UX Designer", "Cybersecurity Analyst",
-    "Mobile App Developer", "Product Manager", "QA Engineer",
-    "Embedded Systems Engineer", "Game Developer"
-]
-
-# Skill requirements for each job role
-JOB_SKILL_REQUIREMENTS = {
-    "Software Engineer": ["Programming Languages", "Data Structures", "Algorithms", "Software Design", "Testing"],
-    "Backend Developer": ["Programming Languages", "Databases", "APIs", "Server Management", "Cloud Platforms"],
-    "Frontend Developer": ["HTML/CSS", "JavaScript", "React/Vue/Angular", "Responsive Design", "UI/UX"],
-    "Full Stack Developer": ["Frontend Technologies", "Backend Technologies", "Databases", "APIs", "DevOps"],
-    "Data Scientist": ["Python/R", "Machine Learning", "Statistics", "Data Analysis", "SQL"],
-    "Machine Learning Engineer": ["Python", "Machine Learning", "Deep Learning", "Data Processing", "Model Deployment"],
-    "AI Engineer": ["Python", "Machine Learning", "Deep Learning", "NLP", "Computer Vision"],
-    "DevOps Engineer": ["Cloud Platforms", "CI/CD", "Containerization", "Monitoring", "Infrastructure"],
-    "Database Administrator": ["SQL", "Database Design", "Performance Tuning", "Backup/Recovery", "Security"],
-    "Cloud Engineer": ["Cloud Platforms", "Infrastructure", "Automation", "Security", "Networking"],
-    "UI/UX Designer": ["Design Tools", "User Research", "Prototyping", "Visual Design", "Interaction Design"],
-    "Cybersecurity Analyst": ["Security Tools", "Risk Assessment", "Incident Response", "Compliance", "Networking"],
-    "Mobile App Developer": ["Mobile Frameworks", "Platform Knowledge", "APIs", "Testing", "Performance"],
-    "Product Manager": ["Product Strategy", "Market Research", "Agile/Scrum", "Data Analysis", "Communication"],
-    "QA Engineer": ["Testing Frameworks", "Automation", "Manual Testing", "Bug Tracking", "Quality Assurance"],
-    "Embedded Systems Engineer": ["C/C++", "Microcontrollers", "Hardware", "Real-time Systems", "Debugging"],
-    "Game Developer": ["Game Engines", "Programming", "3D Graphics", "Physics", "Game Design"]
-}
+from database import DASHBOARD_SORT_COLUMNS, db
+from db_status import db_status
+from pdf_extraction import extract_pdf_text, pdf_text_cache
+from resume_digest import resume_digests
+from session_store import create_session_interface, persist_session, regenerate_session
+from job_roles import JOB_SKILL_REQUIREMENTS, SOFTWARE_JOB_ROLES
+from skill_matcher import SkillMatcher, requirement_taxonomy, skill_matcher
+from ats_scorer import ats_scorer, local_ats_feedback
+from candidate_index import candidate_index, search_snippet
+from llm_client import LLM_CALL_DEADLINE, LLM_LONG_CALL_DEADLINE, LLMClient, llm_executor
+from llm_parsers import (ATS_SCHEMA, COMBINED_ATS_SCHEMA, EVALUATION_SCHEMA, QUESTIONS_SCHEMA, IncrementalQuestionParser,
+                         parse_ats_output, parse_combined_ats_output, parse_evaluation_output, parse_questions,
+                         parse_questions_output, parse_stats, structured_output_instructions)
+
+# Contact details extracted from uploaded resumes
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+PHONE_PATTERN = re.compile(r'(\+?1[-.\s]?)?(\(?[0-9]{3}\)?[-.\s]?[0-9]{3}[-.\s]?[0-9]{4})')
+NAME_PATTERN = re.compile(r'\b[A-Z][a-z]+ [A-Z][a-z]+\b')
+
+# Matches role requirements ("React/Vue/Angular" matches any of the three) in resumes, built once at startup
+requirement_matcher = SkillMatcher(requirement_taxonomy(JOB_SKILL_REQUIREMENTS, skill_matcher.taxonomy),
+                                   match_names=False)
 
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
 app.secret_key = 'ai_interview_system_secret_key_2024_secure'
+# Keep session data (resume text, questions) on the server; the cookie carries only a session id
+app.session_interface = create_session_interface(db=db)
+
+def index_stored_resume(source, user_id, resume_filename, resume_text, job_role):
+    """Keep the candidate index in step with every resume the database stores, including analysis rewrites"""
+    username = session.get('user') if has_request_context() and session.get('user_id') == user_id else None
+    candidate_index.add(source, user_id, resume_filename, resume_text, username, job_role)
+
+db.add_resume_listener(index_stored_resume)
 
 # Get Cohere API key from environment variable
 cohere_api_key = os.getenv('COHERE_API_KEY', '')
-co = cohere.Client(cohere_api_key)
+# Wrap the client so identical prompts are served from the response cache.
+# The HTTP timeout matches the longest call deadline so abandoned calls release their threads
+# without cutting long generations short.
+co = LLMClient(cohere.Client(cohere_api_key, timeout=math.ceil(max(LLM_CALL_DEADLINE, LLM_LONG_CALL_DEADLINE)) or 120))
+# Seconds /check_ats waits for Cohere before answering with a provisional score (0 waits for the full analysis)
+ATS_RESPONSE_DEADLINE = float(os.getenv('ATS_RESPONSE_DEADLINE', '0'))
+# Responses requested as JSON instead of free text: comma-separated questions, ats, evaluation, or all
+LLM_STRUCTURED_OUTPUT = os.getenv('LLM_STRUCTURED_OUTPUT', '')
+STRUCTURED_FORMATS = ({'questions', 'ats', 'evaluation'} if LLM_STRUCTURED_OUTPUT.strip() == 'all'
+                      else {name.strip() for name in LLM_STRUCTURED_OUTPUT.split(',') if name.strip()})
+# Local ATS score below which /check_ats answers with the local analysis instead of calling Cohere (0 disables)
+ATS_LOCAL_PREFILTER_SCORE = int(os.getenv('ATS_LOCAL_PREFILTER_SCORE', '0'))
+# Roles /best_fit_roles re-scores with Cohere when refinement is requested
+BEST_FIT_REFINE_TOP_K = int(os.getenv('BEST_FIT_REFINE_TOP_K', '3'))
+# How /check_ats asks Cohere for the analysis: 'split' (score and skill gaps in two concurrent calls)
+# or 'combined' (everything from one call)
+ATS_ANALYSIS_MODE = os.getenv('ATS_ANALYSIS_MODE', 'split').strip().lower()
+# Sessions listed per admin dashboard page (per_page can ask for up to 100)
+ADMIN_DASHBOARD_PAGE_SIZE = int(os.getenv('ADMIN_DASHBOARD_PAGE_SIZE', '25'))
 
 # Database is initialized in database.py
 
@@ -63,7 +85,7 @@ def index():
 
 @app.before_request
 def require_login():
-    allowed_routes = ['login', 'register', 'static']
+    allowed_routes = ['login', 'register', 'static', 'liveness', 'readiness']
     if request.endpoint not in allowed_routes and 'user' not in session:
         return redirect('/login')
 
@@ -78,6 +100,8 @@ def login():
         
         user = db.get_user(username)
         if user and check_password_hash(user['password_hash'], password):
+            # New session id on login so an id fixed before authentication is useless afterwards
+            regenerate_session(app, session)
             session['user'] = username
             session['user_id'] = user['id']
             session['role'] = user['role']
@@ -120,10 +144,7 @@ def upload_resume():
     if not file.filename.lower().endswith('.pdf'):
         return jsonify({'error': 'Invalid file format. Only PDF files are allowed.'}), 400
     if file:
-        pdf_reader = PyPDF2.PdfReader(file)
-        text = ''
-        for page in pdf_reader.pages:
-            text += page.extract_text()
+        text = extract_pdf_text(file)
 
         session['resume_text'] = text
         session['resume_filename'] = file.filename
@@ -144,40 +165,21 @@ def upload_resume():
         )
         
         # Update user profile with extracted information
-        import re
-        
         # Extract contact information from resume
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = re.findall(email_pattern, text)
-        email = emails[0] if emails else None
+        email_match = EMAIL_PATTERN.search(text)
+        email = email_match.group(0) if email_match else None
         
-        phone_pattern = r'(\+?1[-.\s]?)?(\(?[0-9]{3}\)?[-.\s]?[0-9]{3}[-.\s]?[0-9]{4})'
-        phones = re.findall(phone_pattern, text)
-        phone = ''.join(phones[0]) if phones else None
+        phone_match = PHONE_PATTERN.search(text)
+        phone = ''.join(group or '' for group in phone_match.groups()) if phone_match else None
         
-        name_pattern = r'\b[A-Z][a-z]+ [A-Z][a-z]+\b'
-        names = re.findall(name_pattern, text)
-        full_name = names[0] if names else None
+        name_match = NAME_PATTERN.search(text)
+        full_name = name_match.group(0) if name_match else None
         
         # Extract skills
-        technical_skills = [
-            'Python', 'JavaScript', 'Java', 'C++', 'C#', 'PHP', 'Ruby', 'Go', 'Rust',
-            'HTML', 'CSS', 'React', 'Vue', 'Angular', 'Node.js', 'Express', 'Django',
-            'Flask', 'Spring', 'Laravel', 'MySQL', 'PostgreSQL', 'MongoDB', 'Redis',
-            'AWS', 'Azure', 'Docker', 'Kubernetes', 'Git', 'Jenkins', 'CI/CD',
-            'Machine Learning', 'AI', 'Data Science', 'Analytics', 'TensorFlow',
-            'PyTorch', 'Pandas', 'NumPy', 'Scikit-learn'
-        ]
-        
-        found_skills = []
-        text_lower = text.lower()
-        for skill in technical_skills:
-            if skill.lower() in text_lower:
-                found_skills.append(skill)
-        
-        skills = ', '.join(found_skills[:10])  # Limit to 10 skills
+        skills = ', '.join(skill_matcher.extract(text, limit=10))  # Limit to 10 skills
         
         # Determine experience level
+        text_lower = text.lower()
         experience_level = 'Entry'
         if any(indicator in text_lower for indicator in ['senior', 'lead', 'principal', 'architect', 'manager', 'director', '5+ years', '10+ years']):
             experience_level = 'Senior'
@@ -196,6 +198,15 @@ def upload_resume():
             resume_text=text
         )
 
+        # Streaming mode: the client opens /stream_questions to receive questions as they are generated
+        if request.form.get('stream') == 'on' or request.args.get('stream') == '1':
+            session['question_request'] = {
+                'job_role': job_role,
+                'question_count': question_count,
+                'include_hr_questions': include_hr_questions
+            }
+            return jsonify({'stream_url': '/stream_questions'})
+
         # Check if Cohere API key is configured
         if not cohere_api_key:
             # Get form parameters for sample questions too
@@ -203,32 +214,7 @@ def upload_resume():
             include_hr_questions = request.form.get('include_hr_questions') == 'on'
             
             # Build sample questions based on user preferences
-            sample_questions = []
-            
-            if include_hr_questions:
-                sample_questions.extend([
-                    "Tell me about yourself and walk me through your background.",
-                    "Why are you interested in this position and our company?",
-                    "What are your greatest strengths and how do they apply to this role?"
-                ])
-            
-            # Add technical/role-specific questions
-            technical_questions = [
-                "Tell me about your experience with the technologies mentioned in your resume.",
-                "Describe a challenging project you worked on and how you overcame obstacles.",
-                "Where do you see yourself in 5 years professionally?",
-                "What interests you most about this role and our company?",
-                "How do you stay updated with the latest trends in your field?",
-                "Describe a time when you had to learn a new technology quickly.",
-                "How do you prioritize tasks when working on multiple projects?",
-                "Tell me about a time you had to work with a difficult team member."
-            ]
-            
-            # Fill remaining slots with technical questions
-            remaining_count = question_count - len(sample_questions)
-            if remaining_count > 0:
-                sample_questions.extend(technical_questions[:remaining_count])
-            
+            sample_questions = build_sample_questions(question_count, include_hr_questions)
             session['questions'] = sample_questions
             return render_template('questions.html', questions=enumerate(sample_questions, 1))
 
@@ -237,10 +223,91 @@ def upload_resume():
             question_count = int(request.form.get('question_count', 5))
             include_hr_questions = request.form.get('include_hr_questions') == 'on'
             
-            # Build the prompt based on user preferences
-            hr_intro_text = ""
-            if include_hr_questions:
-                hr_intro_text = """
+            structured = 'questions' in STRUCTURED_FORMATS
+            prompt = build_question_prompt(resume_for_prompt(text), job_role, question_count, include_hr_questions,
+                                           structured)
+            response = co.chat(
+                model="command-nightly",
+                message=prompt,
+                max_tokens=1000,
+                temperature=0.7,
+                endpoint='upload_resume',
+                parse=lambda text: parse_questions_output(text.strip(), structured) or None
+            )
+            # Save response text into a text file
+            with open("response_output.txt", "w", encoding="utf-8") as file:
+                  file.write(response.text)
+
+            print(response.text)
+            questions = response.parsed or []
+            session['questions'] = questions
+            return render_template('questions.html', questions=enumerate(questions, 1))
+        except Exception as e:
+            # Return sample questions if API call fails
+            # Get form parameters for fallback questions too
+            question_count = int(request.form.get('question_count', 5))
+            include_hr_questions = request.form.get('include_hr_questions') == 'on'
+            
+            # Build fallback questions based on user preferences
+            fallback_questions = build_sample_questions(question_count, include_hr_questions)
+            session['questions'] = fallback_questions
+            return render_template('questions.html', questions=enumerate(fallback_questions, 1))
+    
+    # If no file was processed, return error
+    return jsonify({'error': 'File upload failed'}), 500
+
+def build_sample_questions(question_count, include_hr_questions):
+    """Build sample questions used when the AI is unavailable"""
+    sample_questions = []
+    
+    if include_hr_questions:
+        sample_questions.extend([
+            "Tell me about yourself and walk me through your background.",
+            "Why are you interested in this position and our company?",
+            "What are your greatest strengths and how do they apply to this role?"
+        ])
+    
+    # Add technical/role-specific questions
+    technical_questions = [
+        "Tell me about your experience with the technologies mentioned in your resume.",
+        "Describe a challenging project you worked on and how you overcame obstacles.",
+        "Where do you see yourself in 5 years professionally?",
+        "What interests you most about this role and our company?",
+        "How do you stay updated with the latest trends in your field?",
+        "Describe a time when you had to learn a new technology quickly.",
+        "How do you prioritize tasks when working on multiple projects?",
+        "Tell me about a time you had to work with a difficult team member."
+    ]
+    
+    # Fill remaining slots with technical questions
+    remaining_count = question_count - len(sample_questions)
+    if remaining_count > 0:
+        sample_questions.extend(technical_questions[:remaining_count])
+    return sample_questions
+
+def summarize_resume(prompt, max_tokens):
+    """Ask Cohere for the one-time resume summary used by resume_digests"""
+    return co.chat(
+        model="command-nightly",
+        message=prompt,
+        max_tokens=max_tokens,
+        temperature=0.3,
+        endpoint='resume_digest'
+    ).text
+
+def resume_for_prompt(resume_text):
+    """Resume text to embed in a prompt: normalized once per resume and kept within RESUME_TOKEN_BUDGET"""
+    return resume_digests.prompt_text(resume_text, summarize_resume if cohere_api_key else None)
+
+def build_question_prompt(text, job_role, question_count, include_hr_questions, structured=False):
+    """Build the question generation prompt based on user preferences.
+    
+    With `structured`, the LLM is asked for JSON matching QUESTIONS_SCHEMA
+    instead of the numbered markdown format.
+    """
+    hr_intro_text = ""
+    if include_hr_questions:
+        hr_intro_text = """
 IMPORTANT: Include these common HR introduction questions in your response:
 1. "Tell me about yourself" or "Can you walk me through your background?"
 2. "Why are you interested in this position/company?"
@@ -248,12 +315,30 @@ IMPORTANT: Include these common HR introduction questions in your response:
 
 Then generate additional technical/role-specific questions based on the resume.
 """
-            
-            # Get required skills for the job role
-            required_skills = JOB_SKILL_REQUIREMENTS.get(job_role, [])
-            skills_text = ", ".join(required_skills) if required_skills else "general software development"
-            
-            prompt = f"""Generate {question_count} interview questions for a {job_role} position based on the following resume:
+    
+    # Get required skills for the job role
+    required_skills = JOB_SKILL_REQUIREMENTS.get(job_role, [])
+    skills_text = ", ".join(required_skills) if required_skills else "general software development"
+    
+    if structured:
+        format_text = f"""{structured_output_instructions(QUESTIONS_SCHEMA)}
+
+Return all {question_count} questions in the "questions" array.
+
+JSON:"""
+    else:
+        format_text = f"""Format your response as:
+1. **Question Category**  
+   *"Your question here?"*
+
+2. **Question Category**  
+   *"Your question here?"*
+
+[Continue for all {question_count} questions]
+
+Questions:"""
+    
+    return f"""Generate {question_count} interview questions for a {job_role} position based on the following resume:
 
 TARGET ROLE: {job_role}
 KEY SKILLS TO FOCUS ON: {skills_text}
@@ -269,142 +354,114 @@ Please generate questions that:
 3. Test problem-solving abilities in {job_role} context
 4. Include behavioral questions relevant to the role
 
-Format your response as:
-1. **Question Category**  
-   *"Your question here?"*
-
-2. **Question Category**  
-   *"Your question here?"*
-
-[Continue for all {question_count} questions]
+{format_text}"""
 
-Questions:"""
-            response = co.chat(
-                model="command-nightly",
-                message=prompt,
-                max_tokens=1000,
-                temperature=0.7
-            )
-            # Save response text into a text file
-            with open("response_output.txt", "w", encoding="utf-8") as file:
-                  file.write(response.text)
+def sse_event(event, data):
+    """Format one Server-Sent Event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-            print(response.text)
-            # Split by newlines and clean up
-            questions = []
-            questions_text = response.text.strip()
-            
-            import re
-            
-            # Handle the specific format: "1. **Title** *\"Question\"*"
-            # Look for patterns like: "1. **Title**\n   *\"Question\"*"
-            question_pattern = r'\d+\.\s*\*\*(.*?)\*\*\s*\n\s*\*"(.*?)"\*'
-            matches = re.findall(question_pattern, questions_text, re.DOTALL)
-            
-            if matches:
-                for title, question in matches:
-                    # Clean up the question text
-                    question = question.strip()
-                    if question and len(question) > 10:
+@app.route('/stream_questions')
+def stream_questions():
+    """Stream interview questions for the last uploaded resume as Server-Sent Events.
+    
+    Each question is sent as a `question` event as soon as the parser has a
+    complete item, followed by a final `done` event.
+    """
+    if session.get('role') != 'user':
+        return jsonify({'error': 'Authentication required'}), 401
+    
+    question_request = session.get('question_request')
+    resume_text = session.get('resume_text')
+    if not question_request or resume_text is None:
+        return jsonify({'error': 'Upload a resume with stream enabled first'}), 400
+    
+    def generate():
+        questions = []
+        if cohere_api_key:
+            try:
+                parser = IncrementalQuestionParser()
+                prompt = build_question_prompt(resume_for_prompt(resume_text), **question_request)
+                chunks = co.chat_stream(
+                    model="command-nightly",
+                    message=prompt,
+                    max_tokens=1000,
+                    temperature=0.7,
+                    endpoint='upload_resume',
+                    parse=lambda text: parse_questions(text) or None
+                )
+                for chunk in chunks:
+                    for question in parser.feed(chunk):
                         questions.append(question)
-            
-            # If no matches found with the specific pattern, try simpler numbered patterns
-            if not questions:
-                # Split by numbered lines (1., 2., 3., etc.)
-                lines = questions_text.split('\n')
-                current_question = ""
-                
-                for line in lines:
-                    line = line.strip()
-                    if re.match(r'^\d+\.', line):
-                        # This is a numbered line, save previous question if exists
-                        if current_question and len(current_question) > 10:
-                            questions.append(current_question)
-                        # Start new question - remove numbering and markdown
-                        cleaned = re.sub(r'^\d+\.\s*\*\*(.*?)\*\*\s*', '', line)
-                        cleaned = cleaned.strip('*').strip()
-                        current_question = cleaned
-                    elif line and current_question and not line.startswith('These questions'):
-                        # This is a continuation of the current question
-                        cleaned = line.strip('*').strip()
-                        if cleaned:
-                            current_question += " " + cleaned
-                
-                # Don't forget the last question
-                if current_question and len(current_question) > 10:
-                    questions.append(current_question)
-            
-            # If still no questions, try splitting by numbered patterns on same line
-            if not questions:
-                numbered_parts = re.split(r'\s*\d+\.\s*', questions_text)
-                for part in numbered_parts:
-                    part = part.strip()
-                    # Remove markdown formatting
-                    part = re.sub(r'\*\*(.*?)\*\*', r'\1', part)  # Remove bold
-                    part = re.sub(r'\*(.*?)\*', r'\1', part)      # Remove italic
-                    part = part.strip('*').strip()
-                    if part and len(part) > 10 and not part.startswith('Here are') and not part.startswith('These questions'):
-                        questions.append(part)
-            
-            # Final fallback - just clean the original text
-            if not questions:
-                cleaned = questions_text.lstrip('0123456789.-) ').strip()
-                cleaned = re.sub(r'\*\*(.*?)\*\*', r'\1', cleaned)
-                cleaned = re.sub(r'\*(.*?)\*', r'\1', cleaned)
-                if cleaned:
-                    questions.append(cleaned)
-            session['questions'] = questions
-            return render_template('questions.html', questions=enumerate(questions, 1))
-        except Exception as e:
-            # Return sample questions if API call fails
-            # Get form parameters for fallback questions too
-            question_count = int(request.form.get('question_count', 5))
-            include_hr_questions = request.form.get('include_hr_questions') == 'on'
-            
-            # Build fallback questions based on user preferences
-            fallback_questions = []
-            
-            if include_hr_questions:
-                fallback_questions.extend([
-                    "Tell me about yourself and walk me through your background.",
-                    "Why are you interested in this position and our company?",
-                    "What are your greatest strengths and how do they apply to this role?"
-                ])
-            
-            # Add technical/role-specific questions
-            technical_questions = [
-                "Tell me about your experience with the technologies mentioned in your resume.",
-                "Describe a challenging project you worked on and how you overcame obstacles.",
-                "Where do you see yourself in 5 years professionally?",
-                "What interests you most about this role and our company?",
-                "How do you stay updated with the latest trends in your field?",
-                "Describe a time when you had to learn a new technology quickly.",
-                "How do you prioritize tasks when working on multiple projects?",
-                "Tell me about a time you had to work with a difficult team member."
-            ]
-            
-            # Fill remaining slots with technical questions
-            remaining_count = question_count - len(fallback_questions)
-            if remaining_count > 0:
-                fallback_questions.extend(technical_questions[:remaining_count])
-            
-            session['questions'] = fallback_questions
-            return render_template('questions.html', questions=enumerate(fallback_questions, 1))
+                        yield sse_event('question', {'index': len(questions), 'question': question})
+                for question in parser.finish():
+                    questions.append(question)
+                    yield sse_event('question', {'index': len(questions), 'question': question})
+            except Exception as e:
+                print(f"Error streaming questions: {e}")
+        
+        # Fall back to sample questions if the API is unavailable or returned nothing
+        if not questions:
+            sample_questions = build_sample_questions(
+                question_request['question_count'],
+                question_request['include_hr_questions']
+            )
+            for question in sample_questions:
+                questions.append(question)
+                yield sse_event('question', {'index': len(questions), 'question': question})
+        
+        # Headers (and the session cookie) went out before streaming began, so store the session now
+        session['questions'] = questions
+        session.pop('question_request', None)
+        persist_session(app, session)
+        yield sse_event('done', {'count': len(questions)})
     
-    # If no file was processed, return error
-    return jsonify({'error': 'File upload failed'}), 500
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+# ATS score at or above which the skill-gap analysis is skipped
+STRONG_ALIGNMENT_SCORE = 92
+
+def local_ats_analysis(resume_text, job_role):
+    """Score and feedback from the local scorer, served when the LLM analysis is unavailable"""
+    result = ats_scorer.score(resume_text, job_role)
+    return result['score'], local_ats_feedback(result)
+
+def strong_alignment_analysis():
+    """Skill analysis returned when the ATS score shows no meaningful gaps"""
+    return {
+        'skill_gaps': "Your resume shows strong alignment with the role requirements.",
+        'recommendations': "Consider focusing on advanced topics and leadership skills to further enhance your profile."
+    }
 
 def analyze_skill_gaps(resume_text, job_role, ats_score):
     """Analyze skill gaps and provide recommendations"""
+    if ats_score >= STRONG_ALIGNMENT_SCORE:
+        return strong_alignment_analysis()
+    return generate_skill_gap_analysis(resume_text, job_role)
+
+def keyword_skill_gap_analysis(resume_text, job_role):
+    """Skill gap analysis from the role's required skills missing from the resume, without the LLM"""
+    required_skills = JOB_SKILL_REQUIREMENTS.get(job_role, [])
+    found_skills = requirement_matcher.scan(resume_text)
+    missing_skills = [skill for skill in required_skills if skill not in found_skills]
+    
+    return {
+        'skill_gaps': f"Consider strengthening: {', '.join(missing_skills[:3])}" if missing_skills else "Skills appear well-aligned",
+        'recommendations': f"For {job_role}: Focus on {', '.join(required_skills[:3])}. Consider online courses and certifications.",
+        'youtube_suggestions': f"Search for '{job_role} tutorial', '{job_role} skills', and '{job_role} interview preparation' playlists"
+    }
+
+def generate_skill_gap_analysis(resume_text, job_role):
+    """Generate the skill gap analysis without looking at the ATS score.
+    
+    Safe to run on llm_executor: it never raises.
+    """
     try:
         required_skills = JOB_SKILL_REQUIREMENTS.get(job_role, [])
         
-        if ats_score >= 92:
-            return {
-                'skill_gaps': "Your resume shows strong alignment with the role requirements.",
-                'recommendations': "Consider focusing on advanced topics and leadership skills to further enhance your profile."
-            }
-        
         # Generate skill gap analysis using AI
         if cohere_api_key:
             gap_prompt = f"""Analyze the following resume for a {job_role} position and identify skill gaps:
@@ -412,7 +469,7 @@ def analyze_skill_gaps(resume_text, job_role, ats_score):
 REQUIRED SKILLS: {', '.join(required_skills)}
 
 RESUME:
-{resume_text}
+{resume_for_prompt(resume_text)}
 
 Provide:
 1. Missing skills or areas for improvement
@@ -429,7 +486,8 @@ YOUTUBE PLAYLISTS: [relevant playlist topics]
                 model="command-nightly",
                 message=gap_prompt,
                 max_tokens=300,
-                temperature=0.5
+                temperature=0.5,
+                endpoint='analyze_skill_gaps'
             )
             
             return {
@@ -439,16 +497,7 @@ YOUTUBE PLAYLISTS: [relevant playlist topics]
             }
         else:
             # Fallback recommendations
-            missing_skills = []
-            for skill in required_skills:
-                if skill.lower() not in resume_text.lower():
-                    missing_skills.append(skill)
-            
-            return {
-                'skill_gaps': f"Consider strengthening: {', '.join(missing_skills[:3])}" if missing_skills else "Skills appear well-aligned",
-                'recommendations': f"For {job_role}: Focus on {', '.join(required_skills[:3])}. Consider online courses and certifications.",
-                'youtube_suggestions': f"Search for '{job_role} tutorial', '{job_role} skills', and '{job_role} interview preparation' playlists"
-            }
+            return keyword_skill_gap_analysis(resume_text, job_role)
     except Exception as e:
         return {
             'skill_gaps': "Unable to analyze skill gaps at this time.",
@@ -456,6 +505,42 @@ YOUTUBE PLAYLISTS: [relevant playlist topics]
             'youtube_suggestions': "Search for tutorials related to your target role"
         }
 
+def build_evaluation_prompt(question, answer, structured=False):
+    """Build the answer evaluation prompt; `structured` asks for JSON matching EVALUATION_SCHEMA"""
+    if structured:
+        format_text = f"""{structured_output_instructions(EVALUATION_SCHEMA)}
+
+JSON:"""
+    else:
+        format_text = """Format:
+Score: X/10
+Feedback: [detailed feedback]
+
+Score:"""
+    
+    prompt = f"""Evaluate the following interview answer based on the specific question asked.
+
+QUESTION: {question}
+
+ANSWER: {answer}
+
+Evaluation Criteria:
+1. Relevance to the question asked
+2. Completeness of the answer
+3. Technical accuracy (if applicable)
+4. Use of specific examples
+5. Clarity and structure
+6. Professional communication
+
+Provide a score out of 10 and detailed feedback focusing on:
+- How well the answer addresses the specific question
+- Strengths in the response
+- Areas for improvement
+- Suggestions for better answers
+
+{format_text}"""
+    return prompt
+
 @app.route('/evaluate_answer', methods=['POST'])
 def evaluate_answer():
     # Check if user is authenticated
@@ -496,86 +581,22 @@ def evaluate_answer():
         return jsonify({'evaluation': f"{sample_score}/10 - {sample_feedback}"})
 
     try:
-        eval_prompt = f"""Evaluate the following interview answer based on the specific question asked.
-
-QUESTION: {question}
-
-ANSWER: {answer}
-
-Evaluation Criteria:
-1. Relevance to the question asked
-2. Completeness of the answer
-3. Technical accuracy (if applicable)
-4. Use of specific examples
-5. Clarity and structure
-6. Professional communication
-
-Provide a score out of 10 and detailed feedback focusing on:
-- How well the answer addresses the specific question
-- Strengths in the response
-- Areas for improvement
-- Suggestions for better answers
-
-Format:
-Score: X/10
-Feedback: [detailed feedback]
-
-Score:"""
+        structured = 'evaluation' in STRUCTURED_FORMATS
+        eval_prompt = build_evaluation_prompt(question, answer, structured)
         response = co.chat(
             model="command-nightly",
             message=eval_prompt,
             max_tokens=1000,
-            temperature=0.7
+            temperature=0.7,
+            endpoint='evaluate_answer',
+            parse=lambda text: scored_output(parse_evaluation_output(text.strip(), structured))
         )
 
         output = response.text.strip()
-        lines = output.strip().splitlines()
-        score = None
-        feedback = ""
-
-        # Parse the new format with improved pattern matching
-        for i, line in enumerate(lines):
-            # Look for patterns like "Score: 8/10", "**Score:** 8/10", "8/10", etc.
-            match = re.search(r'(?:Score:?\s*)?(?:\*\*)?(\d{1,2})\s*/\s*10(?:\*\*)?', line, re.IGNORECASE)
-            if match:
-                score = int(match.group(1))
-                # Collect feedback from next lines, skip empty lines but continue
-                feedback_lines = []
-                for feedback_line in lines[i+1:]:
-                    # Remove markdown formatting from feedback lines
-                    clean_line = re.sub(r'\*\*(.*?)\*\*', r'\1', feedback_line.strip())
-                    if clean_line:  # Only add non-empty lines
-                        feedback_lines.append(clean_line)
-                feedback = ' '.join(feedback_lines).strip()
-                # Remove "Feedback:" prefix if present
-                if feedback.lower().startswith('feedback:'):
-                    feedback = feedback[9:].strip()
-                break
-        
-        # If no match found with the above pattern, try a more flexible approach
-        if score is None:
-            # Look for any line containing a number followed by /10
-            for i, line in enumerate(lines):
-                match = re.search(r'(\d{1,2})\s*/\s*10', line)
-                if match:
-                    score = int(match.group(1))
-                    # Collect feedback from remaining lines, skip empty lines but continue
-                    feedback_lines = []
-                    for feedback_line in lines[i+1:]:
-                        # Remove markdown formatting from feedback lines
-                        clean_line = re.sub(r'\*\*(.*?)\*\*', r'\1', feedback_line.strip())
-                        if clean_line:  # Only add non-empty lines
-                            feedback_lines.append(clean_line)
-                    feedback = ' '.join(feedback_lines).strip()
-                    # Remove "Feedback:" prefix if present
-                    if feedback.lower().startswith('feedback:'):
-                        feedback = feedback[9:].strip()
-                    break
-
-        if score is None or not feedback:
-            print(f"Error parsing evaluation response. Score: {score}, Feedback: '{feedback}'")
-            print(f"Raw output: {output}")
+        if response.parsed is None:
+            print(f"Error parsing evaluation response. Raw output: {output}")
             return jsonify({'error': 'AI did not return a valid score or feedback.', 'raw': output}), 500
+        score, feedback = response.parsed
 
         # Update session data in database
         db.update_session_data_with_analysis(
@@ -609,6 +630,212 @@ Score:"""
         
         return jsonify({'evaluation': f"{sample_score}/10 - {sample_feedback}"})
 
+def scored_output(result):
+    """(score, feedback) from a parser, or None when either is missing so the response is not cached"""
+    score, feedback = result
+    return result if score is not None and feedback else None
+
+def combined_output(analysis):
+    """A parsed combined ATS analysis, or None when its score or feedback is missing"""
+    return analysis if analysis['score'] is not None and analysis['feedback'] else None
+
+def build_ats_prompt(resume_text, job_role, structured=False):
+    """Build the ATS scoring prompt; `structured` asks for JSON matching ATS_SCHEMA"""
+    if structured:
+        return f"""
+        You are an advanced ATS system evaluating a resume for the role of {job_role}.
+        score: a numeric score out of 100.
+        feedback: a detailed, accurate feedback in 2-3 sentences.
+        Feedback must include:
+        - strengths (skills, education, experience, formatting, keywords)
+        - weaknesses or gaps (missing skills, unclear sections, lack of quantifiable achievements)
+        - a breakdown of the score (e.g. skills-40%, education-25%, experience-35% = 100%)
+        Resume:
+        {resume_text}
+        {structured_output_instructions(ATS_SCHEMA)}
+        JSON:
+        """.strip()
+    
+    return f"""
+        You are an advanced ATS system evaluating a resume for the role of {job_role}.
+        First line: return only a numeric score out of 100 like this format -> 85/100
+        Second line: give a detailed, accurate feedback in 2-3 sentences. 
+        Feedback must include: 
+        - strengths (skills, education, experience, formatting, keywords)
+        - weaknesses or gaps (missing skills, unclear sections, lack of quantifiable achievements)
+        - a breakdown of the score (e.g. skills-40%, education-25%, experience-35% = 100%)
+        Resume:
+        {resume_text}
+        Score:
+        """.strip()
+
+def build_combined_ats_prompt(resume_text, job_role, structured=False):
+    """Build the single prompt for the ATS score, feedback and skill-gap analysis;
+    `structured` asks for JSON matching COMBINED_ATS_SCHEMA"""
+    required_skills = JOB_SKILL_REQUIREMENTS.get(job_role, [])
+    if structured:
+        format_text = f"""{structured_output_instructions(COMBINED_ATS_SCHEMA)}
+        JSON:"""
+    else:
+        format_text = """Format as:
+        SCORE: [numeric score out of 100, like 85/100]
+        FEEDBACK: [2-3 sentences]
+        SKILL GAPS: [list missing skills]
+        RECOMMENDATIONS: [specific courses/certifications]
+        YOUTUBE PLAYLISTS: [relevant playlist topics]
+        SCORE:"""
+    
+    return f"""
+        You are an advanced ATS system evaluating a resume for the role of {job_role}.
+        REQUIRED SKILLS: {', '.join(required_skills)}
+        Provide:
+        1. A numeric score out of 100
+        2. Detailed, accurate feedback in 2-3 sentences, including strengths (skills, education, experience, formatting, keywords),
+           weaknesses or gaps (missing skills, unclear sections, lack of quantifiable achievements)
+           and a breakdown of the score (e.g. skills-40%, education-25%, experience-35% = 100%)
+        3. Missing skills or areas for improvement
+        4. Specific recommendations for courses, certifications, or learning paths
+        5. YouTube playlist suggestions for skill development
+        Resume:
+        {resume_text}
+        {format_text}
+        """.strip()
+
+def request_combined_ats_analysis(prompt, structured=False):
+    """Ask Cohere for the ATS score, feedback and skill gaps in one call; `parsed` holds the analysis"""
+    return co.chat(
+        model="command-nightly",
+        message=prompt,
+        max_tokens=500,
+        temperature=0.5,
+        endpoint='check_ats',
+        parse=lambda text: combined_output(parse_combined_ats_output(text.strip(), structured))
+    )
+
+def combined_skill_analysis(analysis, resume_text, job_role):
+    """Skill analysis fields of a parsed combined response; missing sections come from the keyword analysis"""
+    fallback = keyword_skill_gap_analysis(resume_text, job_role)
+    return {field: analysis.get(field) or fallback[field]
+            for field in ('skill_gaps', 'recommendations', 'youtube_suggestions')}
+
+def request_ats_score(prompt, structured=False):
+    """Ask Cohere for the ATS score and feedback; `parsed` holds (score, feedback)"""
+    return co.chat(
+        model="command-nightly",
+        message=prompt,
+        max_tokens=200,
+        temperature=0.5,
+        endpoint='check_ats',
+        parse=lambda text: scored_output(parse_ats_output(text.strip(), structured))
+    )
+
+def provisional_ats_result(resume_text, job_role, score=None, feedback=None):
+    """Response for /check_ats when Cohere misses the deadline; the real analysis is saved later"""
+    if score is None:
+        score, feedback = local_ats_analysis(resume_text, job_role)
+    skill_analysis = keyword_skill_gap_analysis(resume_text, job_role)
+    return {
+        'score': score,
+        'feedback': feedback,
+        'skill_gaps': skill_analysis['skill_gaps'],
+        'recommendations': skill_analysis['recommendations'],
+        'provisional': True
+    }
+
+def save_ats_analysis(user_id, resume_filename, resume_text, job_role, score, feedback, skill_analysis):
+    """Store an ATS analysis so later /check_ats requests for the same resume reuse it"""
+    try:
+        db.update_session_data_with_analysis(
+            user_id,
+            resume_filename,
+            resume_text,
+            job_role,
+            ats_score=score,
+            ats_feedback=feedback,
+            skill_gaps=skill_analysis['skill_gaps'],
+            recommendations=skill_analysis['recommendations']
+        )
+    except Exception as db_error:
+        print(f"Database error saving ATS analysis: {db_error}")
+
+def backfill_ats_analysis(user_id, resume_filename, resume_text, job_role, score_future, skill_gap_future,
+                          structured=False):
+    """Save the real ATS analysis once Cohere answers after the response deadline.
+    
+    Runs as callbacks on the futures, so no request thread waits for it.
+    """
+    def on_score(future):
+        try:
+            score, feedback = future.result().parsed or (None, "")
+        except Exception as e:
+            print(f"Background ATS analysis failed: {e}")
+            score, feedback = None, ""
+        
+        if score is None or not feedback:
+            skill_gap_future.cancel()
+        elif score >= STRONG_ALIGNMENT_SCORE:
+            skill_gap_future.cancel()
+            save_ats_analysis(user_id, resume_filename, resume_text, job_role,
+                              score, feedback, strong_alignment_analysis())
+        else:
+            skill_gap_future.add_done_callback(
+                lambda gap_future: save_ats_analysis(user_id, resume_filename, resume_text, job_role,
+                                                     score, feedback, gap_future.result()))
+    
+    score_future.add_done_callback(on_score)
+
+def save_combined_ats_result(user_id, resume_filename, resume_text, job_role, future, structured=False):
+    """Done callback that saves a combined analysis which arrived after the response deadline"""
+    try:
+        analysis = future.result().parsed
+    except Exception as e:
+        print(f"Background ATS analysis failed: {e}")
+        return
+    if analysis is not None:
+        save_ats_analysis(user_id, resume_filename, resume_text, job_role, analysis['score'], analysis['feedback'],
+                          combined_skill_analysis(analysis, resume_text, job_role))
+
+def combined_ats_check(user_id, resume_filename, resume_text, job_role):
+    """/check_ats in combined mode: score, feedback and skill gaps from a single Cohere call"""
+    structured = 'ats' in STRUCTURED_FORMATS
+    prompt = build_combined_ats_prompt(resume_for_prompt(resume_text), job_role, structured)
+    try:
+        if ATS_RESPONSE_DEADLINE > 0:
+            # Wait up to the deadline; a late answer is saved in the background
+            future = llm_executor.submit(request_combined_ats_analysis, prompt, structured)
+            try:
+                response = future.result(timeout=ATS_RESPONSE_DEADLINE)
+            except FutureTimeoutError:
+                future.add_done_callback(
+                    lambda done: save_combined_ats_result(user_id, resume_filename, resume_text, job_role,
+                                                          done, structured))
+                return jsonify(provisional_ats_result(resume_text, job_role))
+        else:
+            response = request_combined_ats_analysis(prompt, structured)
+        
+        output = response.text.strip()
+        analysis = response.parsed
+        if analysis is None:
+            return jsonify({'error': 'AI did not return a valid score or feedback.', 'raw': output}), 500
+        
+        score, feedback = analysis['score'], analysis['feedback']
+        skill_analysis = combined_skill_analysis(analysis, resume_text, job_role)
+    except Exception as e:
+        print(f"Error in combined check_ats: {e}")
+        import traceback
+        traceback.print_exc()
+        
+        score, feedback = local_ats_analysis(resume_text, job_role)
+        skill_analysis = keyword_skill_gap_analysis(resume_text, job_role)
+    
+    save_ats_analysis(user_id, resume_filename, resume_text, job_role, score, feedback, skill_analysis)
+    return jsonify({
+        'score': score, 
+        'feedback': feedback,
+        'skill_gaps': skill_analysis['skill_gaps'],
+        'recommendations': skill_analysis['recommendations']
+    })
+
 @app.route('/check_ats', methods=['POST'])
 def check_ats():
     # Check if user is authenticated
@@ -623,10 +850,7 @@ def check_ats():
     if not file.filename.lower().endswith('.pdf'):
         return jsonify({'error': 'Invalid file format. Only PDF files are allowed.'}), 400
 
-    pdf_reader = PyPDF2.PdfReader(file)
-    text = ''
-    for page in pdf_reader.pages:
-        text += page.extract_text()
+    text = extract_pdf_text(file)
 
     session['resume_text'] = text
     session['resume_filename'] = file.filename
@@ -645,11 +869,7 @@ def check_ats():
             })
 
     if not cohere_api_key:
-        sample_score = 75
-        sample_feedback = (
-            "Sample ATS analysis: Skills-40%, Education-25%, Experience-35% (Total: 100%). "
-            "Your resume covers most required skills and education, but could benefit from more detailed experience descriptions."
-        )
+        sample_score, sample_feedback = local_ats_analysis(text, job_role)
         
         # Get sample skill analysis
         skill_analysis = analyze_skill_gaps(text, job_role, sample_score)
@@ -675,68 +895,67 @@ def check_ats():
             'recommendations': skill_analysis['recommendations']
         })
 
+    user_id = session.get('user_id')
+    if ATS_LOCAL_PREFILTER_SCORE > 0:
+        local_result = ats_scorer.score(text, job_role)
+        if local_result['score'] < ATS_LOCAL_PREFILTER_SCORE:
+            # Too weak a match for the role to be worth an LLM call
+            feedback = local_ats_feedback(local_result)
+            skill_analysis = keyword_skill_gap_analysis(text, job_role)
+            save_ats_analysis(user_id, file.filename, text, job_role, local_result['score'], feedback, skill_analysis)
+            return jsonify({
+                'score': local_result['score'],
+                'feedback': feedback,
+                'skill_gaps': skill_analysis['skill_gaps'],
+                'recommendations': skill_analysis['recommendations'],
+                'breakdown': local_result['breakdown']
+            })
+    
+    if ATS_ANALYSIS_MODE == 'combined':
+        return combined_ats_check(user_id, file.filename, text, job_role)
+    
+    deadline_at = time.monotonic() + ATS_RESPONSE_DEADLINE
+    skill_gap_future = None
     try:
-        prompt = f"""
-        You are an advanced ATS system evaluating a resume for the role of {job_role}.
-        First line: return only a numeric score out of 100 like this format -> 85/100
-        Second line: give a detailed, accurate feedback in 2-3 sentences. 
-        Feedback must include: 
-        - strengths (skills, education, experience, formatting, keywords)
-        - weaknesses or gaps (missing skills, unclear sections, lack of quantifiable achievements)
-        - a breakdown of the score (e.g. skills-40%, education-25%, experience-35% = 100%)
-        Resume:
-        {text}
-        Score:
-        """.strip()
-
-        response = co.chat(
-            model="command-nightly",
-            message=prompt,
-            max_tokens=200,
-            temperature=0.5
-        )
+        # Start the skill-gap call now so it overlaps with the ATS score call;
+        # its result is ignored if the score turns out to be high enough
+        skill_gap_future = llm_executor.submit(generate_skill_gap_analysis, text, job_role)
+        
+        structured = 'ats' in STRUCTURED_FORMATS
+        prompt = build_ats_prompt(resume_for_prompt(text), job_role, structured)
+
+        if ATS_RESPONSE_DEADLINE > 0:
+            # Wait up to the deadline; a late answer is saved in the background
+            score_future = llm_executor.submit(request_ats_score, prompt, structured)
+            try:
+                response = score_future.result(timeout=ATS_RESPONSE_DEADLINE)
+            except FutureTimeoutError:
+                backfill_ats_analysis(user_id, file.filename, text, job_role, score_future, skill_gap_future,
+                                      structured)
+                return jsonify(provisional_ats_result(text, job_role))
+        else:
+            response = request_ats_score(prompt, structured)
 
         output = response.text.strip()
-        lines = output.splitlines()
-        score = None
-        feedback = ""
-
-        for i, line in enumerate(lines):
-            # Look for patterns like "**Score:** 85/100", "**82/100**", "**Score: 82/100**", "82/100", or "Score: 82/100"
-            match = re.search(r'(?:Score:?\s*)?(?:\*\*)?(\d{1,3})\s*/\s*100(?:\*\*)?', line, re.IGNORECASE)
-            if match:
-                score = int(match.group(1))
-                # Collect feedback from next lines, skip empty lines but continue
-                feedback_lines = []
-                for feedback_line in lines[i+1:]:
-                    # Remove markdown formatting from feedback lines
-                    clean_line = re.sub(r'\*\*(.*?)\*\*', r'\1', feedback_line.strip())
-                    if clean_line:  # Only add non-empty lines
-                        feedback_lines.append(clean_line)
-                feedback = ' '.join(feedback_lines).strip()
-                break
-        
-        # If no match found with the above pattern, try a more flexible approach
-        if score is None:
-            # Look for any line containing a number followed by /100
-            for i, line in enumerate(lines):
-                match = re.search(r'(\d{1,3})\s*/\s*100', line)
-                if match:
-                    score = int(match.group(1))
-                    # Collect feedback from remaining lines, skip empty lines but continue
-                    feedback_lines = []
-                    for feedback_line in lines[i+1:]:
-                        # Remove markdown formatting from feedback lines
-                        clean_line = re.sub(r'\*\*(.*?)\*\*', r'\1', feedback_line.strip())
-                        if clean_line:  # Only add non-empty lines
-                            feedback_lines.append(clean_line)
-                    feedback = ' '.join(feedback_lines).strip()
-                    break
-
-        if score is None or not feedback:
+        if response.parsed is None:
+            skill_gap_future.cancel()
             return jsonify({'error': 'AI did not return a valid score or feedback.', 'raw': output}), 500
-
-        skill_analysis = analyze_skill_gaps(text, job_role, score)
+        score, feedback = response.parsed
+
+        if score >= STRONG_ALIGNMENT_SCORE:
+            skill_gap_future.cancel()
+            skill_analysis = strong_alignment_analysis()
+        elif ATS_RESPONSE_DEADLINE > 0:
+            try:
+                skill_analysis = skill_gap_future.result(timeout=max(0, deadline_at - time.monotonic()))
+            except FutureTimeoutError:
+                # Return the real score now and save the full analysis once the skill gaps arrive
+                skill_gap_future.add_done_callback(
+                    lambda future: save_ats_analysis(user_id, file.filename, text, job_role,
+                                                     score, feedback, future.result()))
+                return jsonify(provisional_ats_result(text, job_role, score, feedback))
+        else:
+            skill_analysis = skill_gap_future.result()
         
         # Update session data with analysis
         try:
@@ -765,15 +984,19 @@ def check_ats():
         import traceback
         traceback.print_exc()
         
-        sample_score = 75
-        sample_feedback = (
-            "Sample ATS analysis: Skills-40%, Education-25%, Experience-35% (Total: 100%). "
-            "Your resume covers most required skills and education, but could benefit from more detailed experience descriptions."
-        )
+        sample_score, sample_feedback = local_ats_analysis(text, job_role)
         
         # Try to update database with sample data
         try:
-            skill_analysis = analyze_skill_gaps(text, job_role, sample_score)
+            if skill_gap_future is not None and not skill_gap_future.cancelled():
+                # Never wait past the response deadline for the skill gaps
+                timeout = max(0, deadline_at - time.monotonic()) if ATS_RESPONSE_DEADLINE > 0 else None
+                try:
+                    skill_analysis = skill_gap_future.result(timeout=timeout)
+                except FutureTimeoutError:
+                    return jsonify(provisional_ats_result(text, job_role, sample_score, sample_feedback))
+            else:
+                skill_analysis = analyze_skill_gaps(text, job_role, sample_score)
             db.update_session_data_with_analysis(
                 session.get('user_id'),
                 file.filename,
@@ -798,44 +1021,146 @@ def check_ats():
             'recommendations': skill_analysis['recommendations']
         })
 
+def refine_best_fit_roles(resume_text, ranked):
+    """Add Cohere's ATS score and feedback to each ranked role, calling it for all of them concurrently.
+    
+    Uses the /check_ats prompt, so a later ATS check for one of these roles is a cache hit.
+    Roles whose call fails keep only their local score.
+    """
+    structured = 'ats' in STRUCTURED_FORMATS
+    prompt_text = resume_for_prompt(resume_text)
+    futures = [llm_executor.submit(request_ats_score, build_ats_prompt(prompt_text, result['role'], structured),
+                                   structured)
+               for result in ranked]
+    for result, future in zip(ranked, futures):
+        try:
+            parsed = future.result().parsed
+        except Exception as e:
+            print(f"Best-fit refinement failed for {result['role']}: {e}")
+            continue
+        if parsed is not None:
+            result['llm_score'], result['llm_feedback'] = parsed
+    # Refined roles are ordered by the LLM score, falling back to the local one
+    ranked.sort(key=lambda result: result.get('llm_score', result['score']), reverse=True)
+    return ranked
+
+@app.route('/best_fit_roles', methods=['POST'])
+def best_fit_roles():
+    """Rank every software role for an uploaded or stored resume with the local ATS scorer"""
+    if 'user' not in session:
+        return jsonify({'error': 'Authentication required'}), 401
+    
+    data = request.get_json(silent=True) or {}
+    refine = (request.form.get('refine') == 'on' or request.args.get('refine') == '1'
+              or data.get('refine') is True)
+    try:
+        top_k = int(request.form.get('top_k') or request.args.get('top_k') or data.get('top_k') or BEST_FIT_REFINE_TOP_K)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'top_k must be an integer'}), 400
+    top_k = min(max(top_k, 1), len(JOB_SKILL_REQUIREMENTS))
+    
+    file = request.files.get('resume')
+    if file and file.filename:
+        if not file.filename.lower().endswith('.pdf'):
+            return jsonify({'error': 'Invalid file format. Only PDF files are allowed.'}), 400
+        text = extract_pdf_text(file)
+    else:
+        text = session.get('resume_text')
+        if not text:
+            records = db.get_session_data(session.get('user_id'))
+            text = next((record['resume_text'] for record in records if record.get('resume_text')), None)
+    if not text:
+        return jsonify({'error': 'No resume uploaded'}), 400
+    
+    # One vectorized pass scores the resume against every role
+    ranked = [result for result in ats_scorer.rank(text) if result['role'] in SOFTWARE_JOB_ROLES]
+    refined = 0
+    if refine and cohere_api_key:
+        ranked[:top_k] = refine_best_fit_roles(text, ranked[:top_k])
+        refined = sum(1 for result in ranked[:top_k] if 'llm_score' in result)
+    
+    return jsonify({'roles': ranked, 'refined': refined})
+
+def encode_dashboard_cursor(row, sort):
+    """Opaque `after` token for the page following row"""
+    column = DASHBOARD_SORT_COLUMNS[sort]
+    position = [sort, row[column] if column else None, str(row['updated_at']), row['id']]
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+def decode_dashboard_cursor(token, sort):
+    """(score, updated_at, id) from an `after` token, or None to start from the first page"""
+    if not token:
+        return None
+    try:
+        token_sort, score, updated_at, row_id = json.loads(base64.urlsafe_b64decode(token.encode()))
+        if token_sort != sort or not (score is None or isinstance(score, (int, float))):
+            return None
+        return (score, str(updated_at), int(row_id))
+    except (ValueError, TypeError):
+        return None
+
+def score_buckets(counts):
+    """(score, sessions) pairs in score order from a {score: sessions} distribution, for the dashboard charts"""
+    return sorted(counts.items())
+
+def expand_score_buckets(buckets):
+    """One score per session, highest first, for templates that still chart ats_scores/interview_scores"""
+    scores = []
+    for score, sessions in reversed(buckets):
+        scores.extend([score] * sessions)
+    return scores
+
 @app.route('/admin_dashboard')
 def admin_dashboard():
     if session.get('role') != 'admin':
         return redirect('/'), 403
 
-    # Get all session data with user profile information
-    users = db.get_all_session_data_with_profiles()
-    ats_scores = [u['ats_score'] for u in users if u.get('ats_score') is not None]
-    interview_scores = [u['interview_score'] for u in users if u.get('interview_score') is not None]
-    average_ats = round(sum(ats_scores) / len(ats_scores), 2) if ats_scores else 0
-    highest_interview = max(interview_scores) if interview_scores else 0
+    sort = request.args.get('sort', 'ats_score')
+    if sort not in DASHBOARD_SORT_COLUMNS:
+        sort = 'ats_score'
+    try:
+        per_page = min(100, max(1, int(request.args.get('per_page', ADMIN_DASHBOARD_PAGE_SIZE))))
+    except ValueError:
+        per_page = ADMIN_DASHBOARD_PAGE_SIZE
+    after = decode_dashboard_cursor(request.args.get('after'), sort)
+
+    # One keyset page of sessions with user profile information
+    users, has_more = db.get_dashboard_page(sort, after, per_page)
+    next_cursor = encode_dashboard_cursor(users[-1], sort) if has_more else None
+
+    # Header and chart numbers from per-role and per-score aggregates, never from session rows
+    role_stats = db.get_role_stats()
+    ats_sessions = sum(stats['ats_sessions'] for stats in role_stats)
+    average_ats = round(sum(stats['ats_total'] for stats in role_stats) / ats_sessions, 2) if ats_sessions else 0
+    highest_interview = max((stats['highest_interview'] for stats in role_stats
+                             if stats['highest_interview'] is not None), default=0)
 
-    # Group data by job roles for analytics
     job_roles = {}
-    for user in users:
-        role = user.get('job_role', 'Not Specified')
-        if role not in job_roles:
-            job_roles[role] = {'count': 0, 'avg_ats': 0, 'avg_interview': 0}
-        job_roles[role]['count'] += 1
-        if user.get('ats_score'):
-            job_roles[role]['avg_ats'] += user['ats_score']
-        if user.get('interview_score'):
-            job_roles[role]['avg_interview'] += user['interview_score']
-    
-    # Calculate averages
-    for role in job_roles:
-        if job_roles[role]['count'] > 0:
-            job_roles[role]['avg_ats'] = round(job_roles[role]['avg_ats'] / job_roles[role]['count'], 2)
-            job_roles[role]['avg_interview'] = round(job_roles[role]['avg_interview'] / job_roles[role]['count'], 2)
+    for stats in role_stats:
+        job_roles[stats['job_role']] = {
+            'count': stats['sessions'],
+            'avg_ats': round(stats['ats_total'] / stats['sessions'], 2),
+            'avg_interview': round(stats['interview_total'] / stats['sessions'], 2)
+        }
+
+    # Charts get one (score, sessions) bucket per distinct score, however many sessions there are
+    distribution = db.get_score_distribution()
+    ats_score_buckets = score_buckets(distribution['ats'])
+    interview_score_buckets = score_buckets(distribution['interview'])
 
     return render_template(
         'admin_dashboard.html',
         data=users,
-        ats_scores=ats_scores,
-        interview_scores=interview_scores,
+        ats_score_buckets=ats_score_buckets,
+        interview_score_buckets=interview_score_buckets,
+        ats_scores=expand_score_buckets(ats_score_buckets),
+        interview_scores=expand_score_buckets(interview_score_buckets),
         average_ats=average_ats,
         highest_interview=highest_interview,
-        job_roles=job_roles
+        job_roles=job_roles,
+        sort=sort,
+        per_page=per_page,
+        next_cursor=next_cursor
     )
 
 @app.route('/download_pdf')
@@ -887,39 +1212,135 @@ def download_pdf():
 @app.route('/logout')
 def logout():
     session.clear()
+    regenerate_session(app, session)
     return redirect('/login'), 302
 
 @app.route('/api/database/status')
 def database_status():
-    """API endpoint to check database status (admin only)"""
+    """API endpoint reporting database status from a snapshot refreshed at most once per DB_STATUS_TTL_SECONDS (admin only)"""
     if session.get('role') != 'admin':
         return jsonify({'error': 'Admin access required'}), 403
     
+    snapshot, age = db_status.status()
+    response = dict(snapshot, pool=db.pool.stats(), snapshot_age_seconds=age)
+    return jsonify(response), 500 if snapshot['status'] == 'error' else 200
+
+@app.route('/api/health/live')
+def liveness():
+    """Liveness probe: the process is serving requests; never touches the database"""
+    return jsonify({'status': 'ok'})
+
+@app.route('/api/health/ready')
+def readiness():
+    """Readiness probe: the database answered a ping within the last DB_READY_TTL_SECONDS"""
+    ready, age = db_status.ready()
+    return jsonify({
+        'status': 'ready' if ready else 'unavailable',
+        'database': bool(ready),
+        'checked_seconds_ago': age
+    }), 200 if ready else 503
+
+def candidate_index_warming():
+    """503 answer for candidate queries while the index is still being built from the database"""
+    return jsonify({'error': 'Candidate index is warming up, retry shortly', 'warming': True}), 503, {'Retry-After': '5'}
+
+@app.route('/api/candidates/similar')
+def similar_candidates():
+    """API endpoint listing candidates with resumes similar to a user's resume or a text query (admin only)"""
+    if session.get('role') != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+
     try:
-        stats = db.get_database_stats()
-        health = db.verify_database_health()
-        
-        return jsonify({
-            'status': 'healthy' if health else 'warning',
-            'connection': db.connection.is_connected() if db.connection else False,
-            'stats': stats,
-            'timestamp': db.connection.get_server_info() if db.connection else 'Unknown'
-        })
-    except Exception as e:
-        return jsonify({
-            'status': 'error',
-            'connection': False,
-            'error': str(e)
-        }), 500
+        k = min(100, max(1, int(request.args.get('k', 10))))
+        user_id = int(request.args['user_id']) if request.args.get('user_id') else None
+    except ValueError:
+        return jsonify({'error': 'k and user_id must be integers'}), 400
+
+    resume_text = request.args.get('text', '')
+    if user_id is not None:
+        profile = db.get_user_profile(user_id)
+        resume_text = profile.get('resume_text') if profile else None
+        if not resume_text:
+            records = db.get_session_data(user_id)
+            resume_text = next((record['resume_text'] for record in records if record.get('resume_text')), None)
+        if not resume_text:
+            return jsonify({'error': 'No resume found for this user'}), 404
+    if not resume_text.strip():
+        return jsonify({'error': 'Provide a user_id or a text query'}), 400
+
+    if not candidate_index.refresh_in_background(db):
+        return candidate_index_warming()
+    return jsonify({'candidates': candidate_index.similar(resume_text, k, exclude_user_id=user_id)})
+
+@app.route('/api/candidates/search')
+def search_candidates():
+    """API endpoint for keyword search over candidate resumes, with highlighted snippets (admin only)"""
+    if session.get('role') != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Query parameter q is required'}), 400
+    try:
+        page = max(1, int(request.args.get('page', 1)))
+        per_page = min(50, max(1, int(request.args.get('per_page', 20))))
+    except ValueError:
+        return jsonify({'error': 'page and per_page must be integers'}), 400
+
+    if not candidate_index.refresh_in_background(db):
+        return candidate_index_warming()
+    found = candidate_index.search(query, page, per_page)
+
+    # Only the resumes on this page are read back, for their snippets
+    keys = [(result['source'], result['user_id'], result['resume_filename']) for result in found['results']]
+    texts = db.get_resume_texts(keys) if keys else {}
+    for key, result in zip(keys, found['results']):
+        result['snippet'] = search_snippet(texts.get(key), query) if texts.get(key) else None
+
+    return jsonify({
+        'query': query,
+        'page': page,
+        'per_page': per_page,
+        'total': found['total'],
+        'results': found['results']
+    })
+
+@app.route('/api/metrics')
+def metrics():
+    """API endpoint exposing cache, pool, LLM, parser, index and status snapshot counters (admin only)"""
+    if session.get('role') != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+    
+    return jsonify({
+        'pdf_text_cache': pdf_text_cache.stats(),
+        'db_pool': db.pool.stats(),
+        'llm': co.stats(),
+        'parsers': parse_stats.stats(),
+        'resume_digest': resume_digests.stats(),
+        'local_ats': ats_scorer.stats(),
+        'candidate_index': candidate_index.stats(),
+        'db_status': db_status.stats()
+    })
+
+# Set once the first request has checked the database (Flask 2.3 has no before_first_request)
+database_initialized = False
 
-@app.before_first_request
+@app.before_request
 def initialize_database():
     """Initialize database on first request"""
+    global database_initialized
+    # Health probes are often a process's first requests and must stay cheap
+    if database_initialized or request.endpoint in ('liveness', 'readiness'):
+        return
+    database_initialized = True
     try:
         # Verify database health on startup
         if hasattr(db, 'verify_database_health'):
             db.verify_database_health()
         
+        # Build the candidate index off the request threads
+        candidate_index.refresh_in_background(db)
+        
         # Get and log database stats
         if hasattr(db, 'get_database_stats'):
             stats = db.get_database_stats()
@@ -927,14 +1348,5 @@ def initialize_database():
     except Exception as e:
         print(f"⚠️ Database initialization warning: {e}")
 
-@app.teardown_appcontext
-def close_db(error):
-    """Close database connection when app context ends"""
-    try:
-        if hasattr(db, 'connection') and db.connection and db.connection.is_connected():
-            db.connection.close()
-    except Exception as e:
-        print(f"Error closing database connection: {e}")
-
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,241 @@
+import os
+import re
+import threading
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+
+from job_roles import JOB_SKILL_REQUIREMENTS
+from skill_matcher import (CASE_SENSITIVE_MAX_LENGTH, DEFAULT_SKILL_TAXONOMY, SkillMatcher, requirement_taxonomy,
+                           skill_matcher, tokenize)
+
+# Load environment variables
+load_dotenv()
+
+# BM25 term-frequency saturation and length normalization
+ATS_BM25_K1 = float(os.getenv('ATS_BM25_K1', '1.2'))
+ATS_BM25_B = float(os.getenv('ATS_BM25_B', '0.75'))
+# Typical resume length in tokens, the "average document length" of BM25
+ATS_AVERAGE_RESUME_TOKENS = int(os.getenv('ATS_AVERAGE_RESUME_TOKENS', '500'))
+
+# Points per section, the same split the LLM is asked to explain its score with
+SECTION_WEIGHTS = {'skills': 40, 'experience': 35, 'education': 25}
+
+# Coverage at which a requirement counts as matched rather than missing
+MATCHED_COVERAGE = 0.5
+
+EXPERIENCE_HEADING_PATTERN = re.compile(
+    r'^\W*(?:work |professional |relevant )?(?:experience|employment(?: history)?|work history|internships?)\W*$',
+    re.IGNORECASE | re.MULTILINE)
+EDUCATION_HEADING_PATTERN = re.compile(r'^\W*(?:education|academic background|qualifications)\W*$',
+                                       re.IGNORECASE | re.MULTILINE)
+YEARS_PATTERN = re.compile(r'(\d{1,2})\+?\s*(?:years?|yrs?)\b', re.IGNORECASE)
+DATE_RANGE_PATTERN = re.compile(r'\b((?:19|20)\d{2})\s*(?:-|–|—|to)\s*((?:19|20)\d{2}|present|current|now)\b',
+                                re.IGNORECASE)
+# "40%", "$2M", "3x", "10k users" ...
+QUANTIFIED_PATTERN = re.compile(r'\d+(?:\.\d+)?\s*(?:%|percent\b|x\b|k\b|m\b|\+)|\$\s?\d', re.IGNORECASE)
+DEGREE_PATTERN = re.compile(
+    r"\b(?:bachelor'?s?|master'?s?|ph\.?\s?d|doctorate|b\.?\s?tech|m\.?\s?tech|b\.?\s?e\b|m\.?\s?e\b|b\.?\s?sc|"
+    r"m\.?\s?sc|b\.?\s?s\b|m\.?\s?s\b|mba|bca|mca|associate degree|diploma|degree)", re.IGNORECASE)
+FIELD_PATTERN = re.compile(
+    r'\b(?:computer science|computer engineering|software engineering|information technology|'
+    r'information systems|data science|electronics|electrical|mathematics|statistics|engineering|design)\b',
+    re.IGNORECASE)
+
+
+def _term_key(synonym):
+    """Index key of a synonym: its lowercased tokens, or the exact text for short case-sensitive ones"""
+    tokens = tokenize(synonym)
+    if len(tokens) == 1 and len(synonym) <= CASE_SENSITIVE_MAX_LENGTH:
+        return synonym
+    return ' '.join(token.lower() for token in tokens)
+
+
+class ATSScorer:
+    """Deterministic, local ATS scoring of resumes against the role skill profiles.
+
+    Every keyword of every role requirement is a term of a precomputed
+    index. Terms get a BM25 IDF over the roles, so a keyword required by one
+    role weighs more than one every role asks for. A resume is scanned once
+    for term counts. BM25-saturated counts are then projected onto
+    requirements and roles with two matrix products. Scoring every role
+    costs the same as scoring one, so rank() and score_many() are cheap.
+    The skills score is combined with role-independent experience and
+    education signals into a 0-100 score with a per-section breakdown.
+    """
+
+    def __init__(self, job_skill_requirements, taxonomy=DEFAULT_SKILL_TAXONOMY, k1=ATS_BM25_K1, b=ATS_BM25_B,
+                 average_tokens=ATS_AVERAGE_RESUME_TOKENS):
+        self.k1 = k1
+        self.b = b
+        self.average_tokens = max(1, average_tokens)
+        self.roles = list(job_skill_requirements)
+        self._role_index = {role: index for index, role in enumerate(self.roles)}
+        self.requirements = list(dict.fromkeys(
+            requirement for skills in job_skill_requirements.values() for requirement in skills))
+        synonyms = requirement_taxonomy(job_skill_requirements, taxonomy)
+
+        term_synonyms = {}
+        requirement_terms = []
+        for requirement in self.requirements:
+            keys = set()
+            for synonym in synonyms[requirement]:
+                key = _term_key(synonym)
+                if key:
+                    term_synonyms.setdefault(key, []).append(synonym)
+                    keys.add(key)
+            requirement_terms.append(keys)
+        self.terms = list(term_synonyms)
+        self._term_index = {term: index for index, term in enumerate(self.terms)}
+        self._matcher = SkillMatcher(term_synonyms)
+
+        requirement_index = {requirement: index for index, requirement in enumerate(self.requirements)}
+        # Role x requirement weights: each role's requirements count equally toward its skills score
+        self._role_weights = np.zeros((len(self.roles), len(self.requirements)))
+        for row, role in enumerate(self.roles):
+            for requirement in job_skill_requirements[role]:
+                self._role_weights[row, requirement_index[requirement]] = 1 / len(job_skill_requirements[role])
+
+        # Requirement x term membership, then BM25 IDF of each term over the roles
+        membership = np.zeros((len(self.requirements), len(self.terms)))
+        for row, keys in enumerate(requirement_terms):
+            for key in keys:
+                membership[row, self._term_index[key]] = 1
+        roles_with_term = ((self._role_weights > 0).astype(float) @ membership > 0).sum(axis=0)
+        role_count = len(self.roles)
+        self.idf = np.log(1 + (role_count - roles_with_term + 0.5) / (roles_with_term + 0.5))
+
+        # One mention of a requirement's rarest keyword in an average-length resume covers it fully
+        weighted = membership * self.idf
+        self._requirement_terms = weighted / np.maximum(weighted.max(axis=1, keepdims=True), 1e-12)
+
+        self._lock = threading.Lock()
+        self.resumes_scored = 0
+        self.total_time = 0.0
+
+    def _term_counts(self, resume_text):
+        """Return (term count vector, token count) for one resume"""
+        counts = np.zeros(len(self.terms))
+        for term, entry in self._matcher.scan(resume_text).items():
+            counts[self._term_index[term]] = entry['count']
+        return counts, len(tokenize(resume_text))
+
+    def _coverage(self, counts, lengths):
+        """Requirement coverage (0-1) for each row of a resume x term count matrix"""
+        norm = self.k1 * (1 - self.b + self.b * lengths[:, None] / self.average_tokens)
+        saturated = counts * (self.k1 + 1) / (counts + norm)
+        return np.minimum(1.0, saturated @ self._requirement_terms.T)
+
+    @staticmethod
+    def experience_score(resume_text):
+        """0-1 signal from an experience section, years of experience and quantified achievements"""
+        years = [int(value) for value in YEARS_PATTERN.findall(resume_text) if int(value) < 50]
+        current_year = time.localtime().tm_year
+        for start, end in DATE_RANGE_PATTERN.findall(resume_text):
+            end_year = current_year if not end[:1].isdigit() else int(end)
+            if 0 <= end_year - int(start) < 50:
+                years.append(end_year - int(start))
+        has_section = EXPERIENCE_HEADING_PATTERN.search(resume_text) is not None
+        quantified = len(QUANTIFIED_PATTERN.findall(resume_text))
+        return (0.4 * has_section
+                + 0.3 * min(1.0, (max(years) if years else 0) / 5)
+                + 0.3 * min(1.0, quantified / 4))
+
+    @staticmethod
+    def education_score(resume_text):
+        """0-1 signal from a degree, a relevant field of study and an education section"""
+        score = 0.0
+        if DEGREE_PATTERN.search(resume_text):
+            score += 0.6
+        elif EDUCATION_HEADING_PATTERN.search(resume_text):
+            score += 0.3
+        if FIELD_PATTERN.search(resume_text):
+            score += 0.4
+        return min(1.0, score)
+
+    def _results(self, resume_texts, roles):
+        started = time.perf_counter()
+        rows = [self._term_counts(text) for text in resume_texts]
+        counts = np.array([row[0] for row in rows]).reshape(len(rows), len(self.terms))
+        lengths = np.array([row[1] for row in rows], dtype=float)
+        coverage = self._coverage(counts, lengths)
+        skills = coverage @ self._role_weights.T
+
+        results = []
+        for position, text in enumerate(resume_texts):
+            experience = self.experience_score(text)
+            education = self.education_score(text)
+            ranked = []
+            for role in roles:
+                row = self._role_index[role]
+                required = np.nonzero(self._role_weights[row])[0]
+                breakdown = {
+                    'skills': int(round(SECTION_WEIGHTS['skills'] * skills[position, row])),
+                    'experience': int(round(SECTION_WEIGHTS['experience'] * experience)),
+                    'education': int(round(SECTION_WEIGHTS['education'] * education))
+                }
+                ranked.append({
+                    'role': role,
+                    'score': sum(breakdown.values()),
+                    'breakdown': breakdown,
+                    'matched_skills': [self.requirements[index] for index in required
+                                       if coverage[position, index] >= MATCHED_COVERAGE],
+                    'missing_skills': [self.requirements[index] for index in required
+                                       if coverage[position, index] < MATCHED_COVERAGE]
+                })
+            results.append(ranked)
+
+        with self._lock:
+            self.resumes_scored += len(resume_texts)
+            self.total_time += time.perf_counter() - started
+        return results
+
+    def _role_or_default(self, job_role):
+        return job_role if job_role in self.roles else self.roles[0]
+
+    def score(self, resume_text, job_role):
+        """Score one resume for one role: {'role', 'score', 'breakdown', 'matched_skills', 'missing_skills'}"""
+        return self._results([resume_text or ''], [self._role_or_default(job_role)])[0][0]
+
+    def score_many(self, resume_texts, job_role):
+        """Score a batch of resumes for one role in one vectorized pass"""
+        if not resume_texts:
+            return []
+        role = self._role_or_default(job_role)
+        return [ranked[0] for ranked in self._results([text or '' for text in resume_texts], [role])]
+
+    def rank(self, resume_text, top_k=None):
+        """Score one resume against every role, best fit first"""
+        ranked = self._results([resume_text or ''], self.roles)[0]
+        ranked.sort(key=lambda result: result['score'], reverse=True)
+        return ranked[:top_k] if top_k else ranked
+
+    def stats(self):
+        """Return the index size and scoring counters"""
+        with self._lock:
+            return {
+                'roles': len(self.roles),
+                'requirements': len(self.requirements),
+                'terms': len(self.terms),
+                'resumes_scored': self.resumes_scored,
+                'avg_ms_per_resume': round(self.total_time / self.resumes_scored * 1000, 3)
+                if self.resumes_scored else 0
+            }
+
+
+def local_ats_feedback(result):
+    """Feedback text for a local score, in the shape of the LLM's ATS feedback"""
+    breakdown = result['breakdown']
+    feedback = (f"Local ATS analysis: Skills-{breakdown['skills']}/{SECTION_WEIGHTS['skills']}, "
+                f"Experience-{breakdown['experience']}/{SECTION_WEIGHTS['experience']}, "
+                f"Education-{breakdown['education']}/{SECTION_WEIGHTS['education']}.")
+    if result['matched_skills']:
+        feedback += f" Your resume shows {', '.join(result['matched_skills'])}."
+    if result['missing_skills']:
+        feedback += f" It could better demonstrate {', '.join(result['missing_skills'])} for {result['role']}."
+    return feedback
+
+
+# Global local ATS scorer over the role skill profiles, built once at startup
+ats_scorer = ATSScorer(JOB_SKILL_REQUIREMENTS, skill_matcher.taxonomy)
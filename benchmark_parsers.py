@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Regression suite and benchmark for the LLM output parsers in llm_parsers.py
+
+Every sample in parser_corpus.json is parsed and compared with its expected
+result, streamed through IncrementalQuestionParser in random chunks, and
+timed against the multi-strategy parsers that used to live in app.py.
+
+Usage: python benchmark_parsers.py [iterations]
+"""
+
+import json
+import os
+import random
+import re
+import sys
+import time
+from collections import defaultdict
+
+from llm_parsers import (IncrementalQuestionParser, parse_ats_response, parse_combined_ats_response,
+                         parse_evaluation_response, parse_questions)
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parser_corpus.json')
+
+
+def legacy_parse_questions(questions_text):
+    """Question parsing as upload_resume() did it before llm_parsers"""
+    questions = []
+    question_pattern = r'\d+\.\s*\*\*(.*?)\*\*\s*\n\s*\*"(.*?)"\*'
+    matches = re.findall(question_pattern, questions_text, re.DOTALL)
+    if matches:
+        for title, question in matches:
+            question = question.strip()
+            if question and len(question) > 10:
+                questions.append(question)
+
+    if not questions:
+        lines = questions_text.split('\n')
+        current_question = ""
+        for line in lines:
+            line = line.strip()
+            if re.match(r'^\d+\.', line):
+                if current_question and len(current_question) > 10:
+                    questions.append(current_question)
+                cleaned = re.sub(r'^\d+\.\s*\*\*(.*?)\*\*\s*', '', line)
+                cleaned = cleaned.strip('*').strip()
+                current_question = cleaned
+            elif line and current_question and not line.startswith('These questions'):
+                cleaned = line.strip('*').strip()
+                if cleaned:
+                    current_question += " " + cleaned
+        if current_question and len(current_question) > 10:
+            questions.append(current_question)
+
+    if not questions:
+        numbered_parts = re.split(r'\s*\d+\.\s*', questions_text)
+        for part in numbered_parts:
+            part = part.strip()
+            part = re.sub(r'\*\*(.*?)\*\*', r'\1', part)
+            part = re.sub(r'\*(.*?)\*', r'\1', part)
+            part = part.strip('*').strip()
+            if part and len(part) > 10 and not part.startswith('Here are') and not part.startswith('These questions'):
+                questions.append(part)
+
+    if not questions:
+        cleaned = questions_text.lstrip('0123456789.-) ').strip()
+        cleaned = re.sub(r'\*\*(.*?)\*\*', r'\1', cleaned)
+        cleaned = re.sub(r'\*(.*?)\*', r'\1', cleaned)
+        if cleaned:
+            questions.append(cleaned)
+    return questions
+
+
+def _legacy_parse_score(output, primary, fallback, strip_feedback_label):
+    lines = output.splitlines()
+    score = None
+    feedback = ""
+    for pattern, flags in ((primary, re.IGNORECASE), (fallback, 0)):
+        for i, line in enumerate(lines):
+            match = re.search(pattern, line, flags)
+            if match:
+                score = int(match.group(1))
+                feedback_lines = []
+                for feedback_line in lines[i+1:]:
+                    clean_line = re.sub(r'\*\*(.*?)\*\*', r'\1', feedback_line.strip())
+                    if clean_line:
+                        feedback_lines.append(clean_line)
+                feedback = ' '.join(feedback_lines).strip()
+                if strip_feedback_label and feedback.lower().startswith('feedback:'):
+                    feedback = feedback[9:].strip()
+                break
+        if score is not None:
+            break
+    return score, feedback
+
+
+def legacy_parse_ats_response(output):
+    """Score parsing as check_ats() did it before llm_parsers"""
+    return _legacy_parse_score(output, r'(?:Score:?\s*)?(?:\*\*)?(\d{1,3})\s*/\s*100(?:\*\*)?',
+                               r'(\d{1,3})\s*/\s*100', False)
+
+
+def legacy_parse_evaluation_response(output):
+    """Score parsing as evaluate_answer() did it before llm_parsers"""
+    return _legacy_parse_score(output, r'(?:Score:?\s*)?(?:\*\*)?(\d{1,2})\s*/\s*10(?:\*\*)?',
+                               r'(\d{1,2})\s*/\s*10', True)
+
+
+PARSERS = {
+    'questions': (parse_questions, legacy_parse_questions),
+    'ats': (parse_ats_response, legacy_parse_ats_response),
+    'evaluation': (parse_evaluation_response, legacy_parse_evaluation_response),
+    # The combined ATS and skill-gap format has no previous parser to compare with
+    'combined_ats': (parse_combined_ats_response, None)
+}
+
+
+def load_corpus():
+    with open(CORPUS_PATH, 'r', encoding='utf-8') as f:
+        corpus = json.load(f)
+    for sample in corpus:
+        if 'source' in sample:
+            source_path = os.path.join(os.path.dirname(CORPUS_PATH), sample['source'])
+            with open(source_path, 'r', encoding='utf-8') as f:
+                sample['text'] = f.read()
+        sample['text'] = sample['text'].strip()
+    return corpus
+
+
+def normalize(kind, result):
+    if kind == 'questions':
+        return list(result)
+    if kind == 'combined_ats':
+        return result
+    score, feedback = result
+    return {'score': score, 'feedback': feedback}
+
+
+def stream_questions(text, rng):
+    """Feed text to IncrementalQuestionParser in random chunks"""
+    parser = IncrementalQuestionParser()
+    position = 0
+    while position < len(text):
+        size = rng.randint(1, 40)
+        parser.feed(text[position:position + size])
+        position += size
+    parser.finish()
+    return parser.questions
+
+
+def check_regressions(corpus):
+    """Compare every sample with its expected result; return the failures"""
+    failures = []
+    coverage = defaultdict(lambda: [0, 0])
+    rng = random.Random(0)
+
+    for sample in corpus:
+        kind = sample['kind']
+        parser, legacy_parser = PARSERS[kind]
+        result = normalize(kind, parser(sample['text']))
+        key = (kind, sample['format'])
+        coverage[key][1] += 1
+
+        problems = []
+        if result != sample['expected']:
+            problems.append(f"expected {sample['expected']!r}, got {result!r}")
+        if legacy_parser is not None and normalize(kind, legacy_parser(sample['text'])) != result:
+            problems.append("differs from the legacy parser")
+        if kind == 'questions':
+            for _ in range(20):
+                streamed = stream_questions(sample['text'], rng)
+                if streamed != result:
+                    problems.append(f"streamed parse differs: {streamed!r}")
+                    break
+
+        if problems:
+            failures.append((sample['name'], problems))
+        else:
+            coverage[key][0] += 1
+
+    print("=== FORMAT COVERAGE ===")
+    for (kind, format_name), (passed, total) in sorted(coverage.items()):
+        status = "✅" if passed == total else "❌"
+        print(f"{status} {kind:<11} {format_name:<20} {passed}/{total}")
+    return failures
+
+
+def benchmark(corpus, iterations):
+    """Report parses per second for the new and legacy parsers"""
+    print(f"\n=== THROUGHPUT ({iterations} passes over the corpus) ===")
+    for kind, (parser, legacy_parser) in PARSERS.items():
+        texts = [sample['text'] for sample in corpus if sample['kind'] == kind]
+        rates = []
+        for fn in (parser, legacy_parser) if legacy_parser else (parser,):
+            started = time.perf_counter()
+            for _ in range(iterations):
+                for text in texts:
+                    fn(text)
+            elapsed = time.perf_counter() - started
+            rates.append(len(texts) * iterations / elapsed)
+        if legacy_parser is None:
+            print(f"{kind:<11} {rates[0]:>10.0f} parses/s")
+        else:
+            print(f"{kind:<11} {rates[0]:>10.0f} parses/s  (legacy {rates[1]:>10.0f} parses/s, {rates[0] / rates[1]:.2f}x)")
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    corpus = load_corpus()
+    print(f"Loaded {len(corpus)} samples from {os.path.basename(CORPUS_PATH)}\n")
+
+    failures = check_regressions(corpus)
+    benchmark(corpus, iterations)
+
+    if failures:
+        print(f"\n❌ {len(failures)} regression(s):")
+        for name, problems in failures:
+            for problem in problems:
+                print(f"   {name}: {problem}")
+        sys.exit(1)
+    print("\n✅ All samples parsed as expected")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the skill matcher in skill_matcher.py
+
+Generates a batch of synthetic resumes and extracts skills from every one
+with SkillMatcher and with the substring loop that upload_resume() and
+populate_user_profiles.py used before. It is run with the built-in taxonomy
+and with a taxonomy padded to a few thousand entries, and it reports the
+substring false positives ("Go" in "Google") that the matcher avoids.
+
+Usage: python benchmark_skills.py [resumes] [extra_taxonomy_skills]
+"""
+
+import random
+import sys
+import time
+
+from skill_matcher import DEFAULT_SKILL_TAXONOMY, SkillMatcher
+
+FILLER_WORDS = (
+    "designed built maintained led delivered improved migrated scalable services team customers "
+    "platform google pipeline reporting dashboards ownership mentoring agile stakeholders reliable "
+    "performance latency throughput production incidents architecture domain features roadmap "
+    "goals quarterly revenue training available explain container aid javascripts"
+).split()
+
+SECTION_TITLES = ["Summary", "Skills", "Experience", "Projects", "Education", "Certifications"]
+
+
+def legacy_extract_skills(text, skills):
+    """Skill extraction as upload_resume() did it before skill_matcher"""
+    found_skills = []
+    text_lower = text.lower()
+    for skill in skills:
+        if skill.lower() in text_lower:
+            found_skills.append(skill)
+    return found_skills
+
+
+def make_resume(rng, skills, words=900):
+    """Build a resume-like text that mentions a few skills among filler words"""
+    mentioned = rng.sample(skills, min(len(skills), rng.randint(5, 15)))
+    lines = []
+    for title in SECTION_TITLES:
+        lines.append(title)
+        for _ in range(words // (len(SECTION_TITLES) * 12)):
+            line = rng.choices(FILLER_WORDS, k=12)
+            if mentioned and rng.random() < 0.4:
+                line[rng.randrange(len(line))] = mentioned[rng.randrange(len(mentioned))]
+            lines.append("- " + " ".join(line).capitalize() + ".")
+    return "\n".join(lines)
+
+
+def padded_taxonomy(extra, rng):
+    """Built-in taxonomy plus `extra` made-up skills with one synonym each"""
+    taxonomy = dict(DEFAULT_SKILL_TAXONOMY)
+    for index in range(extra):
+        name = f"{rng.choice(FILLER_WORDS).capitalize()}Tool{index}"
+        taxonomy[name] = [name.lower(), f"{name} framework"]
+    return taxonomy
+
+
+def run(label, taxonomy, resumes):
+    skills = list(taxonomy)
+    started = time.perf_counter()
+    matcher = SkillMatcher(taxonomy)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    timings = []
+    for extract in (matcher.extract, lambda text: legacy_extract_skills(text, skills)):
+        started = time.perf_counter()
+        results = [extract(text) for text in resumes]
+        timings.append((time.perf_counter() - started, results))
+
+    (matcher_time, matcher_results), (legacy_time, legacy_results) = timings
+    false_positives = sum(len(set(legacy) - set(found)) for legacy, found in zip(legacy_results, matcher_results))
+
+    print(f"\n=== {label}: {len(skills)} skills, {len(resumes)} resumes ===")
+    print(f"automaton build      {build_ms:>10.1f} ms")
+    print(f"skill_matcher        {len(resumes) / matcher_time:>10.0f} resumes/s")
+    print(f"substring loop       {len(resumes) / legacy_time:>10.0f} resumes/s  (skill_matcher {legacy_time / matcher_time:.2f}x)")
+    print(f"substring-only hits  {false_positives:>10} (e.g. 'Go' in 'Google', 'AI' in 'maintained')")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    extra = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+    rng = random.Random(0)
+    default_skills = list(DEFAULT_SKILL_TAXONOMY)
+    resumes = [make_resume(rng, default_skills) for _ in range(count)]
+
+    run("Built-in taxonomy", DEFAULT_SKILL_TAXONOMY, resumes)
+    run("Padded taxonomy", padded_taxonomy(extra, rng), resumes)
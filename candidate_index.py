@@ -0,0 +1,465 @@
+import hashlib
+import math
+import os
+import re
+import threading
+import time
+from array import array
+from collections import Counter
+
+import numpy as np
+from dotenv import load_dotenv
+from markupsafe import escape
+
+from skill_matcher import tokenize
+
+# Load environment variables
+load_dotenv()
+
+# Seconds between background pulls of resumes changed by other workers (0 starts one with every query)
+CANDIDATE_INDEX_REFRESH_SECONDS = float(os.getenv('CANDIDATE_INDEX_REFRESH_SECONDS', '60'))
+# Highest-weighted query terms scored; the rest barely move the ranking
+CANDIDATE_QUERY_MAX_TERMS = int(os.getenv('CANDIDATE_QUERY_MAX_TERMS', '100'))
+# Resumes fetched per database round trip while refreshing
+CANDIDATE_INDEX_BATCH_SIZE = 500
+# Share of replaced (dead) documents at which the index is rebuilt without them
+CANDIDATE_INDEX_COMPACT_RATIO = float(os.getenv('CANDIDATE_INDEX_COMPACT_RATIO', '0.25'))
+# Characters of resume text shown around the first match of a keyword search
+SEARCH_SNIPPET_CHARS = int(os.getenv('SEARCH_SNIPPET_CHARS', '200'))
+
+SOURCES = ('session_data', 'user_profiles')
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or our that the their this to was were will with
+i me my we you your he she they them his her also using used use including into over per via across within
+""".split())
+
+
+# Search query items: an optional "-" or "NOT " negation, then a "quoted phrase" or a word
+QUERY_ITEM_PATTERN = re.compile(r'(?P<negate>-|\bNOT\s+)?(?:"(?P<phrase>[^"]*)"?|(?P<word>[^\s"]+))')
+
+
+def word_tokens(text):
+    """Lowercased word tokens of a text, punctuation dropped"""
+    return [token.lower() for token in tokenize(text or '') if token[0].isalnum()]
+
+
+def is_index_term(token):
+    return token not in STOPWORDS and not token.isdigit()
+
+
+def resume_terms(text):
+    """Count the index terms of a text: lowercased tokens without stopwords, numbers or punctuation"""
+    return Counter(token for token in word_tokens(text) if is_index_term(token))
+
+
+def parse_search_query(query):
+    """Parse a keyword query into OR-ed clauses of (negated, tokens) items.
+
+    Words and "quoted phrases" in a clause must all match; "OR" starts a new
+    clause, "AND" and a leading "+" are accepted and ignored, and "-" or
+    "NOT" excludes a word or phrase.
+    """
+    clauses = [[]]
+    for match in QUERY_ITEM_PATTERN.finditer(query or ''):
+        word = match.group('word')
+        if word == 'OR':
+            clauses.append([])
+            continue
+        if word == 'AND':
+            continue
+        tokens = word_tokens(match.group('phrase') if word is None else word.lstrip('+'))
+        if tokens:
+            clauses[-1].append((bool(match.group('negate')), tuple(tokens)))
+    return [clause for clause in clauses if clause]
+
+
+def search_snippet(resume_text, query, width=SEARCH_SNIPPET_CHARS):
+    """HTML-escaped excerpt of resume_text around the first query match, matches wrapped in <mark>"""
+    patterns = sorted({r'\W+'.join(re.escape(token) for token in tokens)
+                       for clause in parse_search_query(query) for negated, tokens in clause if not negated},
+                      key=len, reverse=True)
+    text = ' '.join((resume_text or '').split())
+    if not patterns:
+        return str(escape(text[:width]))
+    pattern = re.compile(r'(?<![^\W_])(?:' + '|'.join(patterns) + r')(?![^\W_]|[+#])', re.IGNORECASE)
+    first = pattern.search(text)
+    start = max(0, first.start() - width // 3) if first else 0
+    end = min(len(text), start + width)
+    if start:
+        start = text.find(' ', start, end) + 1 or start
+    if end < len(text):
+        cut = text.rfind(' ', start, end)
+        end = cut if cut > start else end
+
+    parts = []
+    position = start
+    for match in pattern.finditer(text, start, end):
+        parts.append(str(escape(text[position:match.start()])))
+        parts.append(f"<mark>{escape(match.group(0))}</mark>")
+        position = match.end()
+    parts.append(str(escape(text[position:end])))
+    return ('…' if start else '') + ''.join(parts) + ('…' if end < len(text) else '')
+
+
+class CandidateIndex:
+    """In-memory inverted index for "similar candidates" queries over stored resumes.
+
+    Documents are weighted lnc and queries ltc (SMART notation): a resume is
+    stored once as a cosine-normalized log-tf vector that never needs
+    re-weighting, and IDF is applied on the query side. Each term keeps a
+    postings list of (document, weight) in typed arrays, so a query adds
+    up the postings of its highest-weighted terms with NumPy and ranks
+    tens of thousands of resumes in milliseconds.
+
+    Each resume also keeps its word sequence as vocabulary ids, so keyword
+    search() can check phrases on the documents its postings select instead
+    of reading resume text back from the database.
+
+    Resumes stored by this process are added as the database writes them
+    (see DatabaseManager.add_resume_listener); changes made by other
+    workers are pulled from the database by refresh(), which keeps an
+    (updated_at, id) watermark per table and only reads new rows. Routes
+    call refresh_in_background(), so the first full pull and later ones
+    never run in a request thread.
+    Re-adding a resume whose text is unchanged is skipped; a changed one
+    leaves a dead entry behind, and once dead entries pass `compact_ratio`
+    of the index it is rebuilt without them. IDF counts live documents only.
+    """
+
+    def __init__(self, refresh_interval=CANDIDATE_INDEX_REFRESH_SECONDS, max_query_terms=CANDIDATE_QUERY_MAX_TERMS,
+                 compact_ratio=CANDIDATE_INDEX_COMPACT_RATIO):
+        self.refresh_interval = refresh_interval
+        self.max_query_terms = max_query_terms
+        self.compact_ratio = compact_ratio
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._doc_ids = {}
+        self._docs = []
+        self._hashes = []
+        self._alive = array('B')
+        self._dead = 0
+        self._postings = {}
+        self._document_frequency = {}
+        self._vocabulary = {}
+        self._tokens = []
+        self._sequences = []
+        self._watermarks = {source: (None, 0) for source in SOURCES}
+        self._last_refresh = None
+        self._refreshing = False
+
+        self.documents_added = 0
+        self.unchanged_skipped = 0
+        self.compactions = 0
+        self.queries = 0
+        self.total_query_time = 0.0
+        self.searches = 0
+        self.total_search_time = 0.0
+
+    def add(self, source, user_id, resume_filename, resume_text, username=None, job_role=None):
+        """Index (or re-index) one stored resume; return False if it is already indexed with the same text"""
+        key = (source, user_id, resume_filename)
+        text_hash = hashlib.sha256((resume_text or '').encode('utf-8')).digest()
+        with self._lock:
+            doc_id = self._doc_ids.get(key)
+            if doc_id is not None and self._hashes[doc_id] == text_hash:
+                doc = self._docs[doc_id]
+                doc['username'] = username or doc['username']
+                doc['job_role'] = job_role or doc['job_role']
+                self.unchanged_skipped += 1
+                return False
+
+        tokens = word_tokens(resume_text)
+        terms = Counter(token for token in tokens if is_index_term(token))
+        weights = {term: 1 + math.log(count) for term, count in terms.items()}
+        norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+
+        with self._lock:
+            old_id = self._doc_ids.pop(key, None)
+            if old_id is not None:
+                username = username or self._docs[old_id]['username']
+                job_role = job_role or self._docs[old_id]['job_role']
+                self._remove(old_id)
+            if weights:
+                doc_id = len(self._docs)
+                self._doc_ids[key] = doc_id
+                self._docs.append({
+                    'source': source,
+                    'user_id': user_id,
+                    'username': username,
+                    'resume_filename': resume_filename,
+                    'job_role': job_role
+                })
+                self._hashes.append(text_hash)
+                self._alive.append(1)
+                self._sequences.append(array('i', [self._token_id(token) for token in tokens]))
+                for term, weight in weights.items():
+                    postings = self._postings.get(term)
+                    if postings is None:
+                        postings = self._postings[term] = (array('i'), array('f'))
+                    postings[0].append(doc_id)
+                    postings[1].append(weight / norm)
+                    self._document_frequency[term] = self._document_frequency.get(term, 0) + 1
+                self.documents_added += 1
+            if self._dead and self._dead >= self.compact_ratio * len(self._docs):
+                self._compact()
+        return True
+
+    def _token_id(self, token):
+        token_id = self._vocabulary.get(token)
+        if token_id is None:
+            token_id = self._vocabulary[token] = len(self._tokens)
+            self._tokens.append(token)
+        return token_id
+
+    def _remove(self, doc_id):
+        """Mark a document dead and drop it from the document frequencies; its postings stay until compaction"""
+        for token_id in set(self._sequences[doc_id]):
+            term = self._tokens[token_id]
+            if is_index_term(term):
+                self._document_frequency[term] -= 1
+        self._alive[doc_id] = 0
+        self._sequences[doc_id] = None
+        self._hashes[doc_id] = None
+        self._dead += 1
+
+    def _compact(self):
+        """Rebuild documents, postings and vocabulary without the dead documents"""
+        alive = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+        live = np.nonzero(alive)[0]
+        new_ids = np.full(len(self._docs), -1, dtype=np.intc)
+        new_ids[live] = np.arange(len(live), dtype=np.intc)
+
+        postings = {}
+        for term, (doc_ids, weights) in self._postings.items():
+            doc_ids = np.frombuffer(doc_ids, dtype=np.intc)
+            keep = alive[doc_ids]
+            if keep.any():
+                postings[term] = (array('i', new_ids[doc_ids[keep]].tobytes()),
+                                  array('f', np.frombuffer(weights, dtype=np.float32)[keep].tobytes()))
+
+        sequences = [np.frombuffer(self._sequences[doc_id], dtype=np.intc) for doc_id in live]
+        used = np.unique(np.concatenate(sequences)) if sequences else np.zeros(0, dtype=np.intc)
+        new_token_ids = np.full(len(self._tokens), -1, dtype=np.intc)
+        new_token_ids[used] = np.arange(len(used), dtype=np.intc)
+
+        self._tokens = [self._tokens[token_id] for token_id in used]
+        self._vocabulary = {token: token_id for token_id, token in enumerate(self._tokens)}
+        self._sequences = [array('i', new_token_ids[sequence].tobytes()) for sequence in sequences]
+        self._docs = [self._docs[doc_id] for doc_id in live]
+        self._hashes = [self._hashes[doc_id] for doc_id in live]
+        self._alive = array('B', bytes([1]) * len(live))
+        self._doc_ids = {key: int(new_ids[doc_id]) for key, doc_id in self._doc_ids.items()}
+        self._postings = postings
+        self._document_frequency = {term: count for term, count in self._document_frequency.items() if count}
+        self._dead = 0
+        self.compactions += 1
+
+    def refresh(self, db, force=False):
+        """Pull resumes changed since the last refresh; return how many were indexed"""
+        if not force and self._last_refresh is not None and \
+                time.monotonic() - self._last_refresh < self.refresh_interval:
+            return 0
+
+        indexed = 0
+        with self._refresh_lock:
+            for source in SOURCES:
+                # Start from the watermark's timestamp again: a row committed after the last refresh can share
+                # that second with a lower id. Rows already indexed with the same text are skipped by add().
+                updated_at = self._watermarks[source][0]
+                for rows in db.iter_resumes_updated_since(source, updated_at, 0, CANDIDATE_INDEX_BATCH_SIZE):
+                    for row in rows:
+                        if self.add(source, row['user_id'], row['resume_filename'], row['resume_text'],
+                                    row['username'], row['job_role']):
+                            indexed += 1
+                    self._watermarks[source] = (rows[-1]['updated_at'], rows[-1]['id'])
+            self._last_refresh = time.monotonic()
+        if indexed:
+            print(f"✅ Candidate index refreshed with {indexed} resumes")
+        return indexed
+
+    def refresh_in_background(self, db):
+        """Start refresh() in a background thread if one is due; return whether the index has been built.
+
+        Until the first refresh finishes the index is still warming up and
+        queries should not be answered from it.
+        """
+        with self._lock:
+            due = self._last_refresh is None or time.monotonic() - self._last_refresh >= self.refresh_interval
+            if due and not self._refreshing:
+                self._refreshing = True
+                threading.Thread(target=self._background_refresh, args=(db,), name='candidate-index-refresh',
+                                 daemon=True).start()
+            return self._last_refresh is not None
+
+    def _background_refresh(self, db):
+        try:
+            self.refresh(db, force=True)
+        except Exception as e:
+            print(f"❌ Candidate index refresh failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def similar(self, resume_text, k=10, exclude_user_id=None):
+        """Return up to k candidates most similar to resume_text, best first, one entry per user"""
+        started = time.perf_counter()
+        terms = resume_terms(resume_text)
+
+        with self._lock:
+            document_count = len(self._docs)
+            live_count = document_count - self._dead
+            query = {}
+            for term, count in terms.items():
+                document_frequency = self._document_frequency.get(term)
+                if document_frequency:
+                    query[term] = (1 + math.log(count)) * math.log(1 + live_count / document_frequency)
+            norm = math.sqrt(sum(weight * weight for weight in query.values())) or 1.0
+            top_terms = sorted(query, key=query.get, reverse=True)[:self.max_query_terms]
+
+            scores = np.zeros(document_count, dtype=np.float32)
+            for term in top_terms:
+                doc_ids, weights = self._postings[term]
+                scores[np.frombuffer(doc_ids, dtype=np.intc)] += (query[term] / norm) * np.frombuffer(
+                    weights, dtype=np.float32)
+            scores *= np.frombuffer(self._alive, dtype=np.uint8)
+            docs = self._docs
+
+        results = []
+        if query:
+            # Users can have several resumes and a profile, so look past the top k until k users are found
+            candidates = min(document_count, k * 4)
+            while True:
+                if candidates < document_count:
+                    top = np.argpartition(-scores, candidates - 1)[:candidates]
+                else:
+                    top = np.arange(document_count)
+                top = top[np.argsort(-scores[top], kind='stable')]
+                results = []
+                seen_users = {exclude_user_id}
+                for doc_id in top:
+                    if scores[doc_id] <= 0:
+                        break
+                    doc = docs[doc_id]
+                    if doc['user_id'] not in seen_users:
+                        seen_users.add(doc['user_id'])
+                        results.append(dict(doc, similarity=round(float(scores[doc_id]), 4)))
+                        if len(results) == k:
+                            break
+                if len(results) == k or candidates == document_count or scores[top[-1]] <= 0:
+                    break
+                candidates = min(document_count, candidates * 4)
+
+        with self._lock:
+            self.queries += 1
+            self.total_query_time += time.perf_counter() - started
+        return results
+
+    def _item_matches(self, tokens, document_count):
+        """Boolean mask of the live documents containing a word or phrase, or None if it has no index terms"""
+        indexed = [token for token in tokens if is_index_term(token)]
+        if not indexed:
+            return None
+        mask = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+        for token in indexed:
+            postings = self._postings.get(token)
+            if postings is None:
+                return np.zeros(document_count, dtype=bool)
+            term_mask = np.zeros(document_count, dtype=bool)
+            term_mask[np.frombuffer(postings[0], dtype=np.intc)] = True
+            mask &= term_mask
+        if len(tokens) == 1:
+            return mask
+
+        # Phrases: check word order on the documents that contain every word
+        phrase = [self._vocabulary.get(token, -1) for token in tokens]
+        for doc_id in np.nonzero(mask)[0]:
+            sequence = np.frombuffer(self._sequences[doc_id], dtype=np.intc)
+            starts = len(sequence) - len(phrase) + 1
+            found = starts > 0
+            if found:
+                hits = sequence[:starts] == phrase[0]
+                for offset in range(1, len(phrase)):
+                    hits &= sequence[offset:starts + offset] == phrase[offset]
+                found = hits.any()
+            mask[doc_id] = found
+        return mask
+
+    def search(self, query, page=1, per_page=20):
+        """Keyword search with words, "phrases", OR and -exclusions (see parse_search_query).
+
+        Returns {'total', 'results'}: the page of matching candidates, one
+        entry (the best-matching resume) per user, ranked by the TF-IDF
+        weight of the matched words.
+        """
+        started = time.perf_counter()
+        clauses = parse_search_query(query)
+
+        with self._lock:
+            document_count = len(self._docs)
+            live_count = document_count - self._dead
+            matched = np.zeros(document_count, dtype=bool)
+            scores = np.zeros(document_count, dtype=np.float32)
+            for clause in clauses:
+                clause_mask = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+                clause_scores = np.zeros(document_count, dtype=np.float32)
+                has_positive = False
+                for negated, tokens in clause:
+                    item_mask = self._item_matches(tokens, document_count)
+                    if item_mask is None:
+                        continue
+                    if negated:
+                        clause_mask &= ~item_mask
+                        continue
+                    has_positive = True
+                    clause_mask &= item_mask
+                    for token in set(tokens):
+                        postings = self._postings.get(token) if is_index_term(token) else None
+                        if postings is not None and self._document_frequency[token]:
+                            idf = math.log(1 + live_count / self._document_frequency[token])
+                            clause_scores[np.frombuffer(postings[0], dtype=np.intc)] += idf * np.frombuffer(
+                                postings[1], dtype=np.float32)
+                if has_positive:
+                    matched |= clause_mask
+                    scores = np.maximum(scores, clause_scores * clause_mask)
+            docs = self._docs
+
+        hits = np.nonzero(matched)[0]
+        hits = hits[np.argsort(-scores[hits], kind='stable')]
+        ranked = []
+        seen_users = set()
+        for doc_id in hits:
+            doc = docs[doc_id]
+            if doc['user_id'] not in seen_users:
+                seen_users.add(doc['user_id'])
+                ranked.append((doc, scores[doc_id]))
+
+        offset = (max(1, page) - 1) * per_page
+        results = [dict(doc, score=round(float(score), 4)) for doc, score in ranked[offset:offset + per_page]]
+        with self._lock:
+            self.searches += 1
+            self.total_search_time += time.perf_counter() - started
+        return {'total': len(ranked), 'results': results}
+
+    def stats(self):
+        """Return index size and query and search latency"""
+        with self._lock:
+            return {
+                'documents': len(self._docs) - self._dead,
+                'dead_documents': self._dead,
+                'terms': len(self._postings),
+                'documents_added': self.documents_added,
+                'unchanged_skipped': self.unchanged_skipped,
+                'compactions': self.compactions,
+                'queries': self.queries,
+                'avg_query_ms': round(self.total_query_time / self.queries * 1000, 3) if self.queries else 0,
+                'searches': self.searches,
+                'avg_search_ms': round(self.total_search_time / self.searches * 1000, 3) if self.searches else 0,
+                'ready': self._last_refresh is not None,
+                'last_refresh_seconds_ago': round(time.monotonic() - self._last_refresh, 1)
+                if self._last_refresh is not None else None
+            }
+
+
+# Global candidate similarity index
+candidate_index = CandidateIndex()
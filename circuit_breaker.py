@@ -0,0 +1,114 @@
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv('LLM_BREAKER_FAILURE_THRESHOLD', '5'))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv('LLM_BREAKER_RESET_SECONDS', '30'))
+LLM_BREAKER_HALF_OPEN_PROBES = int(os.getenv('LLM_BREAKER_HALF_OPEN_PROBES', '1'))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open"""
+
+
+class CircuitBreaker:
+    """Stop calling a failing dependency until it has had time to recover.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    every call fails immediately with CircuitOpenError. Once
+    `reset_timeout` seconds have passed, up to `half_open_probes` calls are
+    let through: a success closes the circuit, a failure re-opens it.
+    """
+
+    def __init__(self, name, failure_threshold=LLM_BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout=LLM_BREAKER_RESET_SECONDS, half_open_probes=LLM_BREAKER_HALF_OPEN_PROBES):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = max(1, half_open_probes)
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+
+        self.successes = 0
+        self.failures = 0
+        self.short_circuited = 0
+        self.times_opened = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probes_in_flight = 0
+        return self._state
+
+    def before_call(self):
+        """Reserve permission to call; raise CircuitOpenError while the circuit is open"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+                self._probes_in_flight += 1
+                return
+            self.short_circuited += 1
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def record_success(self):
+        with self._lock:
+            self.successes += 1
+            self._consecutive_failures = 0
+            if self._state != CLOSED:
+                print(f"✅ {self.name} circuit closed")
+            self._state = CLOSED
+            self._probes_in_flight = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._consecutive_failures += 1
+            state = self._current_state()
+            if state == HALF_OPEN or (state == CLOSED and self._consecutive_failures >= self.failure_threshold):
+                self._trip()
+
+    def release(self):
+        """Give back a reservation for a call that never reached the dependency"""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes_in_flight > 0:
+                self._probes_in_flight -= 1
+
+    def _trip(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._probes_in_flight = 0
+        self.times_opened += 1
+        print(f"⚠️ {self.name} circuit opened after {self._consecutive_failures} consecutive failures")
+
+    def stats(self):
+        """Return state and call counters"""
+        with self._lock:
+            return {
+                'state': self._current_state(),
+                'consecutive_failures': self._consecutive_failures,
+                'failure_threshold': self.failure_threshold,
+                'reset_timeout_seconds': self.reset_timeout,
+                'successes': self.successes,
+                'failures': self.failures,
+                'short_circuited': self.short_circuited,
+                'times_opened': self.times_opened
+            }
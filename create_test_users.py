@@ -48,14 +48,15 @@ def create_test_users():
         
         try:
             # Create user
-            cursor = db.connection.cursor()
-            insert_query = """
-            INSERT INTO users (username, password_hash, role) 
-            VALUES (%s, %s, %s)
-            """
-            cursor.execute(insert_query, (username, password_hash, role))
-            db.connection.commit()
-            cursor.close()
+            with db.get_connection() as connection:
+                cursor = connection.cursor()
+                insert_query = """
+                INSERT INTO users (username, password_hash, role) 
+                VALUES (%s, %s, %s)
+                """
+                cursor.execute(insert_query, (username, password_hash, role))
+                connection.commit()
+                cursor.close()
             
             print(f"✅ Created user: {username} (role: {role})")
             
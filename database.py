@@ -1,27 +1,260 @@
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, errorcode
+from mysql.connector.errors import InterfaceError, OperationalError, PoolError
+import functools
 import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+DB_CONFIG = {
+    'host': '2s6vhs.h.filess.io',
+    'user': 'Major_audiencedo',
+    'password': 'b2ff8916bde72e33589ca325f0b8b32e5acbb7ce',
+    'database': 'Major_audiencedo',
+    'port': 61032
+}
+
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_POOL_WAIT_TIMEOUT = float(os.getenv('DB_POOL_WAIT_TIMEOUT', '10'))
+# Ping connections that sat idle in the pool longer than this many seconds (0 disables)
+DB_IDLE_PING_SECONDS = float(os.getenv('DB_IDLE_PING_SECONDS', '0'))
+
+# Admin dashboard sort orders: sort key -> score column ranked before (updated_at, id), newest first
+DASHBOARD_SORT_COLUMNS = {
+    'ats_score': 'ats_score',
+    'interview_score': 'interview_score',
+    'updated_at': None
+}
+
+# Client/server error codes meaning the connection itself is gone
+CONNECTION_LOST_ERRNOS = {
+    errorcode.CR_SERVER_GONE_ERROR,
+    errorcode.CR_SERVER_LOST,
+    errorcode.CR_SERVER_LOST_EXTENDED,
+    errorcode.CR_CONNECTION_ERROR,
+    errorcode.ER_CLIENT_INTERACTION_TIMEOUT,
+}
+
+class ConnectionLost(Exception):
+    """Raised out of a DatabaseManager method when a query fails because the connection dropped"""
+
+def is_connection_lost(error):
+    """Check if a MySQL error means the connection was lost rather than the query failing"""
+    if not isinstance(error, (OperationalError, InterfaceError)):
+        return False
+    # "MySQL Connection not available" is raised locally without an errno
+    return error.errno is None or error.errno in CONNECTION_LOST_ERRNOS
+
+def with_pooled_connection(method):
+    """Run a DatabaseManager method on a pooled connection held for that call only.
+    
+    self.connection is checked out when the method first uses it and goes
+    back to the pool as soon as the method returns, so no connection is held
+    while a request waits on Cohere or streams a response. Methods called
+    from inside another method share its connection. If a query fails
+    because the connection dropped, the connection is discarded and the
+    method runs once more on a fresh one.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        local = self._local
+        if getattr(local, 'depth', 0):
+            local.depth += 1
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                local.depth -= 1
+        
+        local.retrying = False
+        while True:
+            local.connection = None
+            local.lost = False
+            local.depth = 1
+            try:
+                return method(self, *args, **kwargs)
+            except ConnectionLost as e:
+                print(f"⚠️ Database connection lost ({e}), retrying {method.__name__} on a new connection")
+                local.retrying = True
+            finally:
+                local.depth = 0
+                if local.connection is not None:
+                    self.pool.release(local.connection, discard=local.lost)
+                    local.connection = None
+    return wrapper
+
+def build_upsert(table, insert_values, update_columns):
+    """Build a single INSERT ... ON DUPLICATE KEY UPDATE statement.
+    
+    New rows get every value in insert_values; an existing row with the same
+    unique key only has update_columns overwritten.
+    """
+    columns = list(insert_values)
+    if update_columns:
+        assignments = ', '.join(f"{column} = VALUES({column})" for column in update_columns)
+    else:
+        # Nothing to change on an existing row
+        assignments = "id = id"
+    query = f"""
+        INSERT INTO {table} ({', '.join(columns)})
+        VALUES ({', '.join(['%s'] * len(columns))})
+        ON DUPLICATE KEY UPDATE {assignments}
+    """
+    return query, [insert_values[column] for column in columns]
+
+class ConnectionPool:
+    """Bounded pool of MySQL connections shared by all threads.
+
+    Connections are opened lazily up to `size`. When every connection is
+    checked out, acquire() waits up to `wait_timeout` seconds for one to be
+    released before raising PoolError.
+    """
+    
+    def __init__(self, config, size=DB_POOL_SIZE, wait_timeout=DB_POOL_WAIT_TIMEOUT,
+                 idle_ping_seconds=DB_IDLE_PING_SECONDS):
+        self.config = config
+        self.size = size
+        self.wait_timeout = wait_timeout
+        self.idle_ping_seconds = idle_ping_seconds
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        
+        # Metrics
+        self.created = 0
+        self.in_use = 0
+        self.acquired = 0
+        self.timeouts = 0
+        self.discarded = 0
+        self.idle_pings = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+    
+    def _create(self):
+        """Open a new connection to the database"""
+        connection = mysql.connector.connect(**self.config)
+        with self._lock:
+            self.created += 1
+        return connection
+    
+    def acquire(self):
+        """Check out a connection, waiting for a free slot if necessary"""
+        start = time.monotonic()
+        if not self._slots.acquire(timeout=self.wait_timeout):
+            with self._lock:
+                self.timeouts += 1
+            raise PoolError(f"Timed out after {self.wait_timeout}s waiting for a database connection")
+        waited = time.monotonic() - start
+        
+        try:
+            try:
+                connection, idle_since = self._idle.get_nowait()
+            except queue.Empty:
+                connection = self._create()
+            else:
+                if self.idle_ping_seconds and time.monotonic() - idle_since > self.idle_ping_seconds:
+                    connection = self._ping(connection)
+        except Exception:
+            self._slots.release()
+            raise
+        
+        with self._lock:
+            self.in_use += 1
+            self.acquired += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+        return connection
+    
+    def _ping(self, connection):
+        """Ping a long-idle connection, replacing it if the server dropped it"""
+        with self._lock:
+            self.idle_pings += 1
+        try:
+            connection.ping(reconnect=False)
+            return connection
+        except Error:
+            with self._lock:
+                self.discarded += 1
+            return self.replace(connection)
+    
+    def replace(self, connection):
+        """Close a dead connection and return a fresh one in its place"""
+        try:
+            connection.close()
+        except Exception:
+            pass
+        return self._create()
+    
+    def release(self, connection, discard=False):
+        """Return a connection to the pool, or close it if discard is set"""
+        try:
+            if not discard:
+                try:
+                    # Never hand a half-finished transaction to the next caller
+                    if connection.in_transaction:
+                        connection.rollback()
+                except Error:
+                    discard = True
+            if discard:
+                with self._lock:
+                    self.discarded += 1
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+            else:
+                self._idle.put((connection, time.monotonic()))
+        finally:
+            with self._lock:
+                self.in_use -= 1
+            self._slots.release()
+    
+    def close_all(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                connection.close()
+            except Exception:
+                pass
+    
+    def stats(self):
+        """Return pool size and wait-time metrics"""
+        with self._lock:
+            return {
+                'size': self.size,
+                'in_use': self.in_use,
+                'idle': self._idle.qsize(),
+                'created': self.created,
+                'acquired': self.acquired,
+                'timeouts': self.timeouts,
+                'discarded': self.discarded,
+                'idle_pings': self.idle_pings,
+                'avg_wait_ms': round(self.total_wait / self.acquired * 1000, 2) if self.acquired else 0,
+                'max_wait_ms': round(self.max_wait * 1000, 2)
+            }
+
 class DatabaseManager:
-    def __init__(self):
-        self.connection = None
+    def __init__(self, pool_size=DB_POOL_SIZE, pool_wait_timeout=DB_POOL_WAIT_TIMEOUT):
+        self.pool = ConnectionPool(DB_CONFIG, pool_size, pool_wait_timeout)
+        self._local = threading.local()
+        self._resume_listeners = []
         self.connect()
         self.create_tables()
     
     def connect(self):
-        """Establish connection to MySQL database"""
+        """Open the first pooled connection to MySQL database"""
         try:
-            self.connection = mysql.connector.connect(
-                host='2s6vhs.h.filess.io',
-                user='Major_audiencedo',
-                password='b2ff8916bde72e33589ca325f0b8b32e5acbb7ce',
-                database='Major_audiencedo',
-                port=61032
-            )
+            connection = self.pool.acquire()
+            self.pool.release(connection)
             print("✅ Successfully connected to MySQL database")
         except Error as e:
             print(f"❌ Error connecting to MySQL: {e}")
@@ -31,21 +264,50 @@ class DatabaseManager:
     def create_database(self):
         """Create database if it doesn't exist"""
         try:
-            connection = mysql.connector.connect(
-                host='2s6vhs.h.filess.io',
-                user='Major_audiencedo',
-                password='b2ff8916bde72e33589ca325f0b8b32e5acbb7ce',
-                port=61032
-            )
+            server_config = {key: value for key, value in DB_CONFIG.items() if key != 'database'}
+            connection = mysql.connector.connect(**server_config)
             cursor = connection.cursor()
-            cursor.execute("CREATE DATABASE IF NOT EXISTS Major_audiencedo")
-            print("✅ Database 'Major_audiencedo' created successfully")
+            cursor.execute(f"CREATE DATABASE IF NOT EXISTS {DB_CONFIG['database']}")
+            print(f"✅ Database '{DB_CONFIG['database']}' created successfully")
             cursor.close()
             connection.close()
             self.connect()
         except Error as e:
             print(f"❌ Error creating database: {e}")
     
+    @property
+    def connection(self):
+        """Connection of the running DatabaseManager method, checked out of the pool on first use"""
+        if not getattr(self._local, 'depth', 0):
+            raise RuntimeError("db.connection is only available inside DatabaseManager methods; use get_connection()")
+        if self._local.connection is None:
+            self._local.connection = self.pool.acquire()
+        return self._local.connection
+    
+    def _raise_if_connection_lost(self, error):
+        """Hand a lost-connection error to with_pooled_connection to rerun the method on a new connection.
+        
+        On the rerun the error is left to the method's own error handling.
+        """
+        if is_connection_lost(error):
+            self._local.lost = True
+            if not self._local.retrying:
+                raise ConnectionLost(error) from error
+    
+    @contextmanager
+    def get_connection(self):
+        """Check out a pooled connection for a block of work outside the DatabaseManager methods"""
+        connection = self.pool.acquire()
+        discard = False
+        try:
+            yield connection
+        except Error as e:
+            discard = is_connection_lost(e)
+            raise
+        finally:
+            self.pool.release(connection, discard=discard)
+    
+    @with_pooled_connection
     def create_tables(self):
         """Create necessary tables if they don't exist"""
         try:
@@ -76,6 +338,7 @@ class DatabaseManager:
                     resume_text LONGTEXT,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    UNIQUE KEY uq_user_profiles_user_id (user_id),
                     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
                 )
             """)
@@ -95,15 +358,34 @@ class DatabaseManager:
                     recommendations TEXT,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    UNIQUE KEY uq_session_data_user_resume (user_id, resume_filename),
                     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
                 )
             """)
             
+            # Server-side Flask sessions table
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS server_sessions (
+                    id VARCHAR(64) PRIMARY KEY,
+                    data MEDIUMTEXT NOT NULL,
+                    expires_at DATETIME NOT NULL,
+                    INDEX idx_server_sessions_expires_at (expires_at)
+                )
+            """)
+            
             # Create indexes for better performance
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_username ON users(username)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_session_data_user_id ON session_data(user_id)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_session_data_resume_filename ON session_data(resume_filename)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_profiles_user_id ON user_profiles(user_id)")
+            # Watermark scans of changed resumes for the candidate index
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_session_data_updated_at ON session_data(updated_at, id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_profiles_updated_at ON user_profiles(updated_at, id)")
+            # Keyset pages of the admin dashboard, one index per sort order (id is implied by InnoDB)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_session_data_ats_rank ON session_data(ats_score, updated_at)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_session_data_interview_rank ON session_data(interview_score, updated_at)")
+            # Covers the per-role GROUP BY of the dashboard header without reading rows
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_session_data_role_scores ON session_data(job_role, ats_score, interview_score)")
             print("✅ Database indexes created")
             
             # Insert default admin user if not exists
@@ -135,13 +417,15 @@ class DatabaseManager:
             self.connection.commit()
             cursor.close()
             print("✅ Database tables created successfully")
-            
+        
             # Run database migrations
             self.run_migrations()
             
         except Error as e:
+            self._raise_if_connection_lost(e)
             print(f"❌ Error creating tables: {e}")
     
+    @with_pooled_connection
     def run_migrations(self):
         """Run database migrations to update schema if needed"""
         try:
@@ -188,36 +472,67 @@ class DatabaseManager:
             except:
                 pass
             
+            # Migration 4: De-duplicate rows and add the unique keys the upserts rely on
+            try:
+                # Keep the newest row for each (user_id, resume_filename)
+                cursor.execute("""
+                    DELETE sd FROM session_data sd
+                    JOIN session_data newer
+                      ON newer.user_id = sd.user_id
+                     AND newer.resume_filename = sd.resume_filename
+                     AND newer.id > sd.id
+                """)
+                if cursor.rowcount:
+                    print(f"✅ Removed {cursor.rowcount} duplicate session_data rows")
+                cursor.execute("""
+                    ALTER TABLE session_data
+                    ADD UNIQUE KEY uq_session_data_user_resume (user_id, resume_filename)
+                """)
+                print("✅ Added unique key on session_data(user_id, resume_filename)")
+            except:
+                pass  # Key already exists
+            
+            try:
+                # Keep the newest profile for each user
+                cursor.execute("""
+                    DELETE up FROM user_profiles up
+                    JOIN user_profiles newer
+                      ON newer.user_id = up.user_id
+                     AND newer.id > up.id
+                """)
+                if cursor.rowcount:
+                    print(f"✅ Removed {cursor.rowcount} duplicate user_profiles rows")
+                cursor.execute("ALTER TABLE user_profiles ADD UNIQUE KEY uq_user_profiles_user_id (user_id)")
+                print("✅ Added unique key on user_profiles(user_id)")
+            except:
+                pass  # Key already exists
+            
             self.connection.commit()
             cursor.close()
             print("✅ Database migrations completed successfully")
             
         except Error as e:
+            self._raise_if_connection_lost(e)
             print(f"❌ Error running migrations: {e}")
     
+    @with_pooled_connection
     def get_user(self, username):
         """Get user by username"""
         try:
-            # Check if connection is still valid, reconnect if needed
-            if not self.is_connection_valid():
-                self.reconnect()
-            
             cursor = self.connection.cursor(dictionary=True)
             cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
             result = cursor.fetchone()
             cursor.close()
             return result
         except Error as e:
+            self._raise_if_connection_lost(e)
             print(f"❌ Error getting user: {e}")
             return None
     
+    @with_pooled_connection
     def create_user(self, username, password_hash, role='user'):
         """Create a new user"""
         try:
-            # Check if connection is still valid, reconnect if needed
-            if not self.is_connection_valid():
-                self.reconnect()
-            
             cursor = self.connection.cursor()
             cursor.execute(
                 "INSERT INTO users (username, password_hash, role) VALUES (%s, %s, %s)",
@@ -227,16 +542,14 @@ class DatabaseManager:
             cursor.close()
             return True
         except Error as e:
+            self._raise_if_connection_lost(e)
             print(f"❌ Error creating user: {e}")
             return False
     
+    @with_pooled_connection
     def get_session_data(self, user_id):
         """Get session data for a user"""
         try:
-            # Check if connection is still valid, reconnect if needed
-            if not self.is_connection_valid():
-                self.reconnect()
-            
             cursor = self.connection.cursor(dictionary=True)
             cursor.execute("""
                 SELECT * FROM session_data 
@@ -247,75 +560,44 @@ class DatabaseManager:
             cursor.close()
             return result
         except Error as e:
+            self._raise_if_connection_lost(e)
             print(f"❌ Error getting session data: {e}")
             return []
     
+    @with_pooled_connection
     def update_or_create_session_data(self, user_id, resume_filename, interview_score=None, ats_score=None, ats_feedback=None):
         """Update or create session data for a user"""
         try:
-            # Check if connection is still valid, reconnect if needed
-            if not self.is_connection_valid():
-                self.reconnect()
-            
             cursor = self.connection.cursor()
             
-            # Check if record exists
-            cursor.execute("""
-                SELECT id FROM session_data 
-                WHERE user_id = %s AND resume_filename = %s
-            """, (user_id, resume_filename))
-            
-            existing_record = cursor.fetchone()
-            
-            if existing_record:
-                # Update existing record
-                update_fields = []
-                values = []
-                
-                if interview_score is not None:
-                    update_fields.append("interview_score = %s")
-                    values.append(interview_score)
-                
-                if ats_score is not None:
-                    update_fields.append("ats_score = %s")
-                    values.append(ats_score)
-                
-                if ats_feedback is not None:
-                    update_fields.append("ats_feedback = %s")
-                    values.append(ats_feedback)
-                
-                if update_fields:
-                    values.extend([user_id, resume_filename])
-                    cursor.execute(f"""
-                        UPDATE session_data 
-                        SET {', '.join(update_fields)}
-                        WHERE user_id = %s AND resume_filename = %s
-                    """, values)
-            else:
-                # Create new record
-                cursor.execute("""
-                    INSERT INTO session_data (user_id, resume_filename, interview_score, ats_score, ats_feedback)
-                    VALUES (%s, %s, %s, %s, %s)
-                """, (user_id, resume_filename, interview_score or 0, ats_score, ats_feedback))
+            # Insert the record, or update only the provided fields if it exists
+            fields = {
+                'interview_score': interview_score,
+                'ats_score': ats_score,
+                'ats_feedback': ats_feedback
+            }
+            query, values = build_upsert(
+                'session_data',
+                {'user_id': user_id, 'resume_filename': resume_filename, **fields, 'interview_score': interview_score or 0},
+                [column for column, value in fields.items() if value is not None]
+            )
+            cursor.execute(query, values)
             
             self.connection.commit()
             cursor.close()
             return True
         except Error as e:
+            self._raise_if_connection_lost(e)
             print(f"❌ Error updating session data: {e}")
             return False
     
+    @with_pooled_connection
     def get_all_session_data(self):
-        """Get all session data for admin dashboard"""
+        """Get the username, scores and resume filename of every session for the admin report"""
         try:
-            # Check if connection is still valid, reconnect if needed
-            if not self.is_connection_valid():
-                self.reconnect()
-            
             cursor = self.connection.cursor(dictionary=True)
             cursor.execute("""
-                SELECT u.username, sd.resume_filename, sd.job_role, sd.interview_score, 
-                       sd.ats_score, sd.ats_feedback, sd.skill_gaps, sd.recommendations
+                SELECT u.username, sd.resume_filename, sd.interview_score, sd.ats_score
                 FROM session_data sd
                 JOIN users u ON sd.user_id = u.id
                 ORDER BY sd.ats_score DESC, sd.updated_at DESC
@@ -324,212 +606,373 @@ class DatabaseManager:
             cursor.close()
             return result
         except Error as e:
+            self._raise_if_connection_lost(e)
             print(f"❌ Error getting all session data: {e}")
             return []
     
-    def get_all_session_data_with_profiles(self):
-        """Get all session data with user profile information for admin dashboard"""
+    @with_pooled_connection
+    def get_dashboard_page(self, sort='ats_score', after=None, limit=25):
+        """Get one keyset page of session data with profile columns for the admin dashboard.
+        
+        Rows are ordered by the sort column (see DASHBOARD_SORT_COLUMNS), then
+        updated_at and id, all descending with missing scores last. `after`
+        is the (score, updated_at, id) of the last row of the previous page.
+        Only the ids of the page are read from the sort index; resume text is
+        never selected. Returns (rows, has_more).
+        """
+        column = DASHBOARD_SORT_COLUMNS[sort]
+        order = f"{'sd.' + column + ' DESC, ' if column else ''}sd.updated_at DESC, sd.id DESC"
+        conditions, values = "1 = 1", []
+        if after is not None:
+            score, updated_at, row_id = after
+            conditions = "(sd.updated_at < %s OR (sd.updated_at = %s AND sd.id < %s))"
+            values = [updated_at, updated_at, row_id]
+            if column and score is None:
+                conditions = f"sd.{column} IS NULL AND {conditions}"
+            elif column:
+                conditions = f"(sd.{column} < %s OR (sd.{column} = %s AND {conditions}) OR sd.{column} IS NULL)"
+                values = [score, score] + values
         try:
-            # Check if connection is still valid, reconnect if needed
-            if not self.is_connection_valid():
-                self.reconnect()
-            
             cursor = self.connection.cursor(dictionary=True)
-            cursor.execute("""
-                SELECT u.username, 
-                       sd.resume_filename, sd.job_role, sd.interview_score, 
+            cursor.execute(f"""
+                SELECT sd.id, sd.updated_at, u.username,
+                       sd.resume_filename, sd.job_role, sd.interview_score,
                        sd.ats_score, sd.ats_feedback, sd.skill_gaps, sd.recommendations,
                        up.full_name, up.email, up.phone, up.preferred_job_role,
-                       up.experience_level, up.skills, up.resume_text
-                FROM session_data sd
+                       up.experience_level, up.skills
+                FROM (
+                    SELECT sd.id FROM session_data sd
+                    WHERE {conditions}
+                    ORDER BY {order}
+                    LIMIT %s
+                ) page
+                JOIN session_data sd ON sd.id = page.id
                 JOIN users u ON sd.user_id = u.id
                 LEFT JOIN user_profiles up ON u.id = up.user_id
-                ORDER BY sd.ats_score DESC, sd.updated_at DESC
+                ORDER BY {order}
+            """, values + [limit + 1])
+            result = cursor.fetchall()
+            cursor.close()
+            return result[:limit], len(result) > limit
+        except Error as e:
+            self._raise_if_connection_lost(e)
+            print(f"❌ Error getting dashboard page: {e}")
+            return [], False
+    
+    @with_pooled_connection
+    def get_role_stats(self):
+        """Get session counts and score totals per job role with one GROUP BY over a covering index"""
+        try:
+            cursor = self.connection.cursor(dictionary=True)
+            cursor.execute("""
+                SELECT job_role, COUNT(*) AS sessions,
+                       COUNT(ats_score) AS ats_sessions, COALESCE(SUM(ats_score), 0) AS ats_total,
+                       COUNT(interview_score) AS interview_sessions,
+                       COALESCE(SUM(interview_score), 0) AS interview_total,
+                       MAX(interview_score) AS highest_interview
+                FROM session_data
+                GROUP BY job_role
             """)
             result = cursor.fetchall()
             cursor.close()
+            for row in result:
+                row['ats_total'] = int(row['ats_total'])
+                row['interview_total'] = int(row['interview_total'])
             return result
         except Error as e:
-            print(f"❌ Error getting all session data with profiles: {e}")
+            self._raise_if_connection_lost(e)
+            print(f"❌ Error getting role stats: {e}")
             return []
     
+    @with_pooled_connection
+    def get_score_distribution(self):
+        """Get {'ats': {score: sessions}, 'interview': {score: sessions}} from the dashboard sort indexes"""
+        distribution = {'ats': {}, 'interview': {}}
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("""
+                SELECT 'ats', ats_score, COUNT(*) FROM session_data
+                WHERE ats_score IS NOT NULL GROUP BY ats_score
+                UNION ALL
+                SELECT 'interview', interview_score, COUNT(*) FROM session_data
+                WHERE interview_score IS NOT NULL GROUP BY interview_score
+            """)
+            for kind, score, sessions in cursor.fetchall():
+                distribution[kind][score] = sessions
+            cursor.close()
+            return distribution
+        except Error as e:
+            self._raise_if_connection_lost(e)
+            print(f"❌ Error getting score distribution: {e}")
+            return distribution
+    
+    def add_resume_listener(self, listener):
+        """Call listener(source, user_id, resume_filename, resume_text, job_role) after each stored resume"""
+        self._resume_listeners.append(listener)
+    
+    def _resume_saved(self, source, user_id, resume_filename, resume_text, job_role):
+        for listener in self._resume_listeners:
+            try:
+                listener(source, user_id, resume_filename, resume_text, job_role)
+            except Exception as e:
+                print(f"⚠️ Resume listener failed: {e}")
+    
+    @with_pooled_connection
     def create_or_update_user_profile(self, user_id, full_name=None, email=None, phone=None, 
                                     preferred_job_role=None, experience_level=None, skills=None, resume_text=None):
         """Create or update user profile"""
         try:
-            if not self.is_connection_valid():
-                self.reconnect()
-            
             cursor = self.connection.cursor()
             
-            # Check if profile exists
-            cursor.execute("SELECT id FROM user_profiles WHERE user_id = %s", (user_id,))
-            existing_profile = cursor.fetchone()
-            
-            if existing_profile:
-                # Update existing profile
-                update_fields = []
-                values = []
-                
-                if full_name is not None:
-                    update_fields.append("full_name = %s")
-                    values.append(full_name)
-                if email is not None:
-                    update_fields.append("email = %s")
-                    values.append(email)
-                if phone is not None:
-                    update_fields.append("phone = %s")
-                    values.append(phone)
-                if preferred_job_role is not None:
-                    update_fields.append("preferred_job_role = %s")
-                    values.append(preferred_job_role)
-                if experience_level is not None:
-                    update_fields.append("experience_level = %s")
-                    values.append(experience_level)
-                if skills is not None:
-                    update_fields.append("skills = %s")
-                    values.append(skills)
-                if resume_text is not None:
-                    update_fields.append("resume_text = %s")
-                    values.append(resume_text)
-                
-                if update_fields:
-                    values.append(user_id)
-                    cursor.execute(f"""
-                        UPDATE user_profiles 
-                        SET {', '.join(update_fields)}
-                        WHERE user_id = %s
-                    """, values)
-            else:
-                # Create new profile
-                cursor.execute("""
-                    INSERT INTO user_profiles (user_id, full_name, email, phone, preferred_job_role, 
-                                             experience_level, skills, resume_text)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """, (user_id, full_name, email, phone, preferred_job_role, experience_level, skills, resume_text))
+            # Insert the profile, or update only the provided fields if it exists
+            fields = {
+                'full_name': full_name,
+                'email': email,
+                'phone': phone,
+                'preferred_job_role': preferred_job_role,
+                'experience_level': experience_level,
+                'skills': skills,
+                'resume_text': resume_text
+            }
+            query, values = build_upsert(
+                'user_profiles',
+                {'user_id': user_id, **fields},
+                [column for column, value in fields.items() if value is not None]
+            )
+            cursor.execute(query, values)
             
             self.connection.commit()
             cursor.close()
+            if resume_text is not None:
+                self._resume_saved('user_profiles', user_id, None, resume_text, preferred_job_role)
             return True
         except Error as e:
+            self._raise_if_connection_lost(e)
             print(f"❌ Error creating/updating user profile: {e}")
             return False
     
+    @with_pooled_connection
     def get_user_profile(self, user_id):
         """Get user profile by user_id"""
         try:
-            if not self.is_connection_valid():
-                self.reconnect()
-            
             cursor = self.connection.cursor(dictionary=True)
             cursor.execute("SELECT * FROM user_profiles WHERE user_id = %s", (user_id,))
             result = cursor.fetchone()
             cursor.close()
             return result
         except Error as e:
+            self._raise_if_connection_lost(e)
             print(f"❌ Error getting user profile: {e}")
             return None
     
+    @with_pooled_connection
     def update_session_data_with_analysis(self, user_id, resume_filename, resume_text, job_role, 
                                         interview_score=None, ats_score=None, ats_feedback=None,
                                         skill_gaps=None, recommendations=None):
         """Update session data with comprehensive analysis"""
         try:
-            if not self.is_connection_valid():
-                self.reconnect()
-            
             cursor = self.connection.cursor()
             
-            # Check if record exists
-            cursor.execute("""
-                SELECT id FROM session_data 
-                WHERE user_id = %s AND resume_filename = %s
-            """, (user_id, resume_filename))
-            
-            existing_record = cursor.fetchone()
-            
-            if existing_record:
-                # Update existing record
-                update_fields = []
-                values = []
-                
-                if resume_text is not None:
-                    update_fields.append("resume_text = %s")
-                    values.append(resume_text)
-                if job_role is not None:
-                    update_fields.append("job_role = %s")
-                    values.append(job_role)
-                if interview_score is not None:
-                    update_fields.append("interview_score = %s")
-                    values.append(interview_score)
-                if ats_score is not None:
-                    update_fields.append("ats_score = %s")
-                    values.append(ats_score)
-                if ats_feedback is not None:
-                    update_fields.append("ats_feedback = %s")
-                    values.append(ats_feedback)
-                if skill_gaps is not None:
-                    update_fields.append("skill_gaps = %s")
-                    values.append(skill_gaps)
-                if recommendations is not None:
-                    update_fields.append("recommendations = %s")
-                    values.append(recommendations)
-                
-                if update_fields:
-                    values.extend([user_id, resume_filename])
-                    cursor.execute(f"""
-                        UPDATE session_data 
-                        SET {', '.join(update_fields)}
-                        WHERE user_id = %s AND resume_filename = %s
-                    """, values)
-            else:
-                # Create new record
-                cursor.execute("""
-                    INSERT INTO session_data (user_id, resume_filename, resume_text, job_role, 
-                                            interview_score, ats_score, ats_feedback, skill_gaps, recommendations)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """, (user_id, resume_filename, resume_text, job_role, 
-                     interview_score or 0, ats_score, ats_feedback, skill_gaps, recommendations))
+            # Insert the record, or update only the provided fields if it exists
+            fields = {
+                'resume_text': resume_text,
+                'job_role': job_role,
+                'interview_score': interview_score,
+                'ats_score': ats_score,
+                'ats_feedback': ats_feedback,
+                'skill_gaps': skill_gaps,
+                'recommendations': recommendations
+            }
+            query, values = build_upsert(
+                'session_data',
+                {'user_id': user_id, 'resume_filename': resume_filename, **fields, 'interview_score': interview_score or 0},
+                [column for column, value in fields.items() if value is not None]
+            )
+            cursor.execute(query, values)
             
             self.connection.commit()
             cursor.close()
+            if resume_text is not None:
+                self._resume_saved('session_data', user_id, resume_filename, resume_text, job_role)
             return True
         except Error as e:
+            self._raise_if_connection_lost(e)
             print(f"❌ Error updating session data with analysis: {e}")
             return False
     
-    def is_connection_valid(self):
-        """Check if the database connection is still valid"""
+    def iter_resumes_updated_since(self, source, updated_at=None, after_id=0, batch_size=500):
+        """Yield batches of resumes from session_data or user_profiles changed after a watermark.
+        
+        Rows come oldest first, ordered by (updated_at, id), from a single
+        query read with fetchmany, so even the first full pull keeps only
+        one batch of resume text in memory. The pooled connection is held
+        until the generator is exhausted or closed.
+        """
+        queries = {
+            'session_data': """
+                SELECT sd.id, sd.user_id, u.username, sd.resume_filename, sd.job_role,
+                       sd.resume_text, sd.updated_at
+                FROM session_data sd
+                JOIN users u ON sd.user_id = u.id
+                WHERE {watermark}
+                ORDER BY sd.updated_at, sd.id
+            """,
+            'user_profiles': """
+                SELECT up.id, up.user_id, u.username, NULL AS resume_filename, up.preferred_job_role AS job_role,
+                       up.resume_text, up.updated_at
+                FROM user_profiles up
+                JOIN users u ON up.user_id = u.id
+                WHERE {watermark}
+                ORDER BY up.updated_at, up.id
+            """
+        }
+        alias = 'sd' if source == 'session_data' else 'up'
+        if updated_at is None:
+            watermark, values = "1 = 1", ()
+        else:
+            watermark = f"({alias}.updated_at > %s OR ({alias}.updated_at = %s AND {alias}.id > %s))"
+            values = (updated_at, updated_at, after_id)
+        
+        try:
+            connection = self.pool.acquire()
+        except Error as e:
+            print(f"❌ Error getting updated resumes: {e}")
+            return
+        # An unbuffered cursor left with unread rows cannot be reused, so only a fully read one goes back
+        finished = False
+        try:
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute(queries[source].format(watermark=watermark), values)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+            cursor.close()
+            finished = True
+        except Error as e:
+            print(f"❌ Error getting updated resumes: {e}")
+        finally:
+            self.pool.release(connection, discard=not finished)
+    
+    @with_pooled_connection
+    def get_resume_texts(self, documents):
+        """Get resume text for a page of (source, user_id, resume_filename) documents, keyed the same way"""
+        session_keys = [(user_id, filename) for source, user_id, filename in documents if source == 'session_data']
+        profile_ids = [user_id for source, user_id, filename in documents if source == 'user_profiles']
+        texts = {}
+        try:
+            cursor = self.connection.cursor(dictionary=True)
+            if session_keys:
+                cursor.execute(f"""
+                    SELECT user_id, resume_filename, resume_text FROM session_data
+                    WHERE (user_id, resume_filename) IN ({', '.join(['(%s, %s)'] * len(session_keys))})
+                """, [value for key in session_keys for value in key])
+                for row in cursor.fetchall():
+                    texts[('session_data', row['user_id'], row['resume_filename'])] = row['resume_text']
+            if profile_ids:
+                cursor.execute(f"""
+                    SELECT user_id, resume_text FROM user_profiles
+                    WHERE user_id IN ({', '.join(['%s'] * len(profile_ids))})
+                """, profile_ids)
+                for row in cursor.fetchall():
+                    texts[('user_profiles', row['user_id'], None)] = row['resume_text']
+            cursor.close()
+            return texts
+        except Error as e:
+            self._raise_if_connection_lost(e)
+            print(f"❌ Error getting resume texts: {e}")
+            return texts
+    
+    @with_pooled_connection
+    def get_server_session(self, sid):
+        """Get serialized Flask session data by session id"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("""
+                SELECT data FROM server_sessions 
+                WHERE id = %s AND expires_at > UTC_TIMESTAMP()
+            """, (sid,))
+            result = cursor.fetchone()
+            cursor.close()
+            return result[0] if result else None
+        except Error as e:
+            self._raise_if_connection_lost(e)
+            print(f"❌ Error getting server session: {e}")
+            return None
+    
+    @with_pooled_connection
+    def save_server_session(self, sid, data, expires_at):
+        """Create or replace serialized Flask session data"""
         try:
-            if self.connection is None:
-                return False
-            if not self.connection.is_connected():
-                return False
-            # Test the connection with a simple query
             cursor = self.connection.cursor()
-            cursor.execute("SELECT 1")
-            cursor.fetchone()
+            query, values = build_upsert(
+                'server_sessions',
+                {'id': sid, 'data': data, 'expires_at': expires_at},
+                ['data', 'expires_at']
+            )
+            cursor.execute(query, values)
+            self.connection.commit()
             cursor.close()
             return True
-        except:
+        except Error as e:
+            self._raise_if_connection_lost(e)
+            print(f"❌ Error saving server session: {e}")
             return False
     
-    def reconnect(self):
-        """Reconnect to the database"""
+    @with_pooled_connection
+    def delete_server_session(self, sid):
+        """Delete a Flask session"""
         try:
-            if self.connection and self.connection.is_connected():
-                self.connection.close()
-            self.connect()
-            print("✅ Database reconnected successfully")
+            cursor = self.connection.cursor()
+            cursor.execute("DELETE FROM server_sessions WHERE id = %s", (sid,))
+            self.connection.commit()
+            cursor.close()
+            return True
+        except Error as e:
+            self._raise_if_connection_lost(e)
+            print(f"❌ Error deleting server session: {e}")
+            return False
+    
+    @with_pooled_connection
+    def purge_expired_server_sessions(self):
+        """Delete expired Flask sessions"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("DELETE FROM server_sessions WHERE expires_at <= UTC_TIMESTAMP()")
+            removed = cursor.rowcount
+            self.connection.commit()
+            cursor.close()
+            return removed
+        except Error as e:
+            self._raise_if_connection_lost(e)
+            print(f"❌ Error purging expired server sessions: {e}")
+            return 0
+    
+    @with_pooled_connection
+    def is_connection_valid(self):
+        """Check if the database is reachable with a single ping"""
+        try:
+            return self.connection.is_connected()
+        except Error:
+            return False
+    
+    @with_pooled_connection
+    def get_server_info(self):
+        """Return the MySQL server version string"""
+        try:
+            return self.connection.get_server_info()
         except Error as e:
-            print(f"❌ Error reconnecting to database: {e}")
+            self._raise_if_connection_lost(e)
+            print(f"❌ Error getting server info: {e}")
+            return 'Unknown'
     
     def close(self):
-        """Close database connection"""
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
-            print("✅ Database connection closed")
+        """Close all pooled database connections"""
+        self.pool.close_all()
+        print("✅ Database connections closed")
     
+    @with_pooled_connection
     def verify_database_health(self):
         """Verify database health and return status"""
         try:
@@ -562,46 +1005,38 @@ class DatabaseManager:
             return True
             
         except Error as e:
+            self._raise_if_connection_lost(e)
             print(f"❌ Database health check failed: {e}")
             return False
     
+    @with_pooled_connection
     def get_database_stats(self):
-        """Get database statistics"""
+        """Get database statistics in one round trip"""
         try:
-            cursor = self.connection.cursor()
-            
-            stats = {}
-            
-            # Count users
-            cursor.execute("SELECT COUNT(*) FROM users")
-            stats['total_users'] = cursor.fetchone()[0]
-            
-            # Count user profiles
-            cursor.execute("SELECT COUNT(*) FROM user_profiles")
-            stats['total_profiles'] = cursor.fetchone()[0]
-            
-            # Count session data
-            cursor.execute("SELECT COUNT(*) FROM session_data")
-            stats['total_sessions'] = cursor.fetchone()[0]
-            
-            # Count admin users
-            cursor.execute("SELECT COUNT(*) FROM users WHERE role = 'admin'")
-            stats['admin_users'] = cursor.fetchone()[0]
+            cursor = self.connection.cursor(dictionary=True)
+            cursor.execute("""
+                SELECT users.total_users, users.admin_users, profiles.total_profiles,
+                       sessions.total_sessions, sessions.avg_ats_score, sessions.avg_interview_score
+                FROM (SELECT COUNT(*) AS total_users, COALESCE(SUM(role = 'admin'), 0) AS admin_users
+                      FROM users) users
+                CROSS JOIN (SELECT COUNT(*) AS total_profiles FROM user_profiles) profiles
+                CROSS JOIN (SELECT COUNT(*) AS total_sessions,
+                                   AVG(ats_score) AS avg_ats_score,
+                                   AVG(CASE WHEN interview_score > 0 THEN interview_score END) AS avg_interview_score
+                            FROM session_data) sessions
+            """)
+            stats = cursor.fetchone()
+            cursor.close()
             
-            # Average ATS scores
-            cursor.execute("SELECT AVG(ats_score) FROM session_data WHERE ats_score IS NOT NULL")
-            avg_ats = cursor.fetchone()[0]
+            stats['admin_users'] = int(stats['admin_users'])
+            avg_ats = stats['avg_ats_score']
             stats['avg_ats_score'] = round(avg_ats, 2) if avg_ats else 0
-            
-            # Average interview scores
-            cursor.execute("SELECT AVG(interview_score) FROM session_data WHERE interview_score > 0")
-            avg_interview = cursor.fetchone()[0]
+            avg_interview = stats['avg_interview_score']
             stats['avg_interview_score'] = round(avg_interview, 2) if avg_interview else 0
-            
-            cursor.close()
             return stats
             
         except Error as e:
+            self._raise_if_connection_lost(e)
             print(f"❌ Error getting database stats: {e}")
             return {}
 
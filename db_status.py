@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from database import db
+
+# Load environment variables
+load_dotenv()
+
+# Seconds a /api/database/status snapshot (health check and table statistics) is served before it is refreshed
+DB_STATUS_TTL_SECONDS = float(os.getenv('DB_STATUS_TTL_SECONDS', '30'))
+# Seconds a readiness ping result is reused
+DB_READY_TTL_SECONDS = float(os.getenv('DB_READY_TTL_SECONDS', '5'))
+
+
+class BackgroundSnapshot:
+    """A value loaded at most once per TTL, refreshed in the background.
+
+    The first caller loads the value while the others wait for it. After
+    that, callers always get the current value immediately; the first one
+    to find it older than the TTL starts a single refresh thread, and the
+    value is replaced when that refresh finishes. However many clients poll,
+    the loader runs at most once per TTL in each process.
+    """
+
+    def __init__(self, name, loader, ttl):
+        self.name = name
+        self.loader = loader
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._initial_lock = threading.Lock()
+        self._value = None
+        self._loaded_at = None
+        self._refreshing = False
+
+        self.refreshes = 0
+        self.total_refresh_time = 0.0
+        self.served = 0
+
+    def _refresh(self):
+        started = time.perf_counter()
+        try:
+            value = self.loader()
+        except Exception as e:
+            print(f"❌ {self.name} refresh failed: {e}")
+            value = self._value
+        with self._lock:
+            self._value = value
+            self._loaded_at = time.monotonic()
+            self._refreshing = False
+            self.refreshes += 1
+            self.total_refresh_time += time.perf_counter() - started
+
+    def get(self):
+        """Return (value, seconds since it was loaded)"""
+        with self._lock:
+            loaded = self._loaded_at is not None
+            if loaded and not self._refreshing and time.monotonic() - self._loaded_at >= self.ttl:
+                self._refreshing = True
+                threading.Thread(target=self._refresh, name=f"{self.name}-refresh", daemon=True).start()
+
+        if not loaded:
+            with self._initial_lock:
+                if self._loaded_at is None:
+                    self._refresh()
+
+        with self._lock:
+            self.served += 1
+            return self._value, round(time.monotonic() - self._loaded_at, 1)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'ttl_seconds': self.ttl,
+                'refreshes': self.refreshes,
+                'served': self.served,
+                'avg_refresh_ms': round(self.total_refresh_time / self.refreshes * 1000, 1) if self.refreshes else 0,
+                'age_seconds': round(time.monotonic() - self._loaded_at, 1) if self._loaded_at is not None else None
+            }
+
+
+class DatabaseStatusMonitor:
+    """Cached database status for monitoring: a cheap readiness ping and a full status snapshot"""
+
+    def __init__(self, database, status_ttl=DB_STATUS_TTL_SECONDS, ready_ttl=DB_READY_TTL_SECONDS):
+        self.db = database
+        self._status = BackgroundSnapshot('db-status', self._load_status, status_ttl)
+        self._ready = BackgroundSnapshot('db-ready', self.db.is_connection_valid, ready_ttl)
+
+    def _load_status(self):
+        try:
+            health = self.db.verify_database_health()
+            return {
+                'status': 'healthy' if health else 'warning',
+                'connection': self.db.is_connection_valid(),
+                'stats': self.db.get_database_stats(),
+                'timestamp': self.db.get_server_info()
+            }
+        except Exception as e:
+            return {
+                'status': 'error',
+                'connection': False,
+                'error': str(e)
+            }
+
+    def status(self):
+        """Return (status snapshot, age in seconds)"""
+        return self._status.get()
+
+    def ready(self):
+        """Return (whether the database answered the last ping, age in seconds)"""
+        return self._ready.get()
+
+    def stats(self):
+        return {
+            'status': self._status.stats(),
+            'ready': self._ready.stats()
+        }
+
+
+# Global database status monitor
+db_status = DatabaseStatusMonitor(db)
@@ -24,7 +24,7 @@ def main():
         print("📊 Initializing database connection...")
         db = DatabaseManager()
         
-        if not db.connection or not db.connection.is_connected():
+        if not db.is_connection_valid():
             print("❌ Failed to connect to database")
             return False
         
@@ -0,0 +1,30 @@
+# Software job roles
+SOFTWARE_JOB_ROLES = [
+    "Software Engineer", "Backend Developer", "Frontend Developer",
+    "Full Stack Developer", "Data Scientist", "Machine Learning Engineer",
+    "AI Engineer", "DevOps Engineer", "Database Administrator",
+    "Cloud Engineer", "UI/UX Designer", "Cybersecurity Analyst",
+    "Mobile App Developer", "Product Manager", "QA Engineer",
+    "Embedded Systems Engineer", "Game Developer"
+]
+
+# Skill requirements for each job role
+JOB_SKILL_REQUIREMENTS = {
+    "Software Engineer": ["Programming Languages", "Data Structures", "Algorithms", "Software Design", "Testing"],
+    "Backend Developer": ["Programming Languages", "Databases", "APIs", "Server Management", "Cloud Platforms"],
+    "Frontend Developer": ["HTML/CSS", "JavaScript", "React/Vue/Angular", "Responsive Design", "UI/UX"],
+    "Full Stack Developer": ["Frontend Technologies", "Backend Technologies", "Databases", "APIs", "DevOps"],
+    "Data Scientist": ["Python/R", "Machine Learning", "Statistics", "Data Analysis", "SQL"],
+    "Machine Learning Engineer": ["Python", "Machine Learning", "Deep Learning", "Data Processing", "Model Deployment"],
+    "AI Engineer": ["Python", "Machine Learning", "Deep Learning", "NLP", "Computer Vision"],
+    "DevOps Engineer": ["Cloud Platforms", "CI/CD", "Containerization", "Monitoring", "Infrastructure"],
+    "Database Administrator": ["SQL", "Database Design", "Performance Tuning", "Backup/Recovery", "Security"],
+    "Cloud Engineer": ["Cloud Platforms", "Infrastructure", "Automation", "Security", "Networking"],
+    "UI/UX Designer": ["Design Tools", "User Research", "Prototyping", "Visual Design", "Interaction Design"],
+    "Cybersecurity Analyst": ["Security Tools", "Risk Assessment", "Incident Response", "Compliance", "Networking"],
+    "Mobile App Developer": ["Mobile Frameworks", "Platform Knowledge", "APIs", "Testing", "Performance"],
+    "Product Manager": ["Product Strategy", "Market Research", "Agile/Scrum", "Data Analysis", "Communication"],
+    "QA Engineer": ["Testing Frameworks", "Automation", "Manual Testing", "Bug Tracking", "Quality Assurance"],
+    "Embedded Systems Engineer": ["C/C++", "Microcontrollers", "Hardware", "Real-time Systems", "Debugging"],
+    "Game Developer": ["Game Engines", "Programming", "3D Graphics", "Physics", "Game Design"]
+}
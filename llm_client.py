@@ -0,0 +1,444 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from dotenv import load_dotenv
+
+from circuit_breaker import CircuitBreaker
+from llm_parsers import parse_stats
+from rate_limiter import (PRIORITY_BATCH, PRIORITY_DEFAULT, PRIORITY_INTERACTIVE, AdmissionController,
+                          RateLimitExceeded)
+
+# Load environment variables
+load_dotenv()
+
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', '86400'))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '1024'))
+LLM_CACHE_DIR = os.getenv('LLM_CACHE_DIR', '')
+LLM_CACHE_BYPASS = {name.strip() for name in os.getenv('LLM_CACHE_BYPASS', '').split(',') if name.strip()}
+LLM_THREAD_POOL_SIZE = int(os.getenv('LLM_THREAD_POOL_SIZE', '8'))
+LLM_CALL_DEADLINE = float(os.getenv('LLM_CALL_DEADLINE', '20'))
+# Deadline for long generations: calls asking for at least LLM_LONG_CALL_TOKENS tokens
+LLM_LONG_CALL_DEADLINE = float(os.getenv('LLM_LONG_CALL_DEADLINE', '60'))
+LLM_LONG_CALL_TOKENS = int(os.getenv('LLM_LONG_CALL_TOKENS', '500'))
+LLM_UPSTREAM_POOL_SIZE = int(os.getenv('LLM_UPSTREAM_POOL_SIZE', '16'))
+
+# Cohere stream event carrying a chunk of generated text
+TEXT_GENERATION_EVENT = 'text-generation'
+# Cohere stream event that ends the stream, and its finish_reason when the generation completed normally
+STREAM_END_EVENT = 'stream-end'
+STREAM_COMPLETE = 'COMPLETE'
+
+# Admission priority of each calling endpoint; answer evaluation is interactive
+ENDPOINT_PRIORITIES = {
+    'evaluate_answer': PRIORITY_INTERACTIVE,
+    'upload_resume': PRIORITY_DEFAULT,
+    'analyze_skill_gaps': PRIORITY_BATCH,
+    'check_ats': PRIORITY_BATCH
+}
+
+# Shared pool for running independent LLM calls concurrently within a request
+llm_executor = ThreadPoolExecutor(max_workers=LLM_THREAD_POOL_SIZE, thread_name_prefix='llm')
+
+# Threads that make the actual HTTP calls, so callers can stop waiting at their deadline
+upstream_executor = ThreadPoolExecutor(max_workers=LLM_UPSTREAM_POOL_SIZE, thread_name_prefix='llm-upstream')
+
+
+class LLMDeadlineExceeded(Exception):
+    """Raised when Cohere has not answered within the call's deadline"""
+
+
+def is_upstream_failure(error):
+    """Return True for errors that suggest Cohere is unhealthy rather than the request being bad"""
+    status = getattr(error, 'http_status', None)
+    return not (status and 400 <= status < 500 and status != 429)
+
+
+class ChatResponse:
+    """Minimal stand-in for a Cohere chat response served from cache"""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class ResponseCache:
+    """TTL + LRU cache of LLM response text, with an optional on-disk tier"""
+
+    def __init__(self, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES, cache_dir=LLM_CACHE_DIR):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.rejected = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if self.cache_dir:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+            except OSError as e:
+                print(f"⚠️ LLM cache directory unavailable, using memory only: {e}")
+                self.cache_dir = None
+
+    @staticmethod
+    def key_for(model, message, temperature, max_tokens):
+        """Return the cache key for a chat request"""
+        prompt_hash = hashlib.sha256(message.encode('utf-8')).hexdigest()
+        return hashlib.sha256(f"{model}|{temperature}|{max_tokens}|{prompt_hash}".encode('utf-8')).hexdigest()
+
+    def _path_for(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _remember(self, key, text, expires_at):
+        """Insert into the LRU, evicting the oldest entries when full"""
+        self._entries[key] = (text, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key):
+        """Return cached response text for key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                text, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return text
+                del self._entries[key]
+                self.expirations += 1
+
+        if self.cache_dir:
+            path = self._path_for(key)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+                if entry['expires_at'] > now:
+                    with self._lock:
+                        self._remember(key, entry['text'], entry['expires_at'])
+                        self.disk_hits += 1
+                    return entry['text']
+                os.remove(path)
+                with self._lock:
+                    self.expirations += 1
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ Error reading LLM cache entry: {e}")
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, text):
+        """Store response text for key"""
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, text, expires_at)
+
+        if self.cache_dir:
+            # Write to a temp file and rename so readers never see a partial entry
+            path = self._path_for(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'text': text, 'expires_at': expires_at}, f)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"⚠️ Error writing LLM cache entry: {e}")
+
+    def invalidate(self, key):
+        """Drop the entry for key from both tiers"""
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.cache_dir:
+            try:
+                os.remove(self._path_for(key))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"⚠️ Error removing LLM cache entry: {e}")
+
+    def record_bypass(self):
+        with self._lock:
+            self.bypassed += 1
+
+    def record_rejected(self):
+        with self._lock:
+            self.rejected += 1
+
+    def stats(self):
+        """Return hit/miss/eviction counters"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'bypassed': self.bypassed,
+                'rejected': self.rejected,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(hits / lookups, 4) if lookups else 0
+            }
+
+
+class _InFlightCall:
+    """An upstream call that other callers with the same key are waiting on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is still running wait for it and receive the same result or exception.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """Run fn() once for all concurrent callers of key and return its result"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _InFlightCall()
+                self._calls[key] = call
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        """Return executed/coalesced counters"""
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'executed': self.executed,
+                'coalesced': self.coalesced
+            }
+
+
+class LLMClient:
+    """Wrapper around cohere.Client used by every route that calls the LLM.
+
+    chat() takes the same arguments as cohere.Client.chat plus the name of
+    the calling endpoint. Responses are cached by model, prompt, temperature
+    and max_tokens unless the endpoint is listed in LLM_CACHE_BYPASS.
+    Identical requests that are already in flight are coalesced into a
+    single upstream call, whether or not the endpoint is cached. Callers
+    that pass a `parse` callable get its result as `response.parsed`, and
+    only responses it accepts (returns a value other than None for) are
+    cached, so a malformed answer is retried rather than served for the
+    cache TTL. Calls that
+    reach Cohere are admitted through a rate limiter, with the endpoint's
+    priority class deciding who goes first when requests have to queue.
+
+    Each upstream call has a deadline: `deadline` by default, or
+    `long_deadline` for calls asking for at least `long_tokens` tokens,
+    which take several times longer to generate. A circuit breaker stops
+    calling Cohere after repeated failures or timeouts. Both raise to the caller,
+    so the route's existing fallback is served without waiting for the
+    client's own timeout.
+    """
+
+    def __init__(self, client, cache=None, bypass_endpoints=LLM_CACHE_BYPASS, admission=None,
+                 breaker=None, deadline=LLM_CALL_DEADLINE, long_deadline=LLM_LONG_CALL_DEADLINE,
+                 long_tokens=LLM_LONG_CALL_TOKENS):
+        self.client = client
+        self.cache = cache if cache is not None else ResponseCache()
+        self.bypass_endpoints = set(bypass_endpoints)
+        self.single_flight = SingleFlight()
+        self.admission = admission if admission is not None else AdmissionController()
+        self.breaker = breaker if breaker is not None else CircuitBreaker('Cohere')
+        self.deadline = deadline
+        self.long_deadline = long_deadline
+        self.long_tokens = long_tokens
+        self._lock = threading.Lock()
+        self.deadlines_exceeded = 0
+        self.streams_incomplete = 0
+
+    def deadline_for(self, max_tokens):
+        """Default deadline in seconds for a call generating up to max_tokens (0 waits for the client timeout)"""
+        if max_tokens is not None and max_tokens >= self.long_tokens:
+            return self.long_deadline
+        return self.deadline
+
+    def _call_upstream(self, endpoint, deadline=None, **kwargs):
+        """Check the circuit, wait for admission, then call Cohere within the deadline"""
+        self.breaker.before_call()
+        try:
+            self.admission.acquire(ENDPOINT_PRIORITIES.get(endpoint, PRIORITY_DEFAULT))
+        except RateLimitExceeded:
+            self.breaker.release()
+            raise
+
+        if deadline is None:
+            deadline = self.deadline_for(kwargs.get('max_tokens'))
+        future = upstream_executor.submit(self.client.chat, **kwargs)
+        try:
+            response = future.result(timeout=deadline or None)
+        except FutureTimeoutError:
+            with self._lock:
+                self.deadlines_exceeded += 1
+            self.breaker.record_failure()
+            raise LLMDeadlineExceeded(f"Cohere did not respond within {deadline}s")
+        except Exception as e:
+            if is_upstream_failure(e):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+        self.breaker.record_success()
+        return response
+
+    def chat(self, model, message, max_tokens=None, temperature=None, endpoint=None, use_cache=True,
+             deadline=None, parse=None):
+        """Call co.chat, serving repeated prompts from the response cache.
+
+        With `parse`, the response gets `parsed = parse(response.text)` and
+        is cached only when that is not None. Parsing a cached response is
+        not counted in parse_stats.
+        """
+        key = self.cache.key_for(model, message, temperature, max_tokens)
+        bypass = not use_cache or endpoint in self.bypass_endpoints
+        if bypass:
+            self.cache.record_bypass()
+        else:
+            text = self.cache.get(key)
+            if text is not None:
+                response = ChatResponse(text)
+                if parse is None:
+                    return response
+                # Parse stats describe what Cohere sent, not how often it was served
+                with parse_stats.paused():
+                    response.parsed = parse(text)
+                if response.parsed is not None:
+                    return response
+                # Cached before it was validated (or by an older parser); ask again
+                self.cache.invalidate(key)
+
+        def call():
+            response = self._call_upstream(endpoint, deadline, model=model, message=message,
+                                           max_tokens=max_tokens, temperature=temperature)
+            if parse is not None:
+                response.parsed = parse(response.text)
+            if not bypass:
+                if parse is None or response.parsed is not None:
+                    self.cache.put(key, response.text)
+                else:
+                    self.cache.record_rejected()
+            return response
+
+        return self.single_flight.do(key, call)
+
+    def chat_stream(self, model, message, max_tokens=None, temperature=None, endpoint=None, use_cache=True,
+                    deadline=None, parse=None):
+        """Yield response text chunks as Cohere generates them.
+
+        A cached response is yielded as a single chunk. A stream is added to
+        the cache under the same key chat() uses only when it ends with a
+        COMPLETE stream-end event and `parse` (if given) accepts the full
+        text; a stream cut short or stopped by Cohere is never cached. The
+        deadline bounds opening the stream; an error mid-stream counts as a
+        failure for the circuit breaker.
+        """
+        bypass = not use_cache or endpoint in self.bypass_endpoints
+        if bypass:
+            self.cache.record_bypass()
+        else:
+            key = self.cache.key_for(model, message, temperature, max_tokens)
+            text = self.cache.get(key)
+            if text is not None:
+                with parse_stats.paused():
+                    valid = parse is None or parse(text) is not None
+                if valid:
+                    yield text
+                    return
+                self.cache.invalidate(key)
+
+        chunks = []
+        finish_reason = None
+        events = self._call_upstream(endpoint, deadline, model=model, message=message, max_tokens=max_tokens,
+                                     temperature=temperature, stream=True)
+        try:
+            for event in events:
+                event_type = getattr(event, 'event_type', None)
+                if event_type == TEXT_GENERATION_EVENT and event.text:
+                    chunks.append(event.text)
+                    yield event.text
+                elif event_type == STREAM_END_EVENT:
+                    finish_reason = getattr(event, 'finish_reason', None)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+
+        if finish_reason != STREAM_COMPLETE:
+            print(f"⚠️ Cohere stream ended without completing (finish reason: {finish_reason}), not caching it")
+            with self._lock:
+                self.streams_incomplete += 1
+        elif not bypass:
+            text = ''.join(chunks)
+            if parse is None or parse(text) is not None:
+                self.cache.put(key, text)
+            else:
+                self.cache.record_rejected()
+
+    def stats(self):
+        """Return LLM client metrics"""
+        with self._lock:
+            deadlines_exceeded = self.deadlines_exceeded
+            streams_incomplete = self.streams_incomplete
+        return {
+            'cache': self.cache.stats(),
+            'single_flight': self.single_flight.stats(),
+            'admission': self.admission.stats(),
+            'circuit_breaker': self.breaker.stats(),
+            'deadline_seconds': self.deadline,
+            'long_deadline_seconds': self.long_deadline,
+            'long_call_tokens': self.long_tokens,
+            'deadlines_exceeded': deadlines_exceeded,
+            'streams_incomplete': streams_incomplete
+        }
@@ -0,0 +1,491 @@
+import json
+import re
+import threading
+from contextlib import contextmanager
+
+# "1." ... at the start of a stripped line
+NUMBERED_PREFIX_PATTERN = re.compile(r'\d+\.')
+# "1. **" opening a titled item
+NUMBERED_TITLE_START_PATTERN = re.compile(r'\d+\.\s*\*\*')
+# Leading "1. **Title**" on a numbered line
+NUMBERED_TITLE_PATTERN = re.compile(r'^\d+\.\s*\*\*(.*?)\*\*\s*')
+# "1. **Title**\n   *"Question"*" items whose number does not start a line
+QUESTION_ITEM_PATTERN = re.compile(r'\d+\.\s*\*\*(.*?)\*\*\s*\n\s*\*"(.*?)"\*', re.DOTALL)
+# Numbering used to split questions written on a single line
+INLINE_NUMBER_PATTERN = re.compile(r'\s*\d+\.\s*')
+BOLD_PATTERN = re.compile(r'\*\*(.*?)\*\*')
+ITALIC_PATTERN = re.compile(r'\*(.*?)\*')
+
+# "Score: 85/100", "**Score:** 85/100", "**85/100**" ... for the ATS check
+ATS_SCORE_PATTERN = re.compile(r'(?:Score:?\s*)?(?:\*\*)?(\d{1,3})\s*/\s*100(?:\*\*)?', re.IGNORECASE)
+# "Score: 8/10", "**Score: 8/10**", "8/10" ... for answer evaluation
+EVALUATION_SCORE_PATTERN = re.compile(r'(?:Score:?\s*)?(?:\*\*)?(\d{1,2})\s*/\s*10(?:\*\*)?', re.IGNORECASE)
+# "SKILL GAPS:", "**Recommendations:**" ... labels of the combined ATS and skill-gap response
+COMBINED_SECTION_PATTERN = re.compile(
+    r'^[ \t#*]*(SCORE|FEEDBACK|SKILL GAPS|RECOMMENDATIONS|YOUTUBE PLAYLISTS)[ \t*]*:[ \t*]*',
+    re.IGNORECASE | re.MULTILINE)
+
+# Shortest text accepted as a question
+MIN_QUESTION_LENGTH = 11
+
+# JSON schemas requested from the LLM in structured output mode
+QUESTIONS_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'questions': {
+            'type': 'array',
+            'minItems': 1,
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'category': {'type': 'string'},
+                    'question': {'type': 'string', 'minLength': MIN_QUESTION_LENGTH}
+                },
+                'required': ['category', 'question']
+            }
+        }
+    },
+    'required': ['questions']
+}
+ATS_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'score': {'type': 'integer', 'minimum': 0, 'maximum': 100},
+        'feedback': {'type': 'string', 'minLength': 1}
+    },
+    'required': ['score', 'feedback']
+}
+EVALUATION_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'score': {'type': 'integer', 'minimum': 0, 'maximum': 10},
+        'feedback': {'type': 'string', 'minLength': 1}
+    },
+    'required': ['score', 'feedback']
+}
+COMBINED_ATS_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'score': {'type': 'integer', 'minimum': 0, 'maximum': 100},
+        'feedback': {'type': 'string', 'minLength': 1},
+        'skill_gaps': {'type': 'string', 'minLength': 1},
+        'recommendations': {'type': 'string', 'minLength': 1},
+        'youtube_suggestions': {'type': 'string'}
+    },
+    'required': ['score', 'feedback', 'skill_gaps', 'recommendations']
+}
+
+JSON_TYPES = {
+    'object': dict,
+    'array': list,
+    'string': str,
+    'integer': int,
+    'number': (int, float),
+    'boolean': bool
+}
+
+CODE_FENCE_PATTERN = re.compile(r'^```(?:json)?\s*|\s*```$', re.IGNORECASE)
+
+
+class StructuredOutputError(ValueError):
+    """Raised when a structured LLM response is not valid JSON for its schema"""
+
+
+def _is_numbered(stripped_line):
+    return stripped_line[:1].isdigit() and NUMBERED_PREFIX_PATTERN.match(stripped_line) is not None
+
+
+def _numbered_blocks(text):
+    """Split text into blocks of lines, each starting at a numbered line.
+
+    This is the single tokenizing pass every question format is parsed
+    from. Lines before the first numbered line are dropped.
+    """
+    blocks = []
+    for line in text.split('\n'):
+        if _is_numbered(line.strip()):
+            blocks.append([line])
+        elif blocks:
+            blocks[-1].append(line)
+    return blocks
+
+
+def _structured_question(lines):
+    """Return the question of a "N. **Title**" / *"Question"* block, or None.
+
+    The quoted question may span several lines; None is returned until its
+    closing quote is present.
+    """
+    head = lines[0].strip()
+    if not head.endswith('**'):
+        return None
+    match = NUMBERED_TITLE_START_PATTERN.match(head)
+    if match is None or match.end() > len(head) - 2:
+        return None
+
+    for index in range(1, len(lines)):
+        first = lines[index].lstrip()
+        if first:
+            if not first.startswith('*"'):
+                return None
+            rest = '\n'.join([first] + lines[index + 1:])
+            end = rest.find('"*', 2)
+            return rest[2:end].strip() if end != -1 else None
+    return None
+
+
+def _clean_numbered_block(lines):
+    """Turn a numbered block into one question: drop the "N. **Title**" prefix and join its lines"""
+    question = NUMBERED_TITLE_PATTERN.sub('', lines[0].strip(), count=1)
+    question = question.strip('*').strip()
+    for line in lines[1:]:
+        line = line.strip()
+        if line and question and not line.startswith('These questions'):
+            cleaned = line.strip('*').strip()
+            if cleaned:
+                question += " " + cleaned
+    return question
+
+
+def _strip_markdown(text):
+    text = BOLD_PATTERN.sub(r'\1', text)
+    return ITALIC_PATTERN.sub(r'\1', text)
+
+
+def _parse_unnumbered_questions(questions_text):
+    """Fallbacks for responses without numbered lines"""
+    questions = []
+
+    # Questions numbered inline on one line: "1. First? 2. Second?"
+    for part in INLINE_NUMBER_PATTERN.split(questions_text):
+        part = _strip_markdown(part.strip()).strip('*').strip()
+        if len(part) >= MIN_QUESTION_LENGTH and not part.startswith('Here are') and not part.startswith('These questions'):
+            questions.append(part)
+
+    # Last resort: the whole response is one question
+    if not questions:
+        cleaned = _strip_markdown(questions_text.lstrip('0123456789.-) ').strip())
+        if cleaned:
+            questions.append(cleaned)
+    return questions
+
+
+def parse_questions(questions_text):
+    """Parse generated interview questions out of a complete LLM response.
+
+    The response is split into numbered blocks in one pass. If any block is
+    in the requested "N. **Title** *"Question"*" format, only those
+    questions are returned; otherwise every numbered block is cleaned into a
+    question. Titled items that do not start a line are searched for only
+    when nothing else matched. Responses without numbered lines fall back
+    to inline numbering, then to the whole text.
+    """
+    structured = []
+    numbered = []
+    blocks = _numbered_blocks(questions_text)
+
+    for block in blocks:
+        question = _structured_question(block)
+        if question is not None and len(question) >= MIN_QUESTION_LENGTH:
+            structured.append(question)
+        if not structured:
+            question = _clean_numbered_block(block)
+            if len(question) >= MIN_QUESTION_LENGTH:
+                numbered.append(question)
+
+    if not structured and '*"' in questions_text:
+        # Structured items whose number does not start a line
+        structured = [question.strip() for _, question in QUESTION_ITEM_PATTERN.findall(questions_text)
+                      if len(question.strip()) >= MIN_QUESTION_LENGTH]
+
+    return structured or numbered or _parse_unnumbered_questions(questions_text)
+
+
+def _parse_scored_response(output, score_pattern):
+    """Find the first line with a score; the non-empty lines after it are the feedback"""
+    lines = output.splitlines()
+    for i, line in enumerate(lines):
+        match = score_pattern.search(line)
+        if match:
+            feedback_lines = []
+            for feedback_line in lines[i+1:]:
+                # Remove markdown formatting from feedback lines
+                clean_line = BOLD_PATTERN.sub(r'\1', feedback_line.strip())
+                if clean_line:
+                    feedback_lines.append(clean_line)
+            return int(match.group(1)), ' '.join(feedback_lines).strip()
+    return None, ""
+
+
+def parse_ats_response(output):
+    """Parse the ATS score and feedback out of a complete LLM response.
+
+    Returns (score, feedback); score is None if no "N/100" score was found.
+    """
+    return _parse_scored_response(output, ATS_SCORE_PATTERN)
+
+
+def parse_evaluation_response(output):
+    """Parse the answer score and feedback out of a complete LLM response.
+
+    Returns (score, feedback); score is None if no "N/10" score was found.
+    """
+    score, feedback = _parse_scored_response(output, EVALUATION_SCORE_PATTERN)
+    # Remove "Feedback:" prefix if present
+    if feedback.lower().startswith('feedback:'):
+        feedback = feedback[9:].strip()
+    return score, feedback
+
+
+COMBINED_SECTION_FIELDS = {
+    'score': 'score',
+    'feedback': 'feedback',
+    'skill gaps': 'skill_gaps',
+    'recommendations': 'recommendations',
+    'youtube playlists': 'youtube_suggestions'
+}
+
+
+def parse_combined_ats_response(output):
+    """Parse a combined ATS and skill-gap response into a dict.
+
+    The response is split at its "SCORE:", "FEEDBACK:", "SKILL GAPS:",
+    "RECOMMENDATIONS:" and "YOUTUBE PLAYLISTS:" labels. The score is the
+    first "N/100" in the score section (or anywhere, if it is unlabeled);
+    'score' is None if there is none and missing sections are empty.
+    """
+    result = dict.fromkeys(COMBINED_SECTION_FIELDS.values(), '')
+    matches = list(COMBINED_SECTION_PATTERN.finditer(output))
+    for index, match in enumerate(matches):
+        end = matches[index + 1].start() if index + 1 < len(matches) else len(output)
+        field = COMBINED_SECTION_FIELDS[match.group(1).lower()]
+        if not result[field]:
+            result[field] = BOLD_PATTERN.sub(r'\1', output[match.end():end]).strip()
+
+    score_match = ATS_SCORE_PATTERN.search(result['score'] or output)
+    result['score'] = int(score_match.group(1)) if score_match else None
+    result['feedback'] = ' '.join(line.strip() for line in result['feedback'].splitlines() if line.strip())
+    return result
+
+
+def structured_output_instructions(schema):
+    """Prompt text asking the LLM to answer with JSON matching schema"""
+    return ("Respond with a single JSON object and nothing else: no markdown, no code fences, no commentary. "
+            "It must validate against this JSON Schema:\n" + json.dumps(schema, indent=2))
+
+
+def validate_schema(value, schema, path='$'):
+    """Check value against the subset of JSON Schema used by the schemas above"""
+    expected = schema.get('type')
+    # bool is an int subclass, but JSON true is not an integer
+    if expected and (not isinstance(value, JSON_TYPES[expected])
+                     or (isinstance(value, bool) and expected != 'boolean')):
+        raise StructuredOutputError(f"{path} should be of type {expected}")
+
+    if expected == 'object':
+        for name in schema.get('required', []):
+            if name not in value:
+                raise StructuredOutputError(f"{path}.{name} is required")
+        for name, property_schema in schema.get('properties', {}).items():
+            if name in value:
+                validate_schema(value[name], property_schema, f"{path}.{name}")
+    elif expected == 'array':
+        if len(value) < schema.get('minItems', 0):
+            raise StructuredOutputError(f"{path} needs at least {schema['minItems']} items")
+        for index, item in enumerate(value):
+            validate_schema(item, schema.get('items', {}), f"{path}[{index}]")
+    elif expected == 'string':
+        if len(value.strip()) < schema.get('minLength', 0):
+            raise StructuredOutputError(f"{path} is shorter than {schema['minLength']} characters")
+    elif expected in ('integer', 'number'):
+        if 'minimum' in schema and value < schema['minimum']:
+            raise StructuredOutputError(f"{path} is below {schema['minimum']}")
+        if 'maximum' in schema and value > schema['maximum']:
+            raise StructuredOutputError(f"{path} is above {schema['maximum']}")
+
+
+def parse_structured(output, schema):
+    """Decode the JSON object in an LLM response and validate it against schema"""
+    text = CODE_FENCE_PATTERN.sub('', output.strip())
+    start = text.find('{')
+    end = text.rfind('}')
+    if start == -1 or end < start:
+        raise StructuredOutputError("No JSON object in response")
+    try:
+        value = json.loads(text[start:end + 1])
+    except ValueError as e:
+        raise StructuredOutputError(f"Invalid JSON: {e}")
+    validate_schema(value, schema)
+    return value
+
+
+class ParseStats:
+    """Count how each LLM response format was parsed, and how often parsing failed"""
+
+    OUTCOMES = ('structured', 'structured_invalid', 'regex', 'failed')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._counts = {}
+
+    @contextmanager
+    def paused(self):
+        """Skip recording on this thread, so re-parsing a cached response is not counted again"""
+        self._local.paused = True
+        try:
+            yield
+        finally:
+            self._local.paused = False
+
+    def record(self, format_name, outcome):
+        if getattr(self._local, 'paused', False):
+            return
+        with self._lock:
+            counts = self._counts.setdefault(format_name, dict.fromkeys(self.OUTCOMES, 0))
+            counts[outcome] += 1
+
+    def stats(self):
+        """Return per-format outcome counts and failure rates"""
+        with self._lock:
+            result = {}
+            for format_name, counts in self._counts.items():
+                total = counts['structured'] + counts['regex'] + counts['failed']
+                result[format_name] = dict(counts, failure_rate=round(counts['failed'] / total, 4) if total else 0)
+            return result
+
+
+def parse_questions_output(output, structured=False):
+    """Parse a question generation response, trying JSON first in structured mode"""
+    if structured:
+        try:
+            value = parse_structured(output, QUESTIONS_SCHEMA)
+            parse_stats.record('questions', 'structured')
+            return [item['question'].strip() for item in value['questions']]
+        except StructuredOutputError as e:
+            print(f"⚠️ Structured questions invalid, falling back to text parsing: {e}")
+            parse_stats.record('questions', 'structured_invalid')
+
+    questions = parse_questions(output)
+    parse_stats.record('questions', 'regex' if questions else 'failed')
+    return questions
+
+
+def _parse_scored_output(format_name, output, structured, schema, text_parser):
+    if structured:
+        try:
+            value = parse_structured(output, schema)
+            parse_stats.record(format_name, 'structured')
+            return value['score'], value['feedback'].strip()
+        except StructuredOutputError as e:
+            print(f"⚠️ Structured {format_name} response invalid, falling back to text parsing: {e}")
+            parse_stats.record(format_name, 'structured_invalid')
+
+    score, feedback = text_parser(output)
+    parse_stats.record(format_name, 'regex' if score is not None and feedback else 'failed')
+    return score, feedback
+
+
+def parse_ats_output(output, structured=False):
+    """Parse an ATS response into (score, feedback), trying JSON first in structured mode"""
+    return _parse_scored_output('ats', output, structured, ATS_SCHEMA, parse_ats_response)
+
+
+def parse_evaluation_output(output, structured=False):
+    """Parse an answer evaluation into (score, feedback), trying JSON first in structured mode"""
+    return _parse_scored_output('evaluation', output, structured, EVALUATION_SCHEMA, parse_evaluation_response)
+
+
+def parse_combined_ats_output(output, structured=False):
+    """Parse a combined ATS and skill-gap response, trying JSON first in structured mode"""
+    if structured:
+        try:
+            value = parse_structured(output, COMBINED_ATS_SCHEMA)
+            parse_stats.record('combined_ats', 'structured')
+            return {
+                'score': value['score'],
+                'feedback': value['feedback'].strip(),
+                'skill_gaps': value['skill_gaps'].strip(),
+                'recommendations': value['recommendations'].strip(),
+                'youtube_suggestions': value.get('youtube_suggestions', '').strip()
+            }
+        except StructuredOutputError as e:
+            print(f"⚠️ Structured combined ATS response invalid, falling back to text parsing: {e}")
+            parse_stats.record('combined_ats', 'structured_invalid')
+
+    result = parse_combined_ats_response(output)
+    complete = result['score'] is not None and result['feedback'] and result['skill_gaps']
+    parse_stats.record('combined_ats', 'regex' if complete else 'failed')
+    return result
+
+
+class IncrementalQuestionParser:
+    """Parse numbered questions out of a streamed LLM response as chunks arrive.
+
+    Complete lines go through the same tokenizer as parse_questions(). A
+    block in the requested "N. **Title** *"Question"*" format is emitted as
+    soon as its closing quote arrives; any other block is emitted once the
+    next numbered line starts (or the stream ends), unless a titled block
+    has already been seen. If nothing parsed by the end of the stream,
+    finish() falls back to parse_questions() on the full text.
+    """
+
+    def __init__(self):
+        self.buffer = ''
+        self.questions = []
+        self._partial_line = ''
+        self._block = None
+        self._block_emitted = False
+        self._structured_seen = False
+
+    def feed(self, chunk):
+        """Add a chunk of response text; return the questions it completed"""
+        self.buffer += chunk
+        lines = (self._partial_line + chunk).split('\n')
+        self._partial_line = lines.pop()
+        new_questions = []
+        for line in lines:
+            self._add_line(line, new_questions)
+        self.questions.extend(new_questions)
+        return new_questions
+
+    def finish(self):
+        """Flush the last block at the end of the stream; return any remaining questions"""
+        new_questions = []
+        self._add_line(self._partial_line, new_questions)
+        self._partial_line = ''
+        self._close_block(new_questions)
+        self.questions.extend(new_questions)
+        if not self.questions:
+            new_questions = parse_questions(self.buffer.strip())
+            self.questions.extend(new_questions)
+        return new_questions
+
+    def _add_line(self, line, new_questions):
+        if _is_numbered(line.strip()):
+            self._close_block(new_questions)
+            self._block = [line]
+            self._block_emitted = False
+        elif self._block is not None:
+            self._block.append(line)
+        else:
+            return
+
+        if not self._block_emitted:
+            question = _structured_question(self._block)
+            if question is not None:
+                self._block_emitted = True
+                self._structured_seen = True
+                if len(question) >= MIN_QUESTION_LENGTH:
+                    new_questions.append(question)
+
+    def _close_block(self, new_questions):
+        if self._block is not None and not self._block_emitted and not self._structured_seen:
+            question = _clean_numbered_block(self._block)
+            if len(question) >= MIN_QUESTION_LENGTH:
+                new_questions.append(question)
+        self._block = None
+
+
+# Global parse outcome counters
+parse_stats = ParseStats()
@@ -0,0 +1,209 @@
+import atexit
+import hashlib
+import io
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import PyPDF2
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+PDF_TEXT_CACHE_SIZE = int(os.getenv('PDF_TEXT_CACHE_SIZE', '256'))
+PDF_TEXT_CACHE_DIR = os.getenv('PDF_TEXT_CACHE_DIR', os.path.join('.cache', 'pdf_text'))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv('PDF_PARALLEL_MIN_PAGES', '8'))
+PDF_EXTRACT_WORKERS = int(os.getenv('PDF_EXTRACT_WORKERS', str(min(4, os.cpu_count() or 1))))
+
+
+class PDFTextCache:
+    """Content-addressed cache of extracted PDF text.
+
+    Entries are keyed by the SHA-256 of the uploaded bytes. Lookups go to an
+    in-memory LRU first, then to a directory of text files that survives
+    restarts and is shared by every worker on the host.
+    """
+
+    def __init__(self, max_entries=PDF_TEXT_CACHE_SIZE, cache_dir=PDF_TEXT_CACHE_DIR):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.cache_dir:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+            except OSError as e:
+                print(f"⚠️ PDF text cache directory unavailable, using memory only: {e}")
+                self.cache_dir = None
+
+    @staticmethod
+    def key_for(pdf_bytes):
+        """Return the cache key for the given PDF bytes"""
+        return hashlib.sha256(pdf_bytes).hexdigest()
+
+    def _path_for(self, key):
+        return os.path.join(self.cache_dir, f"{key}.txt")
+
+    def _remember(self, key, text):
+        """Insert into the LRU, evicting the oldest entry when full"""
+        self._entries[key] = text
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key):
+        """Return cached text for key, or None on a miss"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return self._entries[key]
+
+        if self.cache_dir:
+            try:
+                with open(self._path_for(key), 'r', encoding='utf-8') as f:
+                    text = f.read()
+                with self._lock:
+                    self._remember(key, text)
+                    self.disk_hits += 1
+                return text
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"⚠️ Error reading PDF text cache entry: {e}")
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, text):
+        """Store text for key in memory and on disk"""
+        with self._lock:
+            self._remember(key, text)
+
+        if self.cache_dir:
+            # Write to a temp file and rename so readers never see partial text
+            path = self._path_for(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(text)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"⚠️ Error writing PDF text cache entry: {e}")
+
+    def stats(self):
+        """Return hit/miss counters"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round(hits / lookups, 4) if lookups else 0
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """Create the shared extraction process pool on first use.
+
+    Workers are started from a fresh interpreter rather than forked, since a
+    fork of the threaded Flask process can copy locks held by other threads.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _pool = ProcessPoolExecutor(max_workers=PDF_EXTRACT_WORKERS,
+                                        mp_context=multiprocessing.get_context(start_method))
+        return _pool
+
+
+def _reset_pool(broken):
+    """Drop a broken pool so the next large PDF gets a fresh one"""
+    global _pool
+    with _pool_lock:
+        # Another request may already have replaced it with a working pool
+        if _pool is broken:
+            _pool.shutdown(wait=False)
+            _pool = None
+
+
+@atexit.register
+def _shutdown_pool():
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _extract_page_range(pdf_bytes, start, stop):
+    """Extract pages [start, stop) of the PDF; runs inside a pool worker"""
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    return [pdf_reader.pages[i].extract_text() for i in range(start, stop)]
+
+
+def _extract_text(pdf_bytes):
+    """Run PyPDF2 over every page of the PDF.
+
+    PDFs with at least PDF_PARALLEL_MIN_PAGES pages are split into one
+    contiguous page range per pool worker and joined back in page order.
+    Smaller PDFs are extracted in-process, where pool overhead would dominate.
+    Errors reading the PDF itself are raised to the caller either way.
+    """
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    page_count = len(pdf_reader.pages)
+
+    if PDF_EXTRACT_WORKERS < 2 or page_count < PDF_PARALLEL_MIN_PAGES:
+        return ''.join(page.extract_text() for page in pdf_reader.pages)
+
+    chunk_count = min(PDF_EXTRACT_WORKERS, page_count)
+    chunk_size = -(-page_count // chunk_count)
+    ranges = [(start, min(start + chunk_size, page_count)) for start in range(0, page_count, chunk_size)]
+
+    pool = _get_pool()
+    futures = []
+    try:
+        futures = [pool.submit(_extract_page_range, pdf_bytes, start, stop) for start, stop in ranges]
+        pages = []
+        for future in futures:
+            pages.extend(future.result())
+        return ''.join(pages)
+    except BrokenProcessPool as e:
+        # A worker died, not the PDF: only then is the shared pool replaced
+        print(f"⚠️ PDF extraction pool broke, falling back to in-process: {e}")
+        _reset_pool(pool)
+        return ''.join(page.extract_text() for page in pdf_reader.pages)
+    finally:
+        # A parse error in one range leaves the other ranges of this PDF nothing to do
+        for future in futures:
+            future.cancel()
+
+
+def extract_pdf_text(file):
+    """Extract text from an uploaded PDF, reusing earlier extractions of the same bytes"""
+    pdf_bytes = file.read()
+    key = pdf_text_cache.key_for(pdf_bytes)
+
+    text = pdf_text_cache.get(key)
+    if text is None:
+        text = _extract_text(pdf_bytes)
+        pdf_text_cache.put(key, text)
+    return text
+
+
+# Global PDF text cache instance
+pdf_text_cache = PDFTextCache()
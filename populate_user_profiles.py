@@ -4,6 +4,7 @@ Script to populate user_profiles table with data from existing users and session
 """
 
 from database import DatabaseManager
+from skill_matcher import skill_matcher
 import re
 
 def extract_skills_from_resume(resume_text):
@@ -11,24 +12,7 @@ def extract_skills_from_resume(resume_text):
     if not resume_text:
         return ""
     
-    # Common technical skills to look for
-    technical_skills = [
-        'Python', 'JavaScript', 'Java', 'C++', 'C#', 'PHP', 'Ruby', 'Go', 'Rust',
-        'HTML', 'CSS', 'React', 'Vue', 'Angular', 'Node.js', 'Express', 'Django',
-        'Flask', 'Spring', 'Laravel', 'MySQL', 'PostgreSQL', 'MongoDB', 'Redis',
-        'AWS', 'Azure', 'Docker', 'Kubernetes', 'Git', 'Jenkins', 'CI/CD',
-        'Machine Learning', 'AI', 'Data Science', 'Analytics', 'TensorFlow',
-        'PyTorch', 'Pandas', 'NumPy', 'Scikit-learn'
-    ]
-    
-    found_skills = []
-    resume_lower = resume_text.lower()
-    
-    for skill in technical_skills:
-        if skill.lower() in resume_lower:
-            found_skills.append(skill)
-    
-    return ', '.join(found_skills[:10])  # Limit to 10 skills
+    return ', '.join(skill_matcher.extract(resume_text, limit=10))  # Limit to 10 skills
 
 def determine_experience_level(resume_text):
     """Determine experience level based on resume content"""
@@ -80,102 +64,104 @@ def populate_user_profiles():
     
     print("=== POPULATING USER_PROFILES TABLE ===")
     
-    # Get all users
-    cursor = db.connection.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM users")
-    users = cursor.fetchall()
-    
-    profiles_created = 0
-    profiles_updated = 0
-    
-    for user in users:
-        user_id = user['id']
-        username = user['username']
+    # Hold one pooled connection for the whole run; it goes back to the pool even if the run fails
+    with db.get_connection() as connection:
+        # Get all users
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute("SELECT * FROM users")
+        users = cursor.fetchall()
         
-        print(f"\nProcessing user: {username} (ID: {user_id})")
+        profiles_created = 0
+        profiles_updated = 0
         
-        # Check if profile already exists
-        cursor.execute("SELECT * FROM user_profiles WHERE user_id = %s", (user_id,))
-        existing_profile = cursor.fetchone()
-        
-        # Get latest session data for this user
-        cursor.execute("""
-            SELECT resume_text, job_role, interview_score, ats_score, created_at
-            FROM session_data 
-            WHERE user_id = %s 
-            ORDER BY updated_at DESC 
-            LIMIT 1
-        """, (user_id,))
-        
-        latest_session = cursor.fetchone()
-        
-        if latest_session:
-            resume_text = latest_session.get('resume_text', '')
-            job_role = latest_session.get('job_role', 'Software Engineer')
+        for user in users:
+            user_id = user['id']
+            username = user['username']
             
-            # Extract information from resume
-            full_name, email, phone = extract_contact_info(resume_text)
-            skills = extract_skills_from_resume(resume_text)
-            experience_level = determine_experience_level(resume_text)
+            print(f"\nProcessing user: {username} (ID: {user_id})")
             
-            if existing_profile:
-                # Update existing profile
-                cursor.execute("""
-                    UPDATE user_profiles 
-                    SET full_name = %s, email = %s, phone = %s, 
-                        preferred_job_role = %s, experience_level = %s, 
-                        skills = %s, resume_text = %s
-                    WHERE user_id = %s
-                """, (full_name, email, phone, job_role, experience_level, 
-                     skills, resume_text, user_id))
-                profiles_updated += 1
-                print(f"  Updated profile for {username}")
-            else:
-                # Create new profile
-                cursor.execute("""
-                    INSERT INTO user_profiles 
-                    (user_id, full_name, email, phone, preferred_job_role, 
-                     experience_level, skills, resume_text)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """, (user_id, full_name, email, phone, job_role, 
-                     experience_level, skills, resume_text))
-                profiles_created += 1
-                print(f"  Created profile for {username}")
+            # Check if profile already exists
+            cursor.execute("SELECT * FROM user_profiles WHERE user_id = %s", (user_id,))
+            existing_profile = cursor.fetchone()
+            
+            # Get latest session data for this user
+            cursor.execute("""
+                SELECT resume_text, job_role, interview_score, ats_score, created_at
+                FROM session_data 
+                WHERE user_id = %s 
+                ORDER BY updated_at DESC 
+                LIMIT 1
+            """, (user_id,))
+            
+            latest_session = cursor.fetchone()
+            
+            if latest_session:
+                resume_text = latest_session.get('resume_text', '')
+                job_role = latest_session.get('job_role', 'Software Engineer')
                 
-                if full_name:
-                    print(f"    Name: {full_name}")
-                if email:
-                    print(f"    Email: {email}")
-                if job_role:
-                    print(f"    Job Role: {job_role}")
-                if skills:
-                    print(f"    Skills: {skills[:100]}...")
-        else:
-            # Create basic profile even without session data
-            if not existing_profile:
-                cursor.execute("""
-                    INSERT INTO user_profiles 
-                    (user_id, preferred_job_role, experience_level)
-                    VALUES (%s, %s, %s)
-                """, (user_id, 'Software Engineer', 'Entry'))
-                profiles_created += 1
-                print(f"  Created basic profile for {username}")
-    
-    db.connection.commit()
-    cursor.close()
-    
-    print(f"\n=== POPULATION COMPLETE ===")
-    print(f"Profiles created: {profiles_created}")
-    print(f"Profiles updated: {profiles_updated}")
-    print(f"Total users processed: {len(users)}")
-    
-    # Verify the results
-    print(f"\n=== VERIFICATION ===")
-    cursor = db.connection.cursor()
-    cursor.execute("SELECT COUNT(*) FROM user_profiles")
-    total_profiles = cursor.fetchone()[0]
-    print(f"Total profiles in database: {total_profiles}")
-    cursor.close()
+                # Extract information from resume
+                full_name, email, phone = extract_contact_info(resume_text)
+                skills = extract_skills_from_resume(resume_text)
+                experience_level = determine_experience_level(resume_text)
+                
+                if existing_profile:
+                    # Update existing profile
+                    cursor.execute("""
+                        UPDATE user_profiles 
+                        SET full_name = %s, email = %s, phone = %s, 
+                            preferred_job_role = %s, experience_level = %s, 
+                            skills = %s, resume_text = %s
+                        WHERE user_id = %s
+                    """, (full_name, email, phone, job_role, experience_level, 
+                         skills, resume_text, user_id))
+                    profiles_updated += 1
+                    print(f"  Updated profile for {username}")
+                else:
+                    # Create new profile
+                    cursor.execute("""
+                        INSERT INTO user_profiles 
+                        (user_id, full_name, email, phone, preferred_job_role, 
+                         experience_level, skills, resume_text)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                    """, (user_id, full_name, email, phone, job_role, 
+                         experience_level, skills, resume_text))
+                    profiles_created += 1
+                    print(f"  Created profile for {username}")
+                    
+                    if full_name:
+                        print(f"    Name: {full_name}")
+                    if email:
+                        print(f"    Email: {email}")
+                    if job_role:
+                        print(f"    Job Role: {job_role}")
+                    if skills:
+                        print(f"    Skills: {skills[:100]}...")
+            else:
+                # Create basic profile even without session data
+                if not existing_profile:
+                    cursor.execute("""
+                        INSERT INTO user_profiles 
+                        (user_id, preferred_job_role, experience_level)
+                        VALUES (%s, %s, %s)
+                    """, (user_id, 'Software Engineer', 'Entry'))
+                    profiles_created += 1
+                    print(f"  Created basic profile for {username}")
+        
+        connection.commit()
+        cursor.close()
+        
+        print(f"\n=== POPULATION COMPLETE ===")
+        print(f"Profiles created: {profiles_created}")
+        print(f"Profiles updated: {profiles_updated}")
+        print(f"Total users processed: {len(users)}")
+        
+        # Verify the results
+        print(f"\n=== VERIFICATION ===")
+        cursor = connection.cursor()
+        cursor.execute("SELECT COUNT(*) FROM user_profiles")
+        total_profiles = cursor.fetchone()[0]
+        print(f"Total profiles in database: {total_profiles}")
+        cursor.close()
 
 if __name__ == "__main__":
     populate_user_profiles()
@@ -0,0 +1,209 @@
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+try:
+    import fcntl
+except ImportError:  # Windows: the shared bucket is unavailable
+    fcntl = None
+
+# Load environment variables
+load_dotenv()
+
+LLM_RATE_LIMIT_PER_MINUTE = float(os.getenv('LLM_RATE_LIMIT_PER_MINUTE', '60'))
+LLM_RATE_LIMIT_BURST = int(os.getenv('LLM_RATE_LIMIT_BURST', '10'))
+LLM_RATE_LIMIT_FILE = os.getenv('LLM_RATE_LIMIT_FILE', '')
+LLM_QUEUE_MAX_DEPTH = int(os.getenv('LLM_QUEUE_MAX_DEPTH', '50'))
+LLM_QUEUE_TIMEOUT = float(os.getenv('LLM_QUEUE_TIMEOUT', '15'))
+
+# Priority classes; lower values are admitted first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_DEFAULT = 1
+PRIORITY_BATCH = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: 'interactive',
+    PRIORITY_DEFAULT: 'default',
+    PRIORITY_BATCH: 'batch'
+}
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a call cannot be admitted before its queue timeout"""
+
+
+class TokenBucket:
+    """Token bucket shared by the threads of one process"""
+
+    def __init__(self, rate_per_minute, burst, clock=time.monotonic):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.clock = clock
+        self._tokens = float(self.capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """Take one token; return 0 on success or the seconds until one is available"""
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+
+class FileTokenBucket:
+    """Token bucket kept in a locked state file, shared by every worker on the host"""
+
+    def __init__(self, rate_per_minute, burst, path, clock=time.time):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.path = path
+        # Wall-clock time, since the state file is read by other processes
+        self.clock = clock
+
+    def try_acquire(self):
+        """Take one token; return 0 on success or the seconds until one is available"""
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            raw = os.read(fd, 256)
+            now = self.clock()
+            try:
+                state = json.loads(raw)
+                tokens = min(self.capacity, state['tokens'] + max(0, now - state['updated']) * self.rate)
+            except (ValueError, KeyError, TypeError):
+                tokens = float(self.capacity)
+
+            wait = 0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, json.dumps({'tokens': tokens, 'updated': now}).encode('utf-8'))
+            return wait
+        finally:
+            os.close(fd)
+
+
+def create_token_bucket(rate_per_minute=LLM_RATE_LIMIT_PER_MINUTE, burst=LLM_RATE_LIMIT_BURST,
+                        path=LLM_RATE_LIMIT_FILE):
+    """Return a bucket shared across workers when `path` is set, else a per-process one"""
+    if path:
+        if fcntl is not None:
+            return FileTokenBucket(rate_per_minute, burst, path)
+        print("⚠️ LLM_RATE_LIMIT_FILE requires fcntl; using a per-process rate limit")
+    return TokenBucket(rate_per_minute, burst)
+
+
+class AdmissionController:
+    """Admit calls through a token bucket, queueing the rest by priority.
+
+    Callers that find no token wait in a bounded queue ordered by priority
+    class, then arrival. Only the head of the queue draws from the bucket,
+    so an interactive call that arrives behind a batch of ATS checks is
+    admitted first. A call is rejected if the queue is full or the wait
+    exceeds its timeout. A rate of 0 disables admission control.
+    """
+
+    def __init__(self, rate_per_minute=LLM_RATE_LIMIT_PER_MINUTE, burst=LLM_RATE_LIMIT_BURST,
+                 max_queue_depth=LLM_QUEUE_MAX_DEPTH, queue_timeout=LLM_QUEUE_TIMEOUT,
+                 bucket=None):
+        self.enabled = rate_per_minute > 0
+        if bucket is None and self.enabled:
+            bucket = create_token_bucket(rate_per_minute, burst)
+        self.bucket = bucket
+        self.max_queue_depth = max_queue_depth
+        self.queue_timeout = queue_timeout
+        self._queue = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+        self.admitted = {name: 0 for name in PRIORITY_NAMES.values()}
+        self.queued = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.max_queue_depth_seen = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def acquire(self, priority=PRIORITY_DEFAULT, timeout=None):
+        """Block until the call may proceed; raise RateLimitExceeded otherwise"""
+        if not self.enabled:
+            return
+        timeout = self.queue_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        entry = (priority, next(self._sequence))
+
+        with self._condition:
+            # Fast path: nobody is waiting and a token is available
+            if not self._queue and self.bucket.try_acquire() == 0:
+                self._record_admission(priority, 0)
+                return
+
+            if len(self._queue) >= self.max_queue_depth:
+                self.rejected += 1
+                raise RateLimitExceeded(f"LLM queue is full ({self.max_queue_depth} waiting)")
+
+            heapq.heappush(self._queue, entry)
+            self.queued += 1
+            self.max_queue_depth_seen = max(self.max_queue_depth_seen, len(self._queue))
+
+            try:
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timed_out += 1
+                        raise RateLimitExceeded(f"Timed out after {timeout}s waiting for LLM capacity")
+
+                    if self._queue[0] == entry:
+                        wait = self.bucket.try_acquire()
+                        if wait == 0:
+                            heapq.heappop(self._queue)
+                            self._record_admission(priority, time.monotonic() - started)
+                            return
+                        self._condition.wait(min(wait, remaining))
+                    else:
+                        self._condition.wait(remaining)
+            except BaseException:
+                if entry in self._queue:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                raise
+            finally:
+                # Wake the next head of the queue
+                self._condition.notify_all()
+
+    def _record_admission(self, priority, waited):
+        self.admitted[PRIORITY_NAMES.get(priority, 'default')] += 1
+        self.total_wait_time += waited
+        self.max_wait_time = max(self.max_wait_time, waited)
+
+    def stats(self):
+        """Return queue depth, admission and wait-time metrics"""
+        with self._condition:
+            admitted = sum(self.admitted.values())
+            return {
+                'enabled': self.enabled,
+                'queue_depth': len(self._queue),
+                'max_queue_depth': self.max_queue_depth,
+                'max_queue_depth_seen': self.max_queue_depth_seen,
+                'admitted': dict(self.admitted),
+                'queued': self.queued,
+                'rejected': self.rejected,
+                'timed_out': self.timed_out,
+                'avg_wait_ms': round(self.total_wait_time / admitted * 1000, 2) if admitted else 0,
+                'max_wait_ms': round(self.max_wait_time * 1000, 2)
+            }
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Script to rescore every stored resume with the local ATS scorer
+
+Streams session_data in batches, scores each batch for its job roles in one
+vectorized pass and prints a CSV row per resume next to the stored (LLM)
+ATS score, followed by a summary. Nothing is written back.
+
+Usage: python rescore_ats.py [batch_size] > local_ats_scores.csv
+"""
+
+import csv
+import sys
+import time
+from collections import defaultdict
+
+from ats_scorer import ats_scorer
+from database import db
+from job_roles import JOB_SKILL_REQUIREMENTS
+
+
+def rescore(batch_size=500):
+    """Score all stored resumes and print CSV rows; return (resumes scored, seconds spent scoring)"""
+    writer = csv.writer(sys.stdout)
+    writer.writerow(['user_id', 'resume_filename', 'job_role', 'stored_ats_score', 'local_ats_score',
+                     'skills', 'experience', 'education', 'missing_skills'])
+    scored = 0
+    scoring_time = 0.0
+    differences = []
+
+    with db.get_connection() as connection:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT user_id, resume_filename, job_role, ats_score, resume_text
+            FROM session_data
+            WHERE resume_text IS NOT NULL AND resume_text != ''
+        """)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+
+            by_role = defaultdict(list)
+            for row in rows:
+                role = row['job_role'] if row['job_role'] in JOB_SKILL_REQUIREMENTS else 'Software Engineer'
+                by_role[role].append(row)
+
+            started = time.perf_counter()
+            results = []
+            for role, role_rows in by_role.items():
+                scores = ats_scorer.score_many([row['resume_text'] for row in role_rows], role)
+                results.extend(zip(role_rows, scores))
+            scoring_time += time.perf_counter() - started
+
+            for row, result in results:
+                breakdown = result['breakdown']
+                writer.writerow([row['user_id'], row['resume_filename'], row['job_role'], row['ats_score'],
+                                 result['score'], breakdown['skills'], breakdown['experience'],
+                                 breakdown['education'], '; '.join(result['missing_skills'])])
+                if row['ats_score'] is not None:
+                    differences.append(abs(row['ats_score'] - result['score']))
+            scored += len(rows)
+        cursor.close()
+
+    print("\n=== RESCORE COMPLETE ===", file=sys.stderr)
+    print(f"Resumes scored: {scored}", file=sys.stderr)
+    if scored:
+        print(f"Scoring time: {scoring_time * 1000:.1f} ms ({scoring_time / scored * 1000:.3f} ms per resume)",
+              file=sys.stderr)
+    if differences:
+        print(f"Mean absolute difference from stored ATS scores: {sum(differences) / len(differences):.1f}",
+              file=sys.stderr)
+    return scored, scoring_time
+
+
+if __name__ == "__main__":
+    rescore(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Opt-in cap on resume tokens per prompt; 0 sends the whole normalized resume
+RESUME_TOKEN_BUDGET = int(os.getenv('RESUME_TOKEN_BUDGET', '0'))
+RESUME_LLM_SUMMARY = os.getenv('RESUME_LLM_SUMMARY', '0') == '1'
+RESUME_DIGEST_CACHE_SIZE = int(os.getenv('RESUME_DIGEST_CACHE_SIZE', '256'))
+RESUME_DIGEST_DIR = os.getenv('RESUME_DIGEST_DIR', os.path.join('.cache', 'resume_digest'))
+
+# Rough English average; good enough for budgeting without a tokenizer round trip
+CHARS_PER_TOKEN = 4
+
+# Bullet glyphs PyPDF2 extracts from resume templates (Wingdings/Symbol map to the private use area)
+BULLET_PATTERN = re.compile(r'[\ue000-\uf8ff\u2022\u2023\u2043\u25aa\u25ab\u25cf\u25e6\u27a2]')
+HORIZONTAL_SPACE_PATTERN = re.compile(r'[^\S\n]+')
+BLANK_LINES_PATTERN = re.compile(r'\n{3,}')
+
+SUMMARY_PROMPT = """Summarize the following resume in at most {word_limit} words.
+Keep every skill, technology, job title, employer, date, degree, certification and quantified achievement.
+Use short bullet points grouped under Summary, Skills, Experience, Projects and Education.
+Do not add anything that is not in the resume.
+
+Resume:
+{resume_text}
+
+Summary:"""
+
+
+def estimate_tokens(text):
+    """Approximate the number of LLM tokens in text"""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def normalize_resume_text(text):
+    """Strip PDF layout noise: bullet glyphs, runs of spaces and repeated blank lines"""
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    text = BULLET_PATTERN.sub('- ', text)
+    text = HORIZONTAL_SPACE_PATTERN.sub(' ', text)
+    text = '\n'.join(line.strip() for line in text.split('\n'))
+    return BLANK_LINES_PATTERN.sub('\n\n', text).strip()
+
+
+def fit_to_budget(text, token_budget):
+    """Cut text at a line boundary so it fits within token_budget (0 means no limit)"""
+    if not token_budget or estimate_tokens(text) <= token_budget:
+        return text
+    limit = token_budget * CHARS_PER_TOKEN
+    cut = text.rfind('\n', 0, limit)
+    if cut < limit // 2:
+        cut = limit
+    return text[:cut].rstrip()
+
+
+class ResumeDigestStore:
+    """Normalized (and optionally summarized) resume text, computed once per resume.
+
+    Digests are keyed by the SHA-256 of the extracted text and kept in an
+    in-memory LRU backed by a directory of JSON files, like the PDF text
+    cache. Every prompt that embeds a resume goes through prompt_text(), so
+    an ATS check that sends the resume twice pays for normalization (and
+    any LLM summary) only once.
+    """
+
+    def __init__(self, token_budget=RESUME_TOKEN_BUDGET, llm_summary=RESUME_LLM_SUMMARY,
+                 max_entries=RESUME_DIGEST_CACHE_SIZE, cache_dir=RESUME_DIGEST_DIR):
+        self.token_budget = token_budget
+        self.llm_summary = llm_summary
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._summary_locks = {}
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.summaries = 0
+        self.summary_failures = 0
+        self.truncations = 0
+        self.raw_tokens = 0
+        self.prompt_tokens = 0
+
+        if self.cache_dir:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+            except OSError as e:
+                print(f"⚠️ Resume digest directory unavailable, using memory only: {e}")
+                self.cache_dir = None
+
+    @staticmethod
+    def key_for(resume_text):
+        """Return the digest key for extracted resume text"""
+        return hashlib.sha256(resume_text.encode('utf-8')).hexdigest()
+
+    def _path_for(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _remember(self, key, digest):
+        """Insert into the LRU, evicting the oldest entry when full"""
+        self._entries[key] = digest
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _store(self, key, digest):
+        with self._lock:
+            self._remember(key, digest)
+
+        if self.cache_dir:
+            # Write to a temp file and rename so readers never see a partial digest
+            path = self._path_for(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(digest, f)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"⚠️ Error writing resume digest: {e}")
+
+    def get(self, resume_text):
+        """Return the digest dict ({'normalized', 'summary'}) for resume text, building it on a miss"""
+        key = self.key_for(resume_text)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return self._entries[key]
+
+        if self.cache_dir:
+            try:
+                with open(self._path_for(key), 'r', encoding='utf-8') as f:
+                    digest = json.load(f)
+                with self._lock:
+                    self._remember(key, digest)
+                    self.disk_hits += 1
+                return digest
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Error reading resume digest: {e}")
+
+        with self._lock:
+            self.misses += 1
+        digest = {'normalized': normalize_resume_text(resume_text), 'summary': None}
+        self._store(key, digest)
+        return digest
+
+    def _summarize(self, resume_text, digest, summarize):
+        """Add a one-time LLM summary to an over-budget digest; one caller per resume does the work"""
+        key = self.key_for(resume_text)
+        with self._lock:
+            summary_lock = self._summary_locks.setdefault(key, threading.Lock())
+
+        with summary_lock:
+            digest = self.get(resume_text)
+            if digest.get('summary') is None:
+                prompt = SUMMARY_PROMPT.format(word_limit=int(self.token_budget * 0.75),
+                                               resume_text=digest['normalized'])
+                try:
+                    summary = summarize(prompt, self.token_budget).strip()
+                except Exception as e:
+                    print(f"⚠️ Resume summary failed, using truncated text: {e}")
+                    summary = ''
+                    with self._lock:
+                        self.summary_failures += 1
+                if summary:
+                    digest = dict(digest, summary=summary)
+                    self._store(key, digest)
+                    with self._lock:
+                        self.summaries += 1
+
+        with self._lock:
+            self._summary_locks.pop(key, None)
+        return digest
+
+    def prompt_text(self, resume_text, summarize=None):
+        """Return the resume text to embed in a prompt, within the token budget.
+
+        Over-budget resumes are summarized once through `summarize(prompt,
+        max_tokens)` when RESUME_LLM_SUMMARY is enabled; otherwise, or if
+        the summary fails, the normalized text is cut to the budget.
+        """
+        digest = self.get(resume_text)
+        normalized = digest['normalized']
+        if (self.token_budget and estimate_tokens(normalized) > self.token_budget
+                and self.llm_summary and summarize is not None and digest.get('summary') is None):
+            digest = self._summarize(resume_text, digest, summarize)
+
+        text = digest.get('summary') or fit_to_budget(normalized, self.token_budget)
+        if len(text) < len(normalized) and not digest.get('summary'):
+            print(f"⚠️ Resume truncated to RESUME_TOKEN_BUDGET ({self.token_budget} tokens): "
+                  f"sent {estimate_tokens(text)} of {estimate_tokens(normalized)} estimated tokens")
+            with self._lock:
+                self.truncations += 1
+        with self._lock:
+            self.raw_tokens += estimate_tokens(resume_text)
+            self.prompt_tokens += estimate_tokens(text)
+        return text
+
+    def stats(self):
+        """Return hit/miss counters and estimated prompt tokens saved"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'token_budget': self.token_budget,
+                'llm_summary': self.llm_summary,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round(hits / lookups, 4) if lookups else 0,
+                'summaries': self.summaries,
+                'summary_failures': self.summary_failures,
+                'truncations': self.truncations,
+                'raw_tokens': self.raw_tokens,
+                'prompt_tokens': self.prompt_tokens,
+                'tokens_saved': self.raw_tokens - self.prompt_tokens
+            }
+
+
+# Global resume digest store
+resume_digests = ResumeDigestStore()
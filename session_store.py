@@ -0,0 +1,234 @@
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSession, SecureCookieSessionInterface, SessionInterface
+from itsdangerous import BadSignature, Signer
+
+# Load environment variables
+load_dotenv()
+
+SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'sql')
+SESSION_MEMORY_MAX_ENTRIES = int(os.getenv('SESSION_MEMORY_MAX_ENTRIES', '10000'))
+SESSION_PURGE_INTERVAL = int(os.getenv('SESSION_PURGE_INTERVAL', '300'))
+# Worker processes serving the app (set by gunicorn and most PaaS hosts); the memory backend needs exactly one
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '1'))
+
+serializer = TaggedJSONSerializer()
+
+
+class ServerSideSession(SecureCookieSession):
+    """Session whose data lives on the server; the cookie only carries `sid`"""
+
+    def __init__(self, initial=None, sid=None, new=False):
+        super().__init__(initial)
+        self.sid = sid
+        self.new = new
+
+
+class MemorySessionBackend:
+    """In-process LRU session store for single-process deployments"""
+
+    def __init__(self, max_entries=SESSION_MEMORY_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sid):
+        """Return the serialized session data, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is None:
+                return None
+            data, expires_at = entry
+            if expires_at < time.time():
+                del self._entries[sid]
+                return None
+            self._entries.move_to_end(sid)
+            return data
+
+    def set(self, sid, data, lifetime):
+        """Store serialized session data for `lifetime` seconds"""
+        with self._lock:
+            self._entries[sid] = (data, time.time() + lifetime)
+            self._entries.move_to_end(sid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, sid):
+        """Remove a session"""
+        with self._lock:
+            self._entries.pop(sid, None)
+
+
+class SQLSessionBackend:
+    """Session store in the `server_sessions` table, shared by every worker"""
+
+    def __init__(self, db, purge_interval=SESSION_PURGE_INTERVAL):
+        self.db = db
+        self.purge_interval = purge_interval
+        self._last_purge = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, sid):
+        """Return the serialized session data, or None if missing or expired"""
+        return self.db.get_server_session(sid)
+
+    def set(self, sid, data, lifetime):
+        """Store serialized session data for `lifetime` seconds"""
+        # Naive UTC, compared against UTC_TIMESTAMP() so the server's time zone doesn't matter
+        expires_at = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=lifetime)
+        self.db.save_server_session(sid, data, expires_at)
+        self._maybe_purge()
+
+    def delete(self, sid):
+        """Remove a session"""
+        self.db.delete_server_session(sid)
+
+    def _maybe_purge(self):
+        """Delete expired rows at most once per purge interval per process"""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_purge < self.purge_interval:
+                return
+            self._last_purge = now
+        self.db.purge_expired_server_sessions()
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Flask session interface that keeps session data in a server-side backend.
+
+    The cookie holds only a random session id signed with the app's secret
+    key, so large values such as resume text and generated questions are
+    no longer sent with every request.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    @staticmethod
+    def _signer(app):
+        return Signer(app.secret_key, salt='server-side-session')
+
+    def open_session(self, app, request):
+        if not app.secret_key:
+            return None
+
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(cookie).decode('utf-8')
+            except BadSignature:
+                sid = None
+            if sid:
+                data = self.backend.get(sid)
+                if data is not None:
+                    try:
+                        return ServerSideSession(serializer.loads(data), sid=sid)
+                    except ValueError:
+                        pass
+
+        return ServerSideSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        # If the session is modified to be empty, drop it and remove the cookie
+        if not session:
+            if session.modified:
+                self.backend.delete(session.sid)
+                response.delete_cookie(
+                    name,
+                    domain=domain,
+                    path=path,
+                    secure=secure,
+                    samesite=samesite,
+                    httponly=httponly,
+                )
+                response.vary.add('Cookie')
+            return
+
+        if not self.should_set_cookie(app, session):
+            return
+
+        if session.modified or session.new:
+            lifetime = int(app.permanent_session_lifetime.total_seconds())
+            self.backend.set(session.sid, serializer.dumps(dict(session)), lifetime)
+
+        response.set_cookie(
+            name,
+            self._signer(app).sign(session.sid).decode('utf-8'),
+            expires=self.get_expiration_time(app, session),
+            httponly=httponly,
+            domain=domain,
+            path=path,
+            secure=secure,
+            samesite=samesite,
+        )
+        response.vary.add('Cookie')
+
+
+def persist_session(app, session):
+    """Write the session to its backend immediately.
+
+    Needed when a streamed response changes the session after its headers
+    have been sent. Returns False for the cookie backend, which cannot be
+    updated once the response has started.
+    """
+    interface = app.session_interface
+    if not isinstance(interface, ServerSideSessionInterface):
+        print("⚠️ Session changes made while streaming are lost with the cookie session backend")
+        return False
+    lifetime = int(app.permanent_session_lifetime.total_seconds())
+    interface.backend.set(session.sid, serializer.dumps(dict(session)), lifetime)
+    session.modified = False
+    return True
+
+
+def regenerate_session(app, session):
+    """Move the session to a fresh id and delete the old one from the backend.
+
+    Call on login, logout and any change of role so a session id planted or
+    observed before the change cannot be used after it. Flask's signed
+    cookie session has no id to rotate, so this is a no-op there.
+    """
+    interface = app.session_interface
+    if not isinstance(interface, ServerSideSessionInterface) or not isinstance(session, ServerSideSession):
+        return
+    interface.backend.delete(session.sid)
+    session.sid = secrets.token_urlsafe(32)
+    session.new = True
+    session.modified = True
+
+
+def create_session_interface(backend=SESSION_BACKEND, db=None, workers=WEB_CONCURRENCY):
+    """Build the session interface for the configured backend.
+
+    `sql` (the default) stores sessions in MySQL so every worker sees them,
+    `memory` keeps them in this process and is refused when more than one
+    worker runs, and `cookie` keeps Flask's default signed cookie.
+    """
+    if backend == 'cookie':
+        return SecureCookieSessionInterface()
+    if backend == 'sql':
+        if db is None:
+            raise ValueError("The 'sql' session backend requires a DatabaseManager")
+        return ServerSideSessionInterface(SQLSessionBackend(db))
+    if backend == 'memory':
+        if workers > 1:
+            raise ValueError(f"The 'memory' session backend cannot be shared by {workers} workers; use 'sql'")
+        return ServerSideSessionInterface(MemorySessionBackend())
+    raise ValueError(f"Unknown session backend: {backend}")
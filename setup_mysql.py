@@ -126,7 +126,7 @@ def test_connection():
     
     try:
         from database import db
-        if db.connection and db.connection.is_connected():
+        if db.is_connection_valid():
             print("✅ Database connection test successful!")
             return True
         else:
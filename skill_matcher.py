@@ -0,0 +1,301 @@
+import json
+import os
+import re
+from collections import deque
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+SKILL_TAXONOMY_FILE = os.getenv('SKILL_TAXONOMY_FILE', '')
+
+# Words ("node.js", "c++", "c#") and single punctuation marks ("/", "-"); whitespace and "_" separate tokens
+TOKEN_PATTERN = re.compile(r'[^\W_]+(?:\.[^\W_]+)*[+#]*|[^\w\s]')
+
+# Synonyms this short ("AI", "Go", "R") only match with the exact capitalization given
+CASE_SENSITIVE_MAX_LENGTH = 2
+
+# Canonical skill name -> synonyms, in the order skills are reported
+DEFAULT_SKILL_TAXONOMY = {
+    'Python': ['python'],
+    'JavaScript': ['javascript', 'JS', 'ecmascript'],
+    'Java': ['java'],
+    'C++': ['c++', 'cpp'],
+    'C#': ['c#', 'csharp'],
+    'PHP': ['php'],
+    'Ruby': ['ruby'],
+    'Go': ['Go', 'golang'],
+    'Rust': ['rust'],
+    'HTML': ['html', 'html5'],
+    'CSS': ['css', 'css3'],
+    'React': ['react', 'react.js', 'reactjs'],
+    'Vue': ['vue', 'vue.js', 'vuejs'],
+    'Angular': ['angular', 'angular.js', 'angularjs'],
+    'Node.js': ['node.js', 'nodejs', 'node'],
+    'Express': ['express', 'express.js', 'expressjs'],
+    'Django': ['django'],
+    'Flask': ['flask'],
+    'Spring': ['spring', 'spring boot'],
+    'Laravel': ['laravel'],
+    'MySQL': ['mysql'],
+    'PostgreSQL': ['postgresql', 'postgres'],
+    'MongoDB': ['mongodb', 'mongo'],
+    'Redis': ['redis'],
+    'AWS': ['aws', 'amazon web services'],
+    'Azure': ['azure'],
+    'Docker': ['docker'],
+    'Kubernetes': ['kubernetes', 'k8s'],
+    'Git': ['git'],
+    'Jenkins': ['jenkins'],
+    'CI/CD': ['ci/cd', 'continuous integration', 'continuous delivery', 'continuous deployment'],
+    'Machine Learning': ['machine learning', 'ML'],
+    'AI': ['AI', 'artificial intelligence'],
+    'Data Science': ['data science'],
+    'Analytics': ['analytics'],
+    'TensorFlow': ['tensorflow'],
+    'PyTorch': ['pytorch'],
+    'Pandas': ['pandas'],
+    'NumPy': ['numpy'],
+    'Scikit-learn': ['scikit-learn', 'sklearn']
+}
+
+
+# Concrete skills that satisfy the broader role requirements in job_roles.JOB_SKILL_REQUIREMENTS.
+# Everyday words ("graph", "cloud", "sprint") are qualified into phrases so they don't match unrelated prose.
+REQUIREMENT_KEYWORDS = {
+    'Programming Languages': ['Python', 'Java', 'JavaScript', 'TypeScript', 'C++', 'C#', 'Go', 'Rust', 'Kotlin',
+                              'Ruby', 'PHP', 'Scala'],
+    'Data Structures': ['data structures', 'linked list', 'hash map', 'binary tree', 'graph algorithms',
+                        'trees and graphs', 'binary heap', 'priority queue'],
+    'Algorithms': ['algorithms', 'dynamic programming', 'sorting', 'complexity analysis', 'leetcode'],
+    'Software Design': ['software design', 'design patterns', 'system design', 'object-oriented', 'OOP',
+                        'microservices', 'SOLID'],
+    'Testing': ['unit testing', 'integration testing', 'TDD', 'pytest', 'JUnit', 'Jest', 'Selenium'],
+    'Databases': ['MySQL', 'PostgreSQL', 'MongoDB', 'Redis', 'SQL', 'Oracle', 'Cassandra', 'DynamoDB'],
+    'APIs': ['API', 'REST', 'RESTful', 'GraphQL', 'gRPC', 'OpenAPI'],
+    'Server Management': ['Linux', 'Nginx', 'Apache', 'server administration', 'bash', 'shell scripting'],
+    'Cloud Platforms': ['AWS', 'Azure', 'GCP', 'Google Cloud', 'cloud computing', 'cloud infrastructure'],
+    'Responsive Design': ['responsive design', 'media queries', 'Bootstrap', 'Tailwind', 'flexbox',
+                          'mobile-first'],
+    'UI/UX': ['user interface', 'user experience', 'Figma', 'accessibility', 'usability'],
+    'Frontend Technologies': ['HTML', 'CSS', 'JavaScript', 'TypeScript', 'React', 'Vue', 'Angular'],
+    'Backend Technologies': ['Node.js', 'Express', 'Django', 'Flask', 'Spring', 'Laravel', 'FastAPI'],
+    'DevOps': ['Docker', 'Kubernetes', 'Jenkins', 'CI/CD', 'Terraform', 'Ansible', 'GitHub Actions'],
+    'Machine Learning': ['scikit-learn', 'TensorFlow', 'PyTorch', 'XGBoost', 'regression', 'classification'],
+    'Statistics': ['statistics', 'statistical', 'hypothesis testing', 'probability', 'A/B testing', 'regression'],
+    'Data Analysis': ['data analysis', 'Pandas', 'NumPy', 'Excel', 'Tableau', 'Power BI', 'analytics',
+                      'visualization'],
+    'Deep Learning': ['deep learning', 'neural networks', 'CNN', 'RNN', 'LSTM', 'transformers', 'TensorFlow',
+                      'PyTorch', 'Keras'],
+    'Data Processing': ['ETL', 'Spark', 'Hadoop', 'Airflow', 'Kafka', 'data pipeline', 'Pandas'],
+    'Model Deployment': ['model deployment', 'MLOps', 'MLflow', 'SageMaker', 'model serving', 'Docker',
+                         'Kubernetes'],
+    'NLP': ['natural language processing', 'NLTK', 'spaCy', 'BERT', 'LLM', 'transformers', 'text classification'],
+    'Computer Vision': ['computer vision', 'OpenCV', 'image processing', 'object detection', 'image classification',
+                        'YOLO'],
+    'Containerization': ['Docker', 'Kubernetes', 'containers', 'Helm', 'OpenShift'],
+    'Monitoring': ['monitoring', 'Prometheus', 'Grafana', 'Datadog', 'ELK', 'New Relic', 'observability'],
+    'Infrastructure': ['infrastructure', 'Terraform', 'Ansible', 'CloudFormation', 'infrastructure as code',
+                       'Linux'],
+    'Database Design': ['database design', 'data modeling', 'normalization', 'schema design', 'ER diagrams'],
+    'Performance Tuning': ['performance tuning', 'query optimization', 'indexing', 'execution plans', 'caching'],
+    'Security': ['information security', 'cybersecurity', 'network security', 'encryption', 'IAM',
+                 'access control', 'OWASP', 'firewalls'],
+    'Automation': ['automation', 'scripting', 'Terraform', 'Ansible', 'bash', 'Python'],
+    'Networking': ['networking', 'TCP/IP', 'DNS', 'VPC', 'load balancing', 'firewalls', 'VPN'],
+    'Design Tools': ['Figma', 'Sketch', 'Adobe XD', 'Photoshop', 'Illustrator', 'InVision'],
+    'User Research': ['user research', 'user interviews', 'usability testing', 'personas', 'surveys'],
+    'Prototyping': ['prototyping', 'prototypes', 'wireframes', 'wireframing', 'mockups'],
+    'Visual Design': ['visual design', 'typography', 'color theory', 'branding', 'layout design', 'page layout'],
+    'Interaction Design': ['interaction design', 'user flows', 'micro-interactions', 'information architecture'],
+    'Security Tools': ['SIEM', 'Splunk', 'Wireshark', 'Nmap', 'Metasploit', 'Burp Suite', 'IDS/IPS',
+                       'intrusion detection'],
+    'Risk Assessment': ['risk assessment', 'risk management', 'threat modeling', 'vulnerability assessment'],
+    'Incident Response': ['incident response', 'forensics', 'threat hunting', 'SOC'],
+    'Compliance': ['compliance', 'ISO 27001', 'GDPR', 'HIPAA', 'PCI DSS', 'SOC 2', 'NIST'],
+    'Mobile Frameworks': ['React Native', 'Flutter', 'SwiftUI', 'Jetpack Compose', 'Xamarin', 'Ionic'],
+    'Platform Knowledge': ['Android', 'iOS', 'Swift', 'Kotlin', 'Objective-C', 'Xcode', 'Android Studio'],
+    'Performance': ['performance optimization', 'app performance', 'optimization', 'profiling', 'latency',
+                    'memory management'],
+    'Product Strategy': ['product strategy', 'roadmap', 'product vision', 'go-to-market', 'prioritization', 'OKRs'],
+    'Market Research': ['market research', 'competitive analysis', 'customer interviews', 'market analysis'],
+    'Agile/Scrum': ['Agile', 'Scrum', 'Kanban', 'sprint planning', 'Jira'],
+    'Communication': ['communication skills', 'stakeholder management', 'presentations', 'collaboration'],
+    'Testing Frameworks': ['Selenium', 'Cypress', 'pytest', 'JUnit', 'TestNG', 'Playwright', 'Appium'],
+    'Manual Testing': ['manual testing', 'test cases', 'test plans', 'regression testing', 'exploratory testing'],
+    'Bug Tracking': ['bug tracking', 'Jira', 'Bugzilla', 'defect tracking'],
+    'Quality Assurance': ['quality assurance', 'QA', 'test automation', 'quality control'],
+    'Microcontrollers': ['microcontrollers', 'Arduino', 'STM32', 'ARM Cortex', 'Raspberry Pi',
+                         'PIC microcontroller', 'AVR'],
+    'Hardware': ['hardware', 'circuit design', 'PCB', 'oscilloscope', 'FPGA', 'electronics'],
+    'Real-time Systems': ['real-time', 'RTOS', 'FreeRTOS', 'embedded Linux', 'interrupts'],
+    'Debugging': ['debugging', 'GDB', 'JTAG', 'troubleshooting'],
+    'Game Engines': ['Unity3D', 'Unity engine', 'Unity game', 'Unreal Engine', 'Godot', 'Unreal'],
+    'Programming': ['C++', 'C#', 'Python', 'Java', 'Lua', 'programming'],
+    '3D Graphics': ['3D graphics', 'OpenGL', 'DirectX', 'Vulkan', 'shaders', 'Blender', 'rendering'],
+    'Physics': ['physics', 'physics engine', 'collision detection', 'rigid body'],
+    'Game Design': ['game design', 'level design', 'gameplay', 'game mechanics']
+}
+
+
+def tokenize(text):
+    """Split text into the tokens skills are matched on"""
+    return TOKEN_PATTERN.findall(text)
+
+
+def load_skill_taxonomy(path=SKILL_TAXONOMY_FILE):
+    """Load a {skill: [synonyms]} JSON taxonomy, or the built-in one if path is empty or unreadable"""
+    if not path:
+        return DEFAULT_SKILL_TAXONOMY
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            taxonomy = json.load(f)
+        if not isinstance(taxonomy, dict):
+            raise ValueError("taxonomy must be a JSON object")
+        return taxonomy
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Error loading skill taxonomy {path}, using the built-in one: {e}")
+        return DEFAULT_SKILL_TAXONOMY
+
+
+# Requirements whose own name is too common in resumes to count; they match only their keywords
+GENERIC_REQUIREMENT_NAMES = {'Security', 'Performance', 'Communication'}
+
+
+def requirement_taxonomy(job_skill_requirements, taxonomy=DEFAULT_SKILL_TAXONOMY,
+                         requirement_keywords=REQUIREMENT_KEYWORDS, generic_names=GENERIC_REQUIREMENT_NAMES):
+    """Build a taxonomy for role requirements such as "React/Vue/Angular" or "Databases".
+
+    A requirement matches its full name (unless it is in generic_names),
+    each slash-separated alternative, its entries in requirement_keywords,
+    and the synonyms of any of those that is itself a taxonomy skill.
+    """
+    lowered = {skill.lower(): synonyms for skill, synonyms in taxonomy.items()}
+    result = {}
+    for skills in job_skill_requirements.values():
+        for requirement in skills:
+            if requirement in result:
+                continue
+            synonyms = [] if requirement in generic_names else [requirement]
+            if '/' in requirement:
+                synonyms.extend(part.strip() for part in requirement.split('/') if part.strip())
+            synonyms.extend(requirement_keywords.get(requirement, []))
+            for part in list(synonyms):
+                synonyms.extend(lowered.get(part.lower(), []))
+            result[requirement] = list(dict.fromkeys(synonyms))
+    return result
+
+
+class SkillMatcher:
+    """Find every taxonomy skill in a text in one pass.
+
+    Synonyms are tokenized like the text and compiled once into an
+    Aho-Corasick automaton over tokens, so matching costs one transition
+    per token of text regardless of taxonomy size, and a skill can only
+    match whole words ("Go" does not match "Google", nor "AI" "maintain").
+    Overlapping matches are resolved leftmost-longest. With `match_names`
+    off, a skill's own name is not a synonym unless it is listed, as in
+    the taxonomies built by requirement_taxonomy().
+    """
+
+    def __init__(self, taxonomy, match_names=True):
+        self.taxonomy = dict(taxonomy)
+        self.skills = list(taxonomy)
+        # Trie over lowercased tokens: transitions, failure links and (skill index, length, exact token)
+        # outputs per state
+        self._goto = [{}]
+        self._fail = [0]
+        self._outputs = [[]]
+
+        for index, (skill, synonyms) in enumerate(taxonomy.items()):
+            for synonym in dict.fromkeys(([skill] if match_names else []) + list(synonyms)):
+                tokens = tokenize(synonym)
+                if not tokens:
+                    continue
+                state = 0
+                for token in tokens:
+                    token = token.lower()
+                    next_state = self._goto[state].get(token)
+                    if next_state is None:
+                        next_state = len(self._goto)
+                        self._goto[state][token] = next_state
+                        self._goto.append({})
+                        self._fail.append(0)
+                        self._outputs.append([])
+                    state = next_state
+                exact = tokens[0] if len(tokens) == 1 and len(synonym) <= CASE_SENSITIVE_MAX_LENGTH else None
+                output = (index, len(tokens), exact)
+                if output not in self._outputs[state]:
+                    self._outputs[state].append(output)
+
+        # Breadth-first pass linking each state to its longest proper suffix in the trie
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(token, 0)
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail[next_state]]
+
+    def _match_tokens(self, tokens):
+        """Run the automaton over tokens; return non-overlapping (first, last, skill index) token ranges"""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        candidates = []
+        state = 0
+        for position, token in enumerate(tokens):
+            lowered = token.lower()
+            while state and lowered not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(lowered, 0)
+            if state:
+                for index, length, exact in outputs[state]:
+                    if exact is None or token == exact:
+                        candidates.append((position - length + 1, -position, index))
+
+        # Leftmost-longest: "Spring Boot" wins over "Spring", "Node.js" over "node".
+        # Skills sharing the winning synonym ("Python" and "Programming Languages") all match.
+        candidates.sort()
+        result = []
+        next_free = 0
+        winner = None
+        for first, negative_last, index in candidates:
+            if first >= next_free or (first, negative_last) == winner:
+                result.append((first, -negative_last, index))
+                next_free = -negative_last + 1
+                winner = (first, negative_last)
+        return result
+
+    def matches(self, text):
+        """Return non-overlapping (skill, start, end) matches in text order"""
+        if not text:
+            return []
+        spans = [match.span() for match in TOKEN_PATTERN.finditer(text)]
+        tokens = [text[start:end] for start, end in spans]
+        return [(self.skills[index], spans[first][0], spans[last][1])
+                for first, last, index in self._match_tokens(tokens)]
+
+    def scan(self, text):
+        """Return {skill: {'count', 'positions'}} for the skills found, in taxonomy order"""
+        found = {}
+        for skill, start, end in self.matches(text):
+            entry = found.setdefault(skill, {'count': 0, 'positions': []})
+            entry['count'] += 1
+            entry['positions'].append((start, end))
+        return {skill: found[skill] for skill in self.skills if skill in found}
+
+    def extract(self, text, limit=None):
+        """Return the skills found in text, in taxonomy order"""
+        if not text:
+            return []
+        # Positions are not needed here, so skip building spans
+        found = {self.skills[index] for _, _, index in self._match_tokens(tokenize(text))}
+        skills = [skill for skill in self.skills if skill in found]
+        return skills[:limit] if limit else skills
+
+
+# Global matcher for resume skills, built once at startup
+skill_matcher = SkillMatcher(load_skill_taxonomy())
@@ -0,0 +1,14 @@
+import os
+import sys
+
+import mysql.connector
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _no_database(**config):
+    raise mysql.connector.Error(msg="MySQL is not available in unit tests")
+
+
+# Importing database.py opens connections for the global DatabaseManager; unit tests never reach a server
+mysql.connector.connect = _no_database
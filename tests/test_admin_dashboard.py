@@ -0,0 +1,134 @@
+import base64
+import datetime
+import json
+from urllib.parse import quote
+
+import pytest
+
+import app as app_module
+from session_store import create_session_interface
+
+ROLE_STATS = [
+    {'job_role': 'Backend Developer', 'sessions': 3, 'ats_sessions': 2, 'ats_total': 150,
+     'interview_sessions': 2, 'interview_total': 70, 'highest_interview': 40},
+    {'job_role': 'Data Scientist', 'sessions': 1, 'ats_sessions': 1, 'ats_total': 60,
+     'interview_sessions': 0, 'interview_total': 0, 'highest_interview': None}
+]
+DISTRIBUTION = {'ats': {80: 1, 70: 1, 60: 1}, 'interview': {30: 1, 40: 1}}
+ROW = {'id': 7, 'updated_at': datetime.datetime(2026, 1, 2, 3, 4, 5), 'username': 'alice', 'ats_score': 80,
+       'interview_score': 40}
+
+
+class FakeDatabase:
+    def __init__(self, rows, has_more):
+        self.rows = rows
+        self.has_more = has_more
+        self.pages = []
+
+    def get_dashboard_page(self, sort, after, limit):
+        self.pages.append((sort, after, limit))
+        return self.rows, self.has_more
+
+    def get_role_stats(self):
+        return ROLE_STATS
+
+    def get_score_distribution(self):
+        return DISTRIBUTION
+
+
+@pytest.fixture
+def dashboard(monkeypatch):
+    """Render /admin_dashboard as an admin against a fake database, returning the template context"""
+    rendered = {}
+
+    def render_template(template, **context):
+        rendered['template'] = template
+        rendered.update(context)
+        return 'dashboard'
+
+    fake_db = FakeDatabase([ROW], has_more=True)
+    monkeypatch.setattr(app_module, 'db', fake_db)
+    monkeypatch.setattr(app_module, 'render_template', render_template)
+    monkeypatch.setattr(app_module, 'database_initialized', True)
+    monkeypatch.setattr(app_module.app, 'session_interface', create_session_interface('memory'))
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['user'] = 'admin'
+        session['role'] = 'admin'
+
+    def get(query=''):
+        rendered.clear()
+        response = client.get('/admin_dashboard' + query)
+        return response, rendered, fake_db
+    return get
+
+
+def test_dashboard_context(dashboard):
+    response, context, _ = dashboard()
+    assert response.status_code == 200
+    assert context['template'] == 'admin_dashboard.html'
+    assert context['data'] == [ROW]
+    assert context['ats_score_buckets'] == [(60, 1), (70, 1), (80, 1)]
+    assert context['interview_score_buckets'] == [(30, 1), (40, 1)]
+    assert context['ats_scores'] == [80, 70, 60]
+    assert context['interview_scores'] == [40, 30]
+    assert context['average_ats'] == 70
+    assert context['highest_interview'] == 40
+    assert context['job_roles'] == {
+        'Backend Developer': {'count': 3, 'avg_ats': 50, 'avg_interview': 23.33},
+        'Data Scientist': {'count': 1, 'avg_ats': 60, 'avg_interview': 0}
+    }
+    assert context['next_cursor']
+
+
+def test_dashboard_requires_admin():
+    assert app_module.app.test_client().get('/admin_dashboard').status_code in (302, 403)
+
+
+def test_score_buckets_are_in_score_order():
+    assert app_module.score_buckets({90: 2, 10: 1, 55: 3}) == [(10, 1), (55, 3), (90, 2)]
+    assert app_module.score_buckets({}) == []
+    assert app_module.expand_score_buckets([(10, 1), (55, 2)]) == [55, 55, 10]
+
+
+@pytest.mark.parametrize('sort, position', [
+    ('ats_score', (80, '2026-01-02 03:04:05', 7)),
+    ('interview_score', (40, '2026-01-02 03:04:05', 7)),
+    ('updated_at', (None, '2026-01-02 03:04:05', 7))
+])
+def test_cursor_round_trip(sort, position):
+    token = app_module.encode_dashboard_cursor(ROW, sort)
+    assert app_module.decode_dashboard_cursor(token, sort) == position
+
+
+def test_cursor_for_another_sort_starts_over():
+    token = app_module.encode_dashboard_cursor(ROW, 'ats_score')
+    assert app_module.decode_dashboard_cursor(token, 'interview_score') is None
+
+
+def encode(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+@pytest.mark.parametrize('token', [
+    'not a cursor',
+    '%%%',
+    base64.urlsafe_b64encode(b'not json').decode(),
+    encode(['ats_score', 80, '2026-01-02 03:04:05']),
+    encode(['ats_score', 80, '2026-01-02 03:04:05', 'seven']),
+    encode(['ats_score', {'score': 80}, '2026-01-02 03:04:05', 7]),
+    encode({'sort': 'ats_score'}),
+    encode(42)
+])
+def test_tampered_cursor_starts_from_the_first_page(dashboard, token):
+    assert app_module.decode_dashboard_cursor(token, 'ats_score') is None
+    response, _, fake_db = dashboard(f"?after={quote(token)}")
+    assert response.status_code == 200
+    assert fake_db.pages[-1] == ('ats_score', None, app_module.ADMIN_DASHBOARD_PAGE_SIZE)
+
+
+def test_cursor_is_passed_to_the_next_page_query(dashboard):
+    token = app_module.encode_dashboard_cursor(ROW, 'interview_score')
+    response, _, fake_db = dashboard(f"?sort=interview_score&per_page=5&after={token}")
+    assert response.status_code == 200
+    assert fake_db.pages[-1] == ('interview_score', (40, '2026-01-02 03:04:05', 7), 5)
@@ -0,0 +1,79 @@
+import pytest
+
+from ats_scorer import SECTION_WEIGHTS, ats_scorer, local_ats_feedback
+from job_roles import JOB_SKILL_REQUIREMENTS, SOFTWARE_JOB_ROLES
+
+DATA_SCIENTIST_RESUME = """Jane Doe
+Data Scientist
+
+Experience
+Data Scientist, Acme Analytics 2019 - present
+- Built machine learning models in Python and scikit-learn that cut churn by 18%
+- Statistics and hypothesis testing for 40+ A/B experiments
+- Data analysis in pandas and SQL over 2M rows, dashboards in Tableau
+
+Skills
+Python, R, SQL, machine learning, statistics, data analysis, pandas, NumPy
+
+Education
+M.Sc. in Statistics, 2018
+"""
+
+UNRELATED_RESUME = """John Roe
+Pastry chef with a passion for seasonal menus.
+Baked bread, croissants and wedding cakes for a busy bakery.
+"""
+
+RESUMES = [DATA_SCIENTIST_RESUME, UNRELATED_RESUME, '', '   ', 'Python ' * 2000]
+
+
+def test_section_weights_add_up_to_100():
+    assert sum(SECTION_WEIGHTS.values()) == 100
+
+
+@pytest.mark.parametrize('resume', RESUMES)
+def test_scores_stay_in_range_and_breakdown_sums_to_the_score(resume):
+    for result in ats_scorer.rank(resume):
+        assert 0 <= result['score'] <= 100
+        assert result['score'] == sum(result['breakdown'].values())
+        for section, points in result['breakdown'].items():
+            assert 0 <= points <= SECTION_WEIGHTS[section]
+        required = JOB_SKILL_REQUIREMENTS[result['role']]
+        assert sorted(result['matched_skills'] + result['missing_skills']) == sorted(required)
+
+
+# A NumPy divide-by-zero or invalid-value warning fails the test
+@pytest.mark.filterwarnings('error')
+@pytest.mark.parametrize('resume', ['', None])
+def test_empty_resume_scores_zero(resume):
+    result = ats_scorer.score(resume, 'Data Scientist')
+    assert result['score'] == 0
+    assert result['breakdown'] == {'skills': 0, 'experience': 0, 'education': 0}
+    assert result['matched_skills'] == []
+    assert 'could better demonstrate' in local_ats_feedback(result)
+
+
+def test_role_matching_resume_outranks_an_unrelated_one():
+    matching = ats_scorer.score(DATA_SCIENTIST_RESUME, 'Data Scientist')
+    unrelated = ats_scorer.score(UNRELATED_RESUME, 'Data Scientist')
+    assert matching['score'] > unrelated['score']
+    assert matching['breakdown']['skills'] > unrelated['breakdown']['skills']
+    assert {'Statistics', 'SQL', 'Machine Learning'} <= set(matching['matched_skills'])
+
+
+def test_rank_puts_the_matching_role_near_the_top():
+    ranked = ats_scorer.rank(DATA_SCIENTIST_RESUME)
+    assert len(ranked) == len(SOFTWARE_JOB_ROLES)
+    assert [result['score'] for result in ranked] == sorted((result['score'] for result in ranked), reverse=True)
+    assert 'Data Scientist' in [result['role'] for result in ranked[:3]]
+    assert len(ats_scorer.rank(DATA_SCIENTIST_RESUME, top_k=2)) == 2
+
+
+def test_score_many_matches_score():
+    batch = ats_scorer.score_many(RESUMES, 'Backend Developer')
+    assert batch == [ats_scorer.score(resume, 'Backend Developer') for resume in RESUMES]
+    assert ats_scorer.score_many([], 'Backend Developer') == []
+
+
+def test_unknown_role_falls_back_to_the_first_role():
+    assert ats_scorer.score(DATA_SCIENTIST_RESUME, 'Astronaut')['role'] == ats_scorer.roles[0]
@@ -0,0 +1,64 @@
+import pytest
+
+import app as app_module
+from job_roles import JOB_SKILL_REQUIREMENTS
+from session_store import create_session_interface
+
+RESUME = "Python developer with data structures, algorithms, unit testing and design patterns experience"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app_module.app, 'session_interface', create_session_interface('memory'))
+    monkeypatch.setattr(app_module, 'database_initialized', True)
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['user'] = 'alice'
+        session['user_id'] = 1
+        session['role'] = 'user'
+        session['resume_text'] = RESUME
+    return client
+
+
+@pytest.fixture
+def refined(monkeypatch):
+    """Record how many roles each refinement was asked for, without calling Cohere"""
+    calls = []
+
+    def refine(resume_text, ranked):
+        calls.append(len(ranked))
+        return ranked
+
+    monkeypatch.setattr(app_module, 'cohere_api_key', 'test-key')
+    monkeypatch.setattr(app_module, 'refine_best_fit_roles', refine)
+    return calls
+
+
+@pytest.mark.parametrize('top_k', ['abc', '2.5', '1e3'])
+def test_non_integer_top_k_is_rejected(client, refined, top_k):
+    response = client.post('/best_fit_roles', data={'top_k': top_k, 'refine': 'on'})
+    assert response.status_code == 400
+    assert refined == []
+
+
+def test_non_integer_json_top_k_is_rejected(client, refined):
+    response = client.post('/best_fit_roles', json={'top_k': [3], 'refine': True})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('top_k, expected', [('-5', 1), ('2', 2), ('1000', len(JOB_SKILL_REQUIREMENTS))])
+def test_top_k_is_clamped_to_the_roles(client, refined, top_k, expected):
+    response = client.post('/best_fit_roles', data={'top_k': top_k, 'refine': 'on'})
+    assert response.status_code == 200
+    assert refined == [expected]
+    assert len(response.get_json()['roles']) == len(JOB_SKILL_REQUIREMENTS)
+
+
+def test_default_top_k(client, refined):
+    assert client.post('/best_fit_roles', json={'refine': True}).status_code == 200
+    assert refined == [app_module.BEST_FIT_REFINE_TOP_K]
+
+
+def test_login_required():
+    response = app_module.app.test_client().post('/best_fit_roles')
+    assert response.status_code in (302, 401)
@@ -0,0 +1,184 @@
+import math
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+import app as app_module
+from candidate_index import CandidateIndex
+from session_store import create_session_interface
+
+PYTHON_RESUME = "Python developer building Django APIs on PostgreSQL"
+JAVA_RESUME = "Java developer building Spring services on Oracle"
+
+
+@pytest.fixture
+def index():
+    return CandidateIndex(refresh_interval=0, compact_ratio=0.5)
+
+
+def test_add_makes_a_resume_searchable(index):
+    assert index.add('session_data', 1, 'alice.pdf', PYTHON_RESUME, 'alice', 'Backend Developer')
+    index.add('session_data', 2, 'bob.pdf', JAVA_RESUME, 'bob', 'Backend Developer')
+
+    results = index.search('django')['results']
+    assert [result['username'] for result in results] == ['alice']
+    assert index.similar(PYTHON_RESUME, k=1)[0]['username'] == 'alice'
+
+
+def test_re_adding_the_same_text_is_skipped(index):
+    index.add('session_data', 1, 'alice.pdf', PYTHON_RESUME, 'alice', 'Backend Developer')
+    assert not index.add('session_data', 1, 'alice.pdf', PYTHON_RESUME, 'alice', 'Data Scientist')
+
+    stats = index.stats()
+    assert stats['documents'] == 1
+    assert stats['dead_documents'] == 0
+    assert stats['unchanged_skipped'] == 1
+    assert index.search('django')['results'][0]['job_role'] == 'Data Scientist'
+
+
+def test_re_adding_changed_text_replaces_the_resume(index):
+    index.add('session_data', 1, 'alice.pdf', PYTHON_RESUME, 'alice')
+    index.add('session_data', 2, 'bob.pdf', JAVA_RESUME, 'bob')
+    index.add('session_data', 3, 'carol.pdf', "Go developer building gRPC services", 'carol')
+    assert index.add('session_data', 1, 'alice.pdf', "Rust developer writing embedded firmware", 'alice')
+
+    assert index.search('django')['total'] == 0
+    assert index.search('rust')['results'][0]['username'] == 'alice'
+    assert index.stats()['dead_documents'] == 1
+
+
+def test_dead_documents_are_compacted(index):
+    index.add('session_data', 1, 'alice.pdf', PYTHON_RESUME, 'alice')
+    index.add('session_data', 2, 'bob.pdf', JAVA_RESUME, 'bob')
+    for version in range(5):
+        index.add('session_data', 1, 'alice.pdf', f"{PYTHON_RESUME} version{version}", 'alice')
+
+    stats = index.stats()
+    assert stats['documents'] == 2
+    assert stats['compactions'] >= 1
+    assert len(index._docs) < 4
+    assert 'version0' not in index._vocabulary
+    assert index.search('"django apis" version4')['results'][0]['username'] == 'alice'
+    assert index.search('spring')['results'][0]['username'] == 'bob'
+
+
+def test_idf_counts_live_documents_only(index):
+    index.add('session_data', 1, 'alice.pdf', "kubernetes terraform", 'alice')
+    index.add('session_data', 2, 'bob.pdf', "kubernetes ansible", 'bob')
+    # Replacing bob's resume must not leave his old "kubernetes" posting in the document frequency
+    index.add('session_data', 2, 'bob.pdf', "ansible puppet", 'bob')
+
+    assert index._document_frequency['kubernetes'] == 1
+    score = index.search('kubernetes')['results'][0]['score']
+    live_documents = 2
+    weight = 1 / math.sqrt(2)
+    assert score == pytest.approx(math.log(1 + live_documents / 1) * weight, abs=1e-4)
+
+
+class FakeDatabase:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def iter_resumes_updated_since(self, source, updated_at=None, after_id=0, batch_size=500):
+        self.calls.append((source, updated_at, after_id))
+        if source != 'session_data':
+            return
+        rows = sorted(self.rows, key=lambda row: (row['updated_at'], row['id']))
+        if updated_at is not None:
+            rows = [row for row in rows if (row['updated_at'], row['id']) > (updated_at, after_id)]
+        for start in range(0, len(rows), batch_size):
+            yield rows[start:start + batch_size]
+
+
+def row(row_id, user_id, text, updated_at):
+    return {'id': row_id, 'user_id': user_id, 'username': f'user{user_id}', 'resume_filename': f'{user_id}.pdf',
+            'job_role': None, 'resume_text': text, 'updated_at': updated_at}
+
+
+def test_refresh_picks_up_rows_sharing_the_watermark_second(index):
+    second = datetime(2024, 1, 1, 12, 0, 0)
+    database = FakeDatabase([row(9, 1, PYTHON_RESUME, second)])
+    assert index.refresh(database, force=True) == 1
+
+    # Committed later in the same second, with a lower id than the watermark row
+    database.rows.append(row(5, 2, JAVA_RESUME, second))
+    assert index.refresh(database, force=True) == 1
+    assert index.search('spring')['total'] == 1
+
+    # Rows seen before are read again at the boundary but not re-indexed
+    assert index.refresh(database, force=True) == 0
+    assert index.stats()['documents_added'] == 2
+
+
+class BlockingDatabase(FakeDatabase):
+    """FakeDatabase whose reads wait until the test releases them"""
+
+    def __init__(self, rows):
+        super().__init__(rows)
+        self.release = threading.Event()
+
+    def iter_resumes_updated_since(self, source, updated_at=None, after_id=0, batch_size=500):
+        self.release.wait(2)
+        return super().iter_resumes_updated_since(source, updated_at, after_id, batch_size)
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_first_refresh_runs_in_the_background():
+    index = CandidateIndex(refresh_interval=3600)
+    database = BlockingDatabase([row(1, 1, PYTHON_RESUME, datetime(2024, 1, 1))])
+    started = time.monotonic()
+    assert index.refresh_in_background(database) is False
+    assert index.refresh_in_background(database) is False
+    assert time.monotonic() - started < 1
+    assert index.stats()['ready'] is False
+
+    database.release.set()
+    wait_for(lambda: index.stats()['ready'])
+    assert index.refresh_in_background(database) is True
+    assert index.search('django')['total'] == 1
+    # One pull per table, and no second refresh before the interval
+    assert len(database.calls) == 2
+
+
+def test_failed_refresh_leaves_the_index_warming(index):
+    class BrokenDatabase:
+        def iter_resumes_updated_since(self, *args):
+            raise RuntimeError("database unavailable")
+
+    index.refresh_in_background(BrokenDatabase())
+    wait_for(lambda: not index._refreshing)
+    assert index.stats()['ready'] is False
+
+
+def test_search_answers_503_while_the_index_warms_up(monkeypatch):
+    database = BlockingDatabase([row(1, 1, PYTHON_RESUME, datetime(2024, 1, 1))])
+    database.get_resume_texts = lambda keys: {key: PYTHON_RESUME for key in keys}
+    index = CandidateIndex(refresh_interval=3600)
+    monkeypatch.setattr(app_module, 'db', database)
+    monkeypatch.setattr(app_module, 'candidate_index', index)
+    monkeypatch.setattr(app_module, 'database_initialized', True)
+    monkeypatch.setattr(app_module.app, 'session_interface', create_session_interface('memory'))
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['user'] = 'admin'
+        session['role'] = 'admin'
+
+    response = client.get('/api/candidates/search?q=django')
+    assert response.status_code == 503
+    assert response.get_json()['warming'] is True
+    assert response.headers['Retry-After'] == '5'
+
+    database.release.set()
+    wait_for(lambda: index.stats()['ready'])
+    response = client.get('/api/candidates/search?q=django')
+    assert response.status_code == 200
+    assert response.get_json()['total'] == 1
@@ -0,0 +1,180 @@
+import sqlite3
+from decimal import Decimal
+
+import mysql.connector
+import pytest
+
+import app as app_module
+from database import DatabaseManager
+
+
+class ScriptedCursor:
+    """Cursor returning the rows queued on its connection and recording each statement"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, query, values=None):
+        self.connection.statements.append((' '.join(query.split()), values))
+
+    def fetchall(self):
+        return self.connection.results.pop(0) if self.connection.results else []
+
+    def fetchone(self):
+        rows = self.fetchall()
+        return rows[0] if rows else None
+
+    def close(self):
+        pass
+
+
+class ScriptedConnection:
+    in_transaction = False
+
+    def __init__(self):
+        self.statements = []
+        self.results = []
+
+    def cursor(self, dictionary=False):
+        return ScriptedCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def connection(monkeypatch):
+    connection = ScriptedConnection()
+    monkeypatch.setattr(mysql.connector, 'connect', lambda **config: connection)
+    return connection
+
+
+@pytest.fixture
+def manager(connection):
+    manager = DatabaseManager(pool_size=1, pool_wait_timeout=0.05)
+    connection.statements.clear()
+    return manager
+
+
+def test_role_stats_keep_roles_without_interview_scores(manager, connection):
+    connection.results.append([
+        {'job_role': 'Backend Developer', 'sessions': 2, 'ats_sessions': 2, 'ats_total': Decimal('150'),
+         'interview_sessions': 1, 'interview_total': Decimal('40'), 'highest_interview': 40},
+        {'job_role': 'Data Scientist', 'sessions': 1, 'ats_sessions': 0, 'ats_total': Decimal('0'),
+         'interview_sessions': 0, 'interview_total': Decimal('0'), 'highest_interview': None}
+    ])
+    stats = manager.get_role_stats()
+
+    assert [row['job_role'] for row in stats] == ['Backend Developer', 'Data Scientist']
+    assert stats[0]['ats_total'] == 150 and type(stats[0]['ats_total']) is int
+    assert stats[1]['interview_total'] == 0 and type(stats[1]['interview_total']) is int
+    assert stats[1]['highest_interview'] is None
+    query, _ = connection.statements[0]
+    assert 'GROUP BY job_role' in query
+    # NULL scores are left out of the counts and sums, not counted as zero
+    assert 'COUNT(ats_score)' in query and 'COALESCE(SUM(ats_score), 0)' in query
+
+
+def test_score_distribution_skips_null_scores(manager, connection):
+    connection.results.append([('ats', 80, 2), ('ats', 55, 1), ('interview', 30, 4)])
+    assert manager.get_score_distribution() == {'ats': {80: 2, 55: 1}, 'interview': {30: 4}}
+    query, _ = connection.statements[0]
+    assert 'WHERE ats_score IS NOT NULL GROUP BY ats_score' in query
+    assert 'WHERE interview_score IS NOT NULL GROUP BY interview_score' in query
+
+
+def test_score_distribution_without_scores(manager, connection):
+    assert manager.get_score_distribution() == {'ats': {}, 'interview': {}}
+
+
+class SqliteCursor:
+    """Runs the MySQL statements of get_dashboard_page on SQLite, which orders NULLs the same way"""
+
+    def __init__(self, database):
+        self.database = database
+        self.rows = []
+
+    def execute(self, query, values=None):
+        self.rows = [dict(row) for row in self.database.execute(query.replace('%s', '?'), values or [])]
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class SqliteConnection(ScriptedConnection):
+    def __init__(self, database):
+        super().__init__()
+        self.database = database
+
+    def cursor(self, dictionary=False):
+        return SqliteCursor(self.database)
+
+
+# (id, ats_score, interview_score, updated_at): ties on every score and on updated_at, plus NULL scores
+SESSIONS = [
+    (1, 80, 40, '2026-01-01 10:00:00'),
+    (2, 80, 40, '2026-01-01 10:00:00'),
+    (3, 80, None, '2026-01-01 11:00:00'),
+    (4, 60, 40, '2026-01-01 10:00:00'),
+    (5, None, 30, '2026-01-01 10:00:00'),
+    (6, None, None, '2026-01-01 10:00:00'),
+    (7, 60, 30, '2026-01-01 09:00:00'),
+    (8, 80, 40, '2026-01-01 11:00:00')
+]
+
+
+@pytest.fixture
+def sessions(manager, monkeypatch):
+    database = sqlite3.connect(':memory:', check_same_thread=False)
+    database.row_factory = sqlite3.Row
+    database.executescript("""
+        CREATE TABLE users (id INTEGER PRIMARY KEY, username TEXT);
+        CREATE TABLE user_profiles (user_id INTEGER, full_name TEXT, email TEXT, phone TEXT,
+                                    preferred_job_role TEXT, experience_level TEXT, skills TEXT);
+        CREATE TABLE session_data (id INTEGER PRIMARY KEY, user_id INTEGER, resume_filename TEXT, job_role TEXT,
+                                   interview_score INTEGER, ats_score INTEGER, ats_feedback TEXT,
+                                   skill_gaps TEXT, recommendations TEXT, updated_at TEXT);
+    """)
+    for row_id, ats_score, interview_score, updated_at in SESSIONS:
+        database.execute("INSERT INTO users (id, username) VALUES (?, ?)", (row_id, f"user{row_id}"))
+        database.execute(
+            "INSERT INTO session_data (id, user_id, ats_score, interview_score, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (row_id, row_id, ats_score, interview_score, updated_at))
+    manager.pool.close_all()
+    monkeypatch.setattr(mysql.connector, 'connect', lambda **config: SqliteConnection(database))
+    return manager
+
+
+def expected_order(sort):
+    column = {'ats_score': 1, 'interview_score': 2}.get(sort)
+
+    def key(session):
+        score = session[column] if column else None
+        # Scores descending with NULLs last, then updated_at and id descending
+        return (score is not None, score or 0, session[3], session[0])
+    return [session[0] for session in sorted(SESSIONS, key=key, reverse=True)]
+
+
+@pytest.mark.parametrize('sort', ['ats_score', 'interview_score', 'updated_at'])
+def test_keyset_pages_break_ties_by_id(sessions, sort):
+    seen, after = [], None
+    while True:
+        rows, has_more = sessions.get_dashboard_page(sort, after, limit=2)
+        seen.extend(row['id'] for row in rows)
+        if not has_more:
+            break
+        token = app_module.encode_dashboard_cursor(rows[-1], sort)
+        after = app_module.decode_dashboard_cursor(token, sort)
+    assert seen == expected_order(sort)
@@ -0,0 +1,220 @@
+import threading
+
+import mysql.connector
+import pytest
+from mysql.connector import errorcode
+from mysql.connector.errors import OperationalError, PoolError
+
+import database
+from database import ConnectionPool, DatabaseManager
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, query, values=None):
+        if self.connection.lose_next_query:
+            self.connection.lose_next_query = False
+            raise OperationalError(msg="Lost connection to MySQL server", errno=errorcode.CR_SERVER_LOST)
+        self.connection.queries.append(query)
+
+    def fetchone(self):
+        return {'id': 1, 'username': 'alice'}
+
+    def fetchall(self):
+        return []
+
+    def fetchmany(self, size):
+        rows, self.connection.rows = self.connection.rows[:size], self.connection.rows[size:]
+        return rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    lose_first_query = False
+
+    def __init__(self):
+        self.queries = []
+        self.rows = []
+        self.closed = False
+        self.in_transaction = False
+        self.lose_next_query = FakeConnection.lose_first_query
+        FakeConnection.lose_first_query = False
+
+    def cursor(self, dictionary=False):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.in_transaction = False
+
+    def rollback(self):
+        self.in_transaction = False
+
+    def is_connected(self):
+        return not self.closed
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_mysql(monkeypatch):
+    connections = []
+
+    def connect(**config):
+        connection = FakeConnection()
+        connections.append(connection)
+        return connection
+
+    monkeypatch.setattr(mysql.connector, 'connect', connect)
+    return connections
+
+
+@pytest.fixture
+def manager(fake_mysql):
+    return DatabaseManager(pool_size=1, pool_wait_timeout=0.05)
+
+
+def test_acquire_times_out_when_pool_is_exhausted(fake_mysql):
+    pool = ConnectionPool({}, size=2, wait_timeout=0.05)
+    first = pool.acquire()
+    pool.acquire()
+
+    with pytest.raises(PoolError):
+        pool.acquire()
+    assert pool.stats()['timeouts'] == 1
+
+    pool.release(first)
+    assert pool.acquire() is first
+    assert pool.stats()['created'] == 2
+
+
+def test_release_rolls_back_and_discard_frees_the_slot(fake_mysql):
+    pool = ConnectionPool({}, size=1, wait_timeout=0.05)
+    connection = pool.acquire()
+    connection.in_transaction = True
+    pool.release(connection)
+    assert connection.in_transaction is False
+
+    connection = pool.acquire()
+    pool.release(connection, discard=True)
+    assert connection.closed
+    assert pool.acquire() is not connection
+    assert pool.stats()['discarded'] == 1
+
+
+def test_method_returns_its_connection_to_the_pool(manager):
+    assert manager.get_user('alice') == {'id': 1, 'username': 'alice'}
+    assert manager.pool.stats()['in_use'] == 0
+
+
+def test_connection_is_not_held_between_calls(manager):
+    # A request that ran a query and is now waiting on something slow holds no connection
+    manager.get_user('alice')
+    results = []
+    worker = threading.Thread(target=lambda: results.append(manager.get_user('bob')))
+    worker.start()
+    worker.join()
+    assert results == [{'id': 1, 'username': 'alice'}]
+    assert manager.pool.stats()['timeouts'] == 0
+
+
+def test_exhausted_pool_fails_the_call_and_recovers(manager):
+    with manager.get_connection():
+        assert manager.get_user('alice') is None
+    assert manager.pool.stats()['timeouts'] == 1
+    assert manager.get_user('alice') == {'id': 1, 'username': 'alice'}
+
+
+def test_nested_calls_share_one_connection(manager):
+    acquired = manager.pool.stats()['acquired']
+    manager.create_tables()
+    assert manager.pool.stats()['acquired'] == acquired + 1
+    assert manager.pool.stats()['in_use'] == 0
+
+
+def test_lost_connection_is_discarded_and_the_call_retried_once(manager, fake_mysql):
+    manager.pool.close_all()
+    created = len(fake_mysql)
+    FakeConnection.lose_first_query = True
+    assert manager.get_user('alice') == {'id': 1, 'username': 'alice'}
+
+    lost, fresh = fake_mysql[created:]
+    assert lost.closed
+    assert fresh.queries == ["SELECT * FROM users WHERE username = %s"]
+    stats = manager.pool.stats()
+    assert stats['discarded'] == 1
+    assert stats['in_use'] == 0
+
+
+def test_second_loss_is_not_retried_again(manager, fake_mysql, monkeypatch):
+    attempts = []
+
+    def lose(cursor, query, values=None):
+        attempts.append(cursor.connection)
+        raise OperationalError(msg="Lost connection to MySQL server", errno=errorcode.CR_SERVER_LOST)
+
+    monkeypatch.setattr(FakeCursor, 'execute', lose)
+    manager.pool.close_all()
+    assert manager.get_user('alice') is None
+    assert len(attempts) == 2
+    assert attempts[0] is not attempts[1]
+    assert all(connection.closed for connection in attempts)
+    assert manager.pool.stats()['in_use'] == 0
+
+
+def test_connection_outside_a_method_is_refused(manager):
+    with pytest.raises(RuntimeError):
+        manager.connection
+
+
+def test_module_imports_without_a_server():
+    assert isinstance(database.db, DatabaseManager)
+
+
+def test_stored_resumes_are_sent_to_listeners(manager):
+    saved = []
+    manager.add_resume_listener(lambda *resume: saved.append(resume))
+
+    manager.update_session_data_with_analysis(1, 'alice.pdf', 'Python developer', 'Backend Developer', ats_score=80)
+    manager.update_session_data_with_analysis(1, 'alice.pdf', None, 'Backend Developer', interview_score=7)
+    manager.create_or_update_user_profile(1, preferred_job_role='Data Scientist', resume_text='Python developer')
+    assert saved == [
+        ('session_data', 1, 'alice.pdf', 'Python developer', 'Backend Developer'),
+        ('user_profiles', 1, None, 'Python developer', 'Data Scientist')
+    ]
+
+
+def test_a_failing_listener_does_not_fail_the_write(manager):
+    def broken(*resume):
+        raise RuntimeError("index unavailable")
+
+    manager.add_resume_listener(broken)
+    assert manager.update_session_data_with_analysis(1, 'alice.pdf', 'Python developer', 'Backend Developer')
+
+
+def test_updated_resumes_are_streamed_in_batches(manager, fake_mysql):
+    connection = manager.pool.acquire()
+    connection.rows = [{'id': row_id} for row_id in range(5)]
+    manager.pool.release(connection)
+
+    batches = list(manager.iter_resumes_updated_since('session_data', batch_size=2))
+    assert [[row['id'] for row in batch] for batch in batches] == [[0, 1], [2, 3], [4]]
+    assert len(connection.queries[-1].split('LIMIT')) == 1
+    assert manager.pool.stats()['in_use'] == 0
+    assert manager.pool.stats()['discarded'] == 0
+
+
+def test_abandoned_stream_discards_its_connection(manager):
+    connection = manager.pool.acquire()
+    connection.rows = [{'id': row_id} for row_id in range(5)]
+    manager.pool.release(connection)
+
+    batches = manager.iter_resumes_updated_since('session_data', batch_size=2)
+    next(batches)
+    batches.close()
+    assert manager.pool.stats()['in_use'] == 0
+    assert manager.pool.stats()['discarded'] == 1
@@ -0,0 +1,108 @@
+import threading
+import time
+
+import pytest
+
+import app as app_module
+from candidate_index import CandidateIndex
+from db_status import BackgroundSnapshot
+from session_store import create_session_interface
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def refresh_threads(name):
+    return [thread for thread in threading.enumerate() if thread.name == f"{name}-refresh"]
+
+
+def test_first_get_loads_the_value():
+    snapshot = BackgroundSnapshot('first-load', lambda: 'loaded', ttl=60)
+    value, age = snapshot.get()
+    assert value == 'loaded'
+    assert age < 1
+    assert snapshot.get()[0] == 'loaded'
+    assert snapshot.stats()['refreshes'] == 1
+
+
+def test_stale_value_is_served_while_one_refresh_runs():
+    release = threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(None)
+        if len(calls) > 1:
+            release.wait(2)
+        return len(calls)
+
+    snapshot = BackgroundSnapshot('stale-serve', loader, ttl=0)
+    assert snapshot.get()[0] == 1
+
+    results = []
+    pollers = [threading.Thread(target=lambda: results.append(snapshot.get()[0])) for _ in range(10)]
+    for poller in pollers:
+        poller.start()
+    for poller in pollers:
+        poller.join(2)
+    assert results == [1] * 10
+    assert len(calls) == 2
+    assert len(refresh_threads('stale-serve')) == 1
+
+    release.set()
+    wait_for(lambda: snapshot.stats()['refreshes'] == 2)
+    assert snapshot.get()[0] == 2
+
+
+def test_failed_refresh_keeps_the_last_good_value():
+    calls = []
+
+    def loader():
+        calls.append(None)
+        if len(calls) > 1:
+            raise RuntimeError("database unavailable")
+        return {'status': 'healthy'}
+
+    snapshot = BackgroundSnapshot('failed-refresh', loader, ttl=0)
+    assert snapshot.get()[0] == {'status': 'healthy'}
+    assert snapshot.get()[0] == {'status': 'healthy'}
+    wait_for(lambda: snapshot.stats()['refreshes'] == 2)
+    assert snapshot.get()[0] == {'status': 'healthy'}
+
+
+class RecordingDatabase:
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self.calls.append(name)
+            return {}
+        return record
+
+
+@pytest.fixture
+def probe_client(monkeypatch):
+    database = RecordingDatabase()
+    monkeypatch.setattr(app_module, 'db', database)
+    monkeypatch.setattr(app_module, 'candidate_index', CandidateIndex())
+    monkeypatch.setattr(app_module, 'database_initialized', False)
+    monkeypatch.setattr(app_module.app, 'session_interface', create_session_interface('memory'))
+    return app_module.app.test_client(), database
+
+
+def test_liveness_probe_does_not_initialize_the_database(probe_client):
+    client, database = probe_client
+    assert client.get('/api/health/live').get_json() == {'status': 'ok'}
+    assert database.calls == []
+    assert app_module.database_initialized is False
+
+
+def test_first_other_request_initializes_the_database(probe_client):
+    client, database = probe_client
+    client.get('/login')
+    assert {'verify_database_health', 'get_database_stats'} <= set(database.calls)
+    assert app_module.database_initialized is True
@@ -0,0 +1,227 @@
+import threading
+import time
+
+import pytest
+
+import llm_client
+from circuit_breaker import OPEN, CircuitBreaker, CircuitOpenError
+from llm_client import LLMClient, LLMDeadlineExceeded, ResponseCache, SingleFlight
+from llm_parsers import ParseStats
+from rate_limiter import AdmissionController
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeEvent:
+    def __init__(self, event_type, text=None, finish_reason=None):
+        self.event_type = event_type
+        self.text = text
+        self.finish_reason = finish_reason
+
+
+def stream_events(text, finish_reason='COMPLETE'):
+    events = [FakeEvent('stream-start')] + [FakeEvent('text-generation', text=word) for word in text.split(' ')]
+    if finish_reason:
+        events.append(FakeEvent('stream-end', finish_reason=finish_reason))
+    return events
+
+
+class FakeCohere:
+    """Answers chat calls from a list of replies, one per call"""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.calls = 0
+
+    def chat(self, stream=False, **kwargs):
+        self.calls += 1
+        reply = self.replies.pop(0)
+        return iter(reply) if stream else FakeResponse(reply)
+
+
+def make_client(fake, cache_dir=''):
+    return LLMClient(fake, cache=ResponseCache(ttl=60, max_entries=16, cache_dir=cache_dir),
+                     admission=AdmissionController(rate_per_minute=0), deadline=5)
+
+
+def score(text):
+    return int(text) if text.isdigit() else None
+
+
+def ask(client, **kwargs):
+    return client.chat(model='m', message='prompt', max_tokens=10, temperature=0.5, endpoint='check_ats', **kwargs)
+
+
+def test_valid_response_is_parsed_and_cached():
+    fake = FakeCohere('85')
+    client = make_client(fake)
+
+    assert ask(client, parse=score).parsed == 85
+    cached = ask(client, parse=score)
+    assert cached.parsed == 85
+    assert fake.calls == 1
+
+
+def test_invalid_response_is_not_cached():
+    fake = FakeCohere('no score here', '85')
+    client = make_client(fake)
+
+    assert ask(client, parse=score).parsed is None
+    assert ask(client, parse=score).parsed == 85
+    assert fake.calls == 2
+    assert client.cache.stats()['rejected'] == 1
+
+
+def test_cached_entry_that_fails_to_parse_is_invalidated(tmp_path):
+    fake = FakeCohere('garbage', '85')
+    client = make_client(fake, cache_dir=str(tmp_path))
+
+    # Cached without a parser, as an older version of the app would have
+    assert ask(client).text == 'garbage'
+    assert list(tmp_path.iterdir())
+
+    assert ask(client, parse=score).parsed == 85
+    assert fake.calls == 2
+    assert ask(client, parse=score).parsed == 85
+    assert fake.calls == 2
+
+
+def test_parse_errors_propagate_without_caching():
+    fake = FakeCohere('85', '85')
+    client = make_client(fake)
+
+    def broken(text):
+        raise ValueError("bad parser")
+
+    with pytest.raises(ValueError):
+        ask(client, parse=broken)
+    assert ask(client, parse=score).parsed == 85
+    assert fake.calls == 2
+
+
+def stream(client):
+    return list(client.chat_stream(model='m', message='prompt', max_tokens=10, temperature=0.5,
+                                   endpoint='upload_resume'))
+
+
+def test_completed_stream_is_cached():
+    fake = FakeCohere(stream_events('1. one 2. two'))
+    client = make_client(fake)
+
+    assert ''.join(stream(client)) == '1.one2.two'
+    assert stream(client) == ['1.one2.two']
+    assert fake.calls == 1
+
+
+@pytest.mark.parametrize('finish_reason', [None, 'MAX_TOKENS', 'ERROR'])
+def test_stream_that_does_not_complete_is_not_cached(finish_reason):
+    fake = FakeCohere(stream_events('1. one', finish_reason), stream_events('1. one 2. two'))
+    client = make_client(fake)
+
+    stream(client)
+    assert client.stats()['streams_incomplete'] == 1
+    assert ''.join(stream(client)) == '1.one2.two'
+    assert fake.calls == 2
+
+
+def test_long_generations_get_the_long_deadline():
+    client = LLMClient(FakeCohere(), deadline=20, long_deadline=60, long_tokens=500,
+                       admission=AdmissionController(rate_per_minute=0))
+    assert client.deadline_for(200) == 20
+    assert client.deadline_for(None) == 20
+    assert client.deadline_for(500) == 60
+    assert client.deadline_for(1000) == 60
+
+
+def test_deadline_exceeded_trips_the_breaker():
+    class SlowCohere:
+        def chat(self, **kwargs):
+            time.sleep(0.5)
+            return FakeResponse('85')
+
+    client = LLMClient(SlowCohere(), cache=ResponseCache(ttl=60, max_entries=16, cache_dir=''),
+                       admission=AdmissionController(rate_per_minute=0),
+                       breaker=CircuitBreaker('Test', failure_threshold=1, reset_timeout=30),
+                       deadline=0.05)
+    with pytest.raises(LLMDeadlineExceeded):
+        ask(client)
+    assert client.breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        ask(client)
+
+
+def run_coalesced(flight, fn, callers=8):
+    """Call flight.do from several threads at once; return each caller's result or exception"""
+    outcomes = [None] * callers
+
+    def call(index):
+        try:
+            outcomes[index] = flight.do('key', fn)
+        except Exception as e:
+            outcomes[index] = e
+
+    threads = [threading.Thread(target=call, args=(index,)) for index in range(callers)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 2
+    while flight.stats()['coalesced'] < callers - 1:
+        assert time.monotonic() < deadline, "callers did not coalesce"
+        time.sleep(0.005)
+    return threads, outcomes
+
+
+def test_concurrent_callers_share_one_upstream_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def upstream():
+        calls.append(None)
+        release.wait(2)
+        return FakeResponse('85')
+
+    threads, outcomes = run_coalesced(flight, upstream)
+    release.set()
+    for thread in threads:
+        thread.join(2)
+    assert len(calls) == 1
+    assert all(outcome is outcomes[0] for outcome in outcomes)
+    assert outcomes[0].text == '85'
+    assert flight.stats() == {'in_flight': 0, 'executed': 1, 'coalesced': 7}
+
+
+def test_leader_exception_reaches_every_waiter():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def upstream():
+        release.wait(2)
+        raise RuntimeError("Cohere unavailable")
+
+    threads, outcomes = run_coalesced(flight, upstream)
+    release.set()
+    for thread in threads:
+        thread.join(2)
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+    assert all(outcome is outcomes[0] for outcome in outcomes)
+    # The key is free again once the failed call finishes
+    assert flight.do('key', lambda: 'retried') == 'retried'
+
+
+def test_cache_hits_are_not_counted_as_parses(monkeypatch):
+    stats = ParseStats()
+    monkeypatch.setattr(llm_client, 'parse_stats', stats)
+
+    def parse(text):
+        stats.record('ats', 'regex')
+        return score(text)
+
+    fake = FakeCohere('85')
+    client = make_client(fake)
+    for _ in range(3):
+        assert ask(client, parse=parse).parsed == 85
+    assert fake.calls == 1
+    assert stats.stats()['ats']['regex'] == 1
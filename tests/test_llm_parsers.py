@@ -0,0 +1,39 @@
+import random
+
+import pytest
+
+from benchmark_parsers import PARSERS, load_corpus, normalize, stream_questions
+from llm_parsers import IncrementalQuestionParser
+
+CORPUS = load_corpus()
+QUESTION_SAMPLES = [sample for sample in CORPUS if sample['kind'] == 'questions']
+
+
+def sample_id(sample):
+    return f"{sample['kind']}-{sample['name']}"
+
+
+@pytest.mark.parametrize('sample', CORPUS, ids=sample_id)
+def test_sample_parses_as_expected(sample):
+    parser, _ = PARSERS[sample['kind']]
+    assert normalize(sample['kind'], parser(sample['text'])) == sample['expected']
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 64, 100000])
+@pytest.mark.parametrize('sample', QUESTION_SAMPLES, ids=sample_id)
+def test_streamed_questions_match_in_fixed_chunks(sample, chunk_size):
+    parser = IncrementalQuestionParser()
+    emitted = []
+    text = sample['text']
+    for start in range(0, len(text), chunk_size):
+        emitted.extend(parser.feed(text[start:start + chunk_size]))
+    emitted.extend(parser.finish())
+    assert emitted == sample['expected']
+    assert parser.questions == sample['expected']
+
+
+@pytest.mark.parametrize('sample', QUESTION_SAMPLES, ids=sample_id)
+def test_streamed_questions_match_in_random_chunks(sample):
+    rng = random.Random(0)
+    for _ in range(20):
+        assert stream_questions(sample['text'], rng) == sample['expected']
@@ -0,0 +1,98 @@
+import io
+
+import pytest
+from PyPDF2.errors import PdfReadError
+from reportlab.pdfgen import canvas
+from werkzeug.datastructures import FileStorage
+
+import pdf_extraction
+from pdf_extraction import PDFTextCache
+
+
+def make_pdf(pages):
+    """PDF bytes with one 'Page number N' line per page"""
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer)
+    for page in range(pages):
+        pdf.drawString(100, 750, f"Page number {page}")
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def upload(pdf_bytes, filename):
+    return FileStorage(stream=io.BytesIO(pdf_bytes), filename=filename, content_type='application/pdf')
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = PDFTextCache(max_entries=2, cache_dir=str(tmp_path))
+    monkeypatch.setattr(pdf_extraction, 'pdf_text_cache', cache)
+    return cache
+
+
+def test_repeated_upload_is_served_from_memory(cache):
+    pdf_bytes = make_pdf(2)
+    text = pdf_extraction.extract_pdf_text(upload(pdf_bytes, 'resume.pdf'))
+    assert 'Page number 1' in text
+    assert pdf_extraction.extract_pdf_text(upload(pdf_bytes, 'resume.pdf')) == text
+
+    stats = cache.stats()
+    assert (stats['misses'], stats['memory_hits'], stats['disk_hits']) == (1, 1, 0)
+
+
+def test_lru_evicts_the_oldest_entry(cache):
+    for key in ('a', 'b', 'c'):
+        cache.put(key, key)
+    assert list(cache._entries) == ['b', 'c']
+
+
+def test_restarted_cache_is_served_from_disk(cache, tmp_path):
+    key = cache.key_for(b'resume bytes')
+    cache.put(key, 'Python developer')
+
+    restarted = PDFTextCache(cache_dir=str(tmp_path))
+    assert restarted.get(key) == 'Python developer'
+    assert restarted.get(key) == 'Python developer'
+    stats = restarted.stats()
+    assert (stats['disk_hits'], stats['memory_hits'], stats['misses']) == (1, 1, 0)
+
+
+def test_key_depends_on_content_not_filename(cache):
+    pdf_bytes = make_pdf(1)
+    first = pdf_extraction.extract_pdf_text(upload(pdf_bytes, 'alice.pdf'))
+    assert pdf_extraction.extract_pdf_text(upload(pdf_bytes, 'renamed copy.pdf')) == first
+    assert cache.stats()['memory_hits'] == 1
+
+    pdf_extraction.extract_pdf_text(upload(make_pdf(2), 'alice.pdf'))
+    assert cache.stats()['misses'] == 2
+
+
+@pytest.fixture
+def parallel(monkeypatch):
+    """Send every PDF of two or more pages through a three-worker pool"""
+    monkeypatch.setattr(pdf_extraction, 'PDF_EXTRACT_WORKERS', 3)
+    monkeypatch.setattr(pdf_extraction, 'PDF_PARALLEL_MIN_PAGES', 2)
+    yield
+    if pdf_extraction._pool is not None:
+        pdf_extraction._pool.shutdown()
+        pdf_extraction._pool = None
+
+
+def test_chunked_extraction_keeps_page_order(parallel):
+    text = pdf_extraction._extract_text(make_pdf(10))
+    assert text.split() == ' '.join(f"Page number {page}" for page in range(10)).split()
+    assert pdf_extraction._pool is not None
+
+
+def test_parse_error_propagates_without_resetting_the_pool(parallel):
+    pdf_extraction._extract_text(make_pdf(4))
+    pool = pdf_extraction._pool
+
+    damaged = bytearray(make_pdf(4))
+    content = damaged.find(b'stream', len(damaged) // 2)
+    damaged[content + 10:content + 60] = b'\x00' * 50
+    # The page content is read in a worker, so the error comes back through the pool
+    with pytest.raises(PdfReadError):
+        pdf_extraction._extract_text(bytes(damaged))
+    assert pdf_extraction._pool is pool
@@ -0,0 +1,166 @@
+import threading
+import time
+
+import pytest
+
+import rate_limiter
+from circuit_breaker import CLOSED, CircuitBreaker
+from llm_client import ENDPOINT_PRIORITIES, LLMClient, ResponseCache
+from rate_limiter import AdmissionController, FileTokenBucket, RateLimitExceeded, TokenBucket
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class ManualBucket:
+    """Bucket that only hands out the tokens a test adds"""
+
+    def __init__(self):
+        self.tokens = 0
+        self._lock = threading.Lock()
+
+    def add(self, tokens=1):
+        with self._lock:
+            self.tokens += tokens
+
+    def try_acquire(self):
+        with self._lock:
+            if self.tokens:
+                self.tokens -= 1
+                return 0
+            return 0.01
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_bucket_allows_a_burst_then_refills_at_the_rate():
+    clock = Clock()
+    bucket = TokenBucket(rate_per_minute=60, burst=3, clock=clock)
+    assert [bucket.try_acquire() for _ in range(3)] == [0, 0, 0]
+    assert bucket.try_acquire() == pytest.approx(1.0)
+
+    clock.now += 0.5
+    assert bucket.try_acquire() == pytest.approx(0.5)
+    clock.now += 0.5
+    assert bucket.try_acquire() == 0
+
+
+def test_bucket_refill_is_capped_at_the_burst():
+    clock = Clock()
+    bucket = TokenBucket(rate_per_minute=60, burst=2, clock=clock)
+    clock.now += 3600
+    assert [bucket.try_acquire() for _ in range(2)] == [0, 0]
+    assert bucket.try_acquire() > 0
+
+
+def test_priority_order_is_evaluate_answer_then_questions_then_ats():
+    bucket = ManualBucket()
+    controller = AdmissionController(rate_per_minute=60, max_queue_depth=10, queue_timeout=5, bucket=bucket)
+    admitted = []
+
+    def call(endpoint):
+        controller.acquire(ENDPOINT_PRIORITIES[endpoint])
+        admitted.append(endpoint)
+
+    callers = []
+    for endpoint in ('check_ats', 'analyze_skill_gaps', 'upload_resume', 'evaluate_answer'):
+        caller = threading.Thread(target=call, args=(endpoint,))
+        caller.start()
+        callers.append(caller)
+        wait_for(lambda: controller.stats()['queue_depth'] == len(callers))
+
+    for expected in range(1, 5):
+        bucket.add()
+        wait_for(lambda: len(admitted) == expected)
+    for caller in callers:
+        caller.join(2)
+    assert admitted == ['evaluate_answer', 'upload_resume', 'check_ats', 'analyze_skill_gaps']
+    assert controller.stats()['admitted'] == {'interactive': 1, 'default': 1, 'batch': 2}
+
+
+def test_full_queue_rejects_immediately():
+    bucket = ManualBucket()
+    controller = AdmissionController(rate_per_minute=60, max_queue_depth=2, queue_timeout=5, bucket=bucket)
+    waiters = [threading.Thread(target=controller.acquire) for _ in range(2)]
+    for waiter in waiters:
+        waiter.start()
+    wait_for(lambda: controller.stats()['queue_depth'] == 2)
+
+    started = time.monotonic()
+    with pytest.raises(RateLimitExceeded):
+        controller.acquire()
+    assert time.monotonic() - started < 0.5
+    assert controller.stats()['rejected'] == 1
+
+    bucket.add(2)
+    for waiter in waiters:
+        waiter.join(2)
+    assert controller.stats()['queue_depth'] == 0
+
+
+def test_queue_timeout_raises_and_leaves_the_queue():
+    controller = AdmissionController(rate_per_minute=60, queue_timeout=0.05, bucket=ManualBucket())
+    with pytest.raises(RateLimitExceeded):
+        controller.acquire()
+    stats = controller.stats()
+    assert stats['timed_out'] == 1
+    assert stats['queue_depth'] == 0
+
+
+def test_timed_out_call_never_reaches_cohere():
+    class Cohere:
+        calls = 0
+
+        def chat(self, **kwargs):
+            Cohere.calls += 1
+
+    breaker = CircuitBreaker('Cohere', failure_threshold=1)
+    client = LLMClient(Cohere(), cache=ResponseCache(cache_dir=''), breaker=breaker,
+                       admission=AdmissionController(rate_per_minute=60, queue_timeout=0.05, bucket=ManualBucket()))
+    # The route catches the error and serves its fallback
+    with pytest.raises(RateLimitExceeded):
+        client.chat(model='m', message='prompt', endpoint='check_ats')
+    assert Cohere.calls == 0
+    assert breaker.stats()['state'] == CLOSED
+
+
+def test_zero_rate_disables_admission():
+    controller = AdmissionController(rate_per_minute=0)
+    controller.acquire()
+    assert controller.stats()['enabled'] is False
+
+
+@pytest.mark.skipif(rate_limiter.fcntl is None, reason="the shared bucket needs fcntl")
+def test_file_buckets_share_one_state_file(tmp_path):
+    clock = Clock()
+    path = str(tmp_path / 'llm-bucket.json')
+    first = FileTokenBucket(rate_per_minute=60, burst=2, path=path, clock=clock)
+    second = FileTokenBucket(rate_per_minute=60, burst=2, path=path, clock=clock)
+
+    assert first.try_acquire() == 0
+    assert second.try_acquire() == 0
+    assert first.try_acquire() == pytest.approx(1.0)
+    assert second.try_acquire() == pytest.approx(1.0)
+
+    clock.now += 1
+    assert second.try_acquire() == 0
+    assert first.try_acquire() > 0
+
+
+@pytest.mark.skipif(rate_limiter.fcntl is None, reason="the shared bucket needs fcntl")
+def test_unreadable_state_file_starts_full(tmp_path):
+    path = tmp_path / 'llm-bucket.json'
+    path.write_text('not json')
+    bucket = FileTokenBucket(rate_per_minute=60, burst=1, path=str(path), clock=Clock())
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() > 0
@@ -0,0 +1,22 @@
+from resume_digest import ResumeDigestStore
+
+
+def long_resume(lines=400):
+    return '\n'.join(f"Built service {i} with Python, Kubernetes and PostgreSQL" for i in range(lines))
+
+
+def test_whole_resume_is_sent_by_default():
+    store = ResumeDigestStore(cache_dir='')
+    resume = long_resume()
+    assert store.prompt_text(resume) == resume
+    assert store.stats()['truncations'] == 0
+
+
+def test_budget_truncation_is_counted():
+    store = ResumeDigestStore(token_budget=100, llm_summary=False, cache_dir='')
+    text = store.prompt_text(long_resume())
+    assert len(text) <= 400
+    assert store.stats()['truncations'] == 1
+
+    store.prompt_text('Short resume')
+    assert store.stats()['truncations'] == 1
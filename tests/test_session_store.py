@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from flask import Flask, session
+
+from session_store import (MemorySessionBackend, ServerSideSessionInterface, SQLSessionBackend,
+                           create_session_interface, regenerate_session)
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.secret_key = 'test-secret'
+    backend = MemorySessionBackend()
+    app.session_interface = ServerSideSessionInterface(backend)
+
+    @app.route('/visit')
+    def visit():
+        session['visited'] = True
+        return session.sid
+
+    @app.route('/login')
+    def login():
+        regenerate_session(app, session)
+        session['user'] = 'alice'
+        return session.sid
+
+    @app.route('/logout')
+    def logout():
+        session.clear()
+        regenerate_session(app, session)
+        return ''
+
+    @app.route('/whoami')
+    def whoami():
+        return session.get('user', '')
+
+    return app
+
+
+def session_cookie(client):
+    cookie = client.get_cookie('session')
+    return cookie.value if cookie else None
+
+
+def test_login_issues_a_new_session_id(app):
+    backend = app.session_interface.backend
+    client = app.test_client()
+    old_sid = client.get('/visit').text
+    old_cookie = session_cookie(client)
+
+    new_sid = client.get('/login').text
+    assert new_sid != old_sid
+    assert session_cookie(client) != old_cookie
+    assert backend.get(old_sid) is None
+    assert backend.get(new_sid) is not None
+
+    # The data carried over, but the pre-login id no longer reaches it
+    assert client.get('/whoami').text == 'alice'
+    attacker = app.test_client()
+    attacker.set_cookie('session', old_cookie)
+    assert attacker.get('/whoami').text == ''
+
+
+def test_logout_deletes_the_session(app):
+    backend = app.session_interface.backend
+    client = app.test_client()
+    sid = client.get('/login').text
+    cookie = session_cookie(client)
+
+    client.get('/logout')
+    assert backend.get(sid) is None
+    assert session_cookie(client) is None
+
+    replay = app.test_client()
+    replay.set_cookie('session', cookie)
+    assert replay.get('/whoami').text == ''
+
+
+def test_regenerate_is_a_noop_for_cookie_sessions():
+    app = Flask(__name__)
+    app.secret_key = 'test-secret'
+    app.session_interface = create_session_interface('cookie')
+
+    @app.route('/login')
+    def login():
+        regenerate_session(app, session)
+        session['user'] = 'alice'
+        return ''
+
+    client = app.test_client()
+    client.get('/login')
+    assert session_cookie(client)
+
+
+def test_memory_backend_is_refused_for_several_workers():
+    with pytest.raises(ValueError):
+        create_session_interface('memory', workers=4)
+    assert isinstance(create_session_interface('memory', workers=1).backend, MemorySessionBackend)
+
+
+def test_sql_backend_requires_a_database():
+    with pytest.raises(ValueError):
+        create_session_interface('sql')
+
+
+def test_sql_backend_writes_expiry_in_utc():
+    class Database:
+        def save_server_session(self, sid, data, expires_at):
+            self.expires_at = expires_at
+
+        def purge_expired_server_sessions(self):
+            pass
+
+    database = Database()
+    SQLSessionBackend(database).set('sid', b'data', lifetime=3600)
+    # Naive UTC, to match UTC_TIMESTAMP() in the expiry checks of the queries
+    expected = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=3600)
+    assert database.expires_at.tzinfo is None
+    assert abs(database.expires_at - expected) < timedelta(seconds=5)
@@ -0,0 +1,23 @@
+from job_roles import JOB_SKILL_REQUIREMENTS
+from skill_matcher import SkillMatcher, requirement_taxonomy, skill_matcher
+
+requirement_matcher = SkillMatcher(requirement_taxonomy(JOB_SKILL_REQUIREMENTS, skill_matcher.taxonomy),
+                                   match_names=False)
+
+
+def test_everyday_words_do_not_satisfy_requirements():
+    text = ("Improved the performance of the team with clear communication after an arm injury. "
+            "Ran a sprint, worked as a security guard, drew a graph, sorted a heap of mail and moved "
+            "photos to the cloud. Changed the layout of Unity Hall and took a pic of the ids.")
+    assert requirement_matcher.scan(text) == {}
+
+
+def test_qualified_phrases_satisfy_requirements():
+    text = ("Cybersecurity analyst; ARM Cortex-M4 firmware; Unity3D games; sprint planning; graph algorithms; "
+            "cloud computing; IDS/IPS; communication skills; performance optimization")
+    assert {'Security', 'Microcontrollers', 'Game Engines', 'Agile/Scrum', 'Data Structures', 'Cloud Platforms',
+            'Security Tools', 'Communication', 'Performance'} <= set(requirement_matcher.scan(text))
+
+
+def test_specific_requirement_names_still_match():
+    assert 'Databases' in requirement_matcher.scan("Designed Databases for billing")